@@ -1,12 +1,15 @@
+import time
+
 import streamlit as st
-import plotly.graph_objects as go
-from datetime import datetime
 
 import config as cfg
 from modules.industrial.event_logger import get_event_logger
 from modules.industrial.watchdog import get_watchdog
 from modules.industrial.role_manager import get_role_manager
-from modules.industrial.data_pipeline import get_pipeline
+from modules.industrial.metrics import get_registry, observe, read_all, set_process_name, timed
+
+_render_start = time.perf_counter()
+set_process_name("dashboard")
 
 # PAGE CONFIG
 st.set_page_config(
@@ -17,15 +20,16 @@ st.set_page_config(
 )
 
 # INICIALIZAR SISTEMAS
+# Pipeline, watchdog y event log son unicos por proceso (compartidos entre
+# sesiones) y se crean en el primer fragmento que los usa; solo el
+# usuario/rol vive en session_state. Lo pesado (numpy del historial, pandas
+# de las tablas) se importa dentro del fragmento que lo necesita.
 if 'initialized' not in st.session_state:
-    st.session_state.event_logger = get_event_logger()
-    st.session_state.watchdog = get_watchdog()
     st.session_state.role_manager = get_role_manager()
-    st.session_state.pipeline = get_pipeline()
     st.session_state.initialized = True
     
     # Log inicio
-    st.session_state.event_logger.log_event(
+    get_event_logger().log_event(
         "SYSTEM",
         "INFO",
         f"Sistema iniciado en modo {cfg.MODO_OPERACION}"
@@ -123,17 +127,41 @@ with st.sidebar:
     
     st.markdown("---")
     
-    # Estado watchdog
-    watchdog = st.session_state.watchdog
-    wd_status = watchdog.get_status()
-    
-    if wd_status['failsafe_active']:
-        st.error("⛔ FAILSAFE ACTIVO")
-        st.caption(wd_status['failsafe_reason'])
-    else:
-        st.success("✅ Sistema OK")
-    
-    st.caption(f"Última lectura: {wd_status['seconds_since_read']:.0f}s")
+    # Estado watchdog (se refresca solo, sin rerun de la pagina)
+    @st.fragment(run_every=cfg.AUTO_REFRESH_INTERVAL)
+    @timed("fragment_watchdog")
+    def estado_watchdog():
+        wd_status = get_watchdog().get_status()
+
+        if wd_status['failsafe_active']:
+            st.error("⛔ FAILSAFE ACTIVO")
+            st.caption(wd_status['failsafe_reason'])
+        else:
+            st.success("✅ Sistema OK")
+
+        st.caption(f"Última lectura: {wd_status['seconds_since_read']:.0f}s")
+
+    estado_watchdog()
+
+    # Diagnostico: percentiles de tiempos de adquisicion y dashboard
+    @st.fragment(run_every=cfg.AUTO_REFRESH_INTERVAL)
+    def diagnostico_tiempos():
+        get_registry().publish_if_due()
+        with st.expander("⏱️ Diagnóstico de tiempos"):
+            rows = [
+                {"proceso": proceso, "operación": op, "p50 ms": s.get("p50", 0) * 1000,
+                 "p99 ms": s.get("p99", 0) * 1000, "n": s["count"]}
+                for proceso, payload in read_all().items()
+                for op, s in payload["timings"].items()
+            ]
+            if rows:
+                import pandas as pd
+                st.dataframe(pd.DataFrame(rows).style.format({"p50 ms": "{:.1f}", "p99 ms": "{:.1f}"}),
+                             use_container_width=True, hide_index=True)
+            else:
+                st.caption("Sin mediciones publicadas")
+
+    diagnostico_tiempos()
 
 # HEADER
 st.title("⚙️ CEREBRO SGI v2")
@@ -157,62 +185,101 @@ with st.expander("📊 Estado de Instrumentación"):
 st.markdown("---")
 
 # KPIs PRINCIPALES (con marcadores MEDIDO/ESTIMADO)
-col1, col2, col3, col4 = st.columns(4)
-
-# Ejemplo de datos (en producción: desde DataStore)
-velocidad = 165.0
-temp_zinc = 452.0
-n2_flujo = 96.0
-ahorro = 1250.0
-
-with col1:
-    st.metric("Velocidad Línea", f"{velocidad:.1f} m/min")
-    if cfg.INSTRUMENTACION["velocidad_real"]:
-        st.markdown('<span class="measured-badge">MEDIDO</span>', unsafe_allow_html=True)
-    else:
-        st.markdown('<span class="estimated-badge">ESTIMADO</span>', unsafe_allow_html=True)
-
-with col2:
-    st.metric("Temp. Zinc", f"{temp_zinc:.1f} °C")
-    if cfg.INSTRUMENTACION["temp_zinc"]:
-        st.markdown('<span class="measured-badge">MEDIDO</span>', unsafe_allow_html=True)
-    else:
-        st.markdown('<span class="estimated-badge">ESTIMADO</span>', unsafe_allow_html=True)
-
-with col3:
-    st.metric("Flujo N₂", f"{n2_flujo:.1f} Nm³/h")
-    if cfg.INSTRUMENTACION["caudalimetro_n2"]:
-        st.markdown('<span class="measured-badge">MEDIDO</span>', unsafe_allow_html=True)
-    else:
-        st.markdown('<span class="estimated-badge">ESTIMADO</span>', unsafe_allow_html=True)
-
-with col4:
-    st.metric("Ahorro Sesión", f"${ahorro:.2f}")
-    if cfg.INSTRUMENTACION["caudalimetro_n2"]:
-        st.markdown('<span class="measured-badge">MEDIDO</span>', unsafe_allow_html=True)
+# Las partes en vivo son fragmentos con run_every: se refrescan solas cada
+# AUTO_REFRESH_INTERVAL sin volver a emitir CSS, banners, roadmap, etc.
+@st.fragment(run_every=cfg.AUTO_REFRESH_INTERVAL)
+@timed("fragment_kpis")
+def kpis_en_vivo():
+    col1, col2, col3, col4 = st.columns(4)
+
+    # Datos desde DataStore (publicados por modules/industrial/acquisition.py)
+    from modules.industrial.data_pipeline import get_pipeline
+    pipeline = get_pipeline()
+    snapshot = pipeline.latest()
+    age = pipeline.published_age()
+    if age is None or age > cfg.SNAPSHOT_STALE_S:
+        # Archivo ausente o viejo: el servicio no esta corriendo
+        st.warning("Servicio de adquisición detenido (python -m modules.industrial.acquisition)")
+        snapshot = None
+    elif snapshot is None:
+        # El servicio publico None: corre pero el PLC no contesta
+        last_error = (pipeline.status() or {}).get("last_error")
+        st.warning("Sin lectura del PLC" + (f": {last_error}" if last_error else ""))
+    if snapshot:
+        velocidad = snapshot["velocidad_real"]
+        temp_zinc = snapshot["temp_zinc"]
+        n2_flujo = snapshot["flujo_n2"]
     else:
-        st.markdown('<span class="estimated-badge">ESTIMADO</span>', unsafe_allow_html=True)
+        velocidad = temp_zinc = n2_flujo = 0.0
+    ahorro = 1250.0
+
+    with col1:
+        st.metric("Velocidad Línea", f"{velocidad:.1f} m/min")
+        if cfg.INSTRUMENTACION["velocidad_real"]:
+            st.markdown('<span class="measured-badge">MEDIDO</span>', unsafe_allow_html=True)
+        else:
+            st.markdown('<span class="estimated-badge">ESTIMADO</span>', unsafe_allow_html=True)
+
+    with col2:
+        st.metric("Temp. Zinc", f"{temp_zinc:.1f} °C")
+        if cfg.INSTRUMENTACION["temp_zinc"]:
+            st.markdown('<span class="measured-badge">MEDIDO</span>', unsafe_allow_html=True)
+        else:
+            st.markdown('<span class="estimated-badge">ESTIMADO</span>', unsafe_allow_html=True)
+
+    with col3:
+        st.metric("Flujo N₂", f"{n2_flujo:.1f} Nm³/h")
+        if cfg.INSTRUMENTACION["caudalimetro_n2"]:
+            st.markdown('<span class="measured-badge">MEDIDO</span>', unsafe_allow_html=True)
+        else:
+            st.markdown('<span class="estimated-badge">ESTIMADO</span>', unsafe_allow_html=True)
+
+    with col4:
+        st.metric("Ahorro Sesión", f"${ahorro:.2f}")
+        if cfg.INSTRUMENTACION["caudalimetro_n2"]:
+            st.markdown('<span class="measured-badge">MEDIDO</span>', unsafe_allow_html=True)
+        else:
+            st.markdown('<span class="estimated-badge">ESTIMADO</span>', unsafe_allow_html=True)
+
+kpis_en_vivo()
 
 st.markdown("---")
 
 # ESTADO DEL CONTROL
 st.subheader("🎛 Estado del Control N₂")
 
-col1, col2, col3 = st.columns(3)
+@st.fragment(run_every=cfg.AUTO_REFRESH_INTERVAL)
+@timed("fragment_control")
+def estado_control():
+    col1, col2, col3 = st.columns(3)
+
+    # Apertura y modo publicados por el lazo de valvulas (valve_control.py) en el bloque compartido
+    wd_status = get_watchdog().get_status()
+    apertura = wd_status.get("apertura_n2")
+    if apertura is None or wd_status["control_age_s"] > cfg.HEARTBEAT_TIMEOUT_S:
+        modo, detalle, apertura = "MANUAL", "Lazo de válvulas sin publicar: operador controlando manualmente", None
+    elif wd_status["failsafe_active"]:
+        modo, detalle = "FAILSAFE", wd_status["failsafe_reason"]
+    elif wd_status["dry_run"]:
+        modo, detalle = "ASESOR", "Lazo en dry run: calcula la apertura sin escribir al PLC"
+    else:
+        modo, detalle = "AUTO", "Lazo cerrado escribiendo la apertura al PLC"
 
-with col1:
-    st.markdown("**Modo Actual:** MANUAL")
-    st.caption("Operador controlando manualmente")
+    with col1:
+        st.markdown(f"**Modo Actual:** {modo}")
+        st.caption(detalle)
 
-with col2:
-    st.metric("Apertura Válvula", "65%")
+    with col2:
+        st.metric("Apertura Válvula", "—" if apertura is None else f"{apertura:.0f}%")
 
-with col3:
-    can_enable, reason = rm.can_enable_auto()
-    if can_enable:
-        st.success("✅ AUTO disponible")
-    else:
-        st.warning(f"⚠️ AUTO bloqueado: {reason}")
+    with col3:
+        can_enable, reason = rm.can_enable_auto()
+        if can_enable:
+            st.success("✅ AUTO disponible")
+        else:
+            st.warning(f"⚠️ AUTO bloqueado: {reason}")
+
+estado_control()
 
 # Roadmap de fases
 with st.expander("🗺 Roadmap: Fases del Proyecto"):
@@ -279,16 +346,20 @@ st.markdown("---")
 # EVENTOS RECIENTES
 st.subheader("📋 Eventos Recientes")
 
-logger = st.session_state.event_logger
-recent = logger.get_recent_events(limit=10)
+@st.fragment(run_every=cfg.AUTO_REFRESH_INTERVAL)
+@timed("fragment_eventos")
+def eventos_recientes():
+    recent = get_event_logger().get_recent_events(limit=10)
 
-if recent:
-    import pandas as pd
-    df = pd.DataFrame(recent)
-    df = df[['timestamp', 'severity', 'event_type', 'description', 'user']]
-    st.dataframe(df, use_container_width=True, hide_index=True)
-else:
-    st.info("Sin eventos registrados")
+    if recent:
+        import pandas as pd
+        df = pd.DataFrame(recent)
+        df = df[['timestamp', 'severity', 'event_type', 'description', 'user']]
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    else:
+        st.info("Sin eventos registrados")
+
+eventos_recientes()
 
 st.markdown("---")
 st.caption(f"""
@@ -296,4 +367,4 @@ st.caption(f"""
 Fase {cfg.FASE_PROYECTO} · Usuario: {session_info['name']} ({session_info['role']})
 """)
 
-
+observe("page_render", time.perf_counter() - _render_start)
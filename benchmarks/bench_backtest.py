@@ -0,0 +1,104 @@
+"""
+Benchmark: backtest del algoritmo de control sobre un mes de historico simulado.
+
+1. Exactitud: la rampa por tramos da los mismos registros que
+   ValveController.decide ciclo a ciclo.
+2. Un mes por version en un proceso y repartido entre procesos por dia
+   (veces tiempo real).
+3. Dias independientes con calentamiento == replay continuo del mes.
+
+Uso: python -m benchmarks.bench_backtest [--days 31] [--workers 4]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import config as cfg
+from modules.industrial.backtest import ALGORITHMS, REPLAY_SIGNALS, backtest, replay, summarize, totals
+from modules.industrial.historian import SIGNALS
+from modules.industrial.segments import SegmentWriter
+from modules.industrial.simulator import PlantSimulator
+from modules.industrial.valve_control import ValveController
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+DAY = 86400
+
+
+def check_against_controller(ts, values, n):
+    # Caidas de pureza bajo PUREZA_CRITICA: el failsafe cierra de inmediato, la parada con rampa
+    pureza = values["pureza_n2"][:n].copy()
+    for lo in range(1000, n, 5000):
+        pureza[lo:lo + 30] = cfg.PUREZA_CRITICA - 1.0
+    values = {**values, "pureza_n2": pureza}
+    result = replay(ts[:n], {s: values[s][:n] for s in REPLAY_SIGNALS}, ts[0], ts[0] + n * cfg.CONTROL_CYCLE_S)
+    controller = ValveController(client=SimpleNamespace(connected=False))
+    mismatches = 0
+    t = time.perf_counter()
+    for i in range(n):
+        snapshot = SimpleNamespace(**{s: float(values[s][i]) for s in REPLAY_SIGNALS})
+        snapshot.linea_en_marcha = snapshot.linea_en_marcha >= 0.5
+        controller.decide(snapshot, float(ts[i]))
+        mismatches += (abs(controller.apertura - result["n2"][i]) > 1e-9
+                       or abs(controller.apertura_h2 - result["h2"][i]) > 1e-9)
+    t_scalar = time.perf_counter() - t
+    assert mismatches == 0, f"{mismatches} ciclos distintos de ValveController.decide"
+    runs = int(np.count_nonzero(np.diff(result["objetivo"])) + 1)
+    print(f"replay == ValveController.decide en {n:,} ciclos ({runs:,} tramos de objetivo constante); "
+          f"decide() escalar: {t_scalar / n * 1e6:.1f} us/ciclo")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    n = args.days * DAY // 5
+    ts, values = PlantSimulator(seed=args.seed, t0=T0).generate(n)
+    check_against_controller(ts, values, 50_000)
+
+    root = tempfile.mkdtemp(prefix="sgi_backtest_")
+    try:
+        writer = SegmentWriter(root)
+        writer.write_rows((ts * 1000).astype(np.int64), {s: values[s] for s in SIGNALS})
+        writer.close()
+        t1 = T0 + args.days * DAY
+        versions = sorted(ALGORITHMS)
+
+        timings = {}
+        for workers in sorted({1, args.workers}):
+            t = time.perf_counter()
+            result = backtest(versions, T0, t1, root, workers=workers)
+            timings[workers] = time.perf_counter() - t
+        span = args.days * DAY * len(versions)
+        for workers, elapsed in timings.items():
+            print(f"{len(versions)} versiones x {args.days} dias, {workers} proceso(s): {elapsed:6.2f} s "
+                  f"({span / elapsed:,.0f}x tiempo real)")
+
+        print(f"{'version':<8} {'N2 m3':>9} {'H2 m3':>8} {'N2 real':>9} {'H2 real':>8} "
+              f"{'costo USD':>10} {'LIN USD':>10} {'real USD':>10} {'impacto USD':>12}")
+        for version, days in result.items():
+            s = totals(days)
+            print(f"{version:<8} {s['n2_m3']:>9.0f} {s['h2_m3']:>8.0f} {s['n2_real_m3']:>9.0f} {s['h2_real_m3']:>8.0f} "
+                  f"{s['costo_usd']:>10.2f} {s['costo_lin_usd']:>10.2f} {s['costo_real_usd']:>10.2f} "
+                  f"{s['impacto_usd']:>12.2f}")
+
+        # Replay continuo del mes vs dias independientes con calentamiento
+        for version in versions:
+            continuous = summarize(replay(ts, {s: values[s] for s in REPLAY_SIGNALS}, T0, t1, version))
+            by_day = totals(result[version])
+            diff = abs(continuous["n2_m3"] - by_day["n2_m3"]) + abs(continuous["h2_m3"] - by_day["h2_m3"])
+            assert diff < 1e-6 * max(1.0, continuous["n2_m3"]), (version, continuous, by_day)
+        print("dias independientes (calentamiento 1 h) == replay continuo: OK")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
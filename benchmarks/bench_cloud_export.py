@@ -0,0 +1,159 @@
+"""
+Benchmark: vaciado de la cola cloud contra un servidor HTTP sustituto local.
+
+El sustituto habla HTTP/1.1 keep-alive, descomprime gzip y cuenta las
+muestras recibidas; simula latencia, respuestas 5xx, rechazos 400 y cortes
+de conexion. Se encola un backlog (como tras una caida del enlace), se vacia
+con reintentos y se verifica que llegaron todas las muestras sin duplicados
+(menos las de lotes rechazados, que cuentan como descartadas, no enviadas).
+
+Uso: python -m benchmarks.bench_cloud_export [--samples 20000] [--latency 0.05]
+         [--error-rate 0.1] [--disconnect-rate 0.05] [--reject-rate 0.0] [--platform ubidots]
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modules.industrial.cloud_exporter import CloudExporter
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+
+
+class StandInCloud(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency_s, error_rate, disconnect_rate, reject_rate=0.0, seed=0):
+        super().__init__(("127.0.0.1", 0), CloudHandler)
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.disconnect_rate = disconnect_rate
+        self.reject_rate = reject_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.timestamps = []
+        self.requests = 0
+        self.errors = 0
+        self.disconnects = 0
+        self.connections = 0
+
+    def roll(self):
+        with self.lock:
+            self.requests += 1
+            r = self.rng.random()
+        if r < self.disconnect_rate:
+            return "corte"
+        if r < self.disconnect_rate + self.error_rate:
+            return "5xx"
+        if r < self.disconnect_rate + self.error_rate + self.reject_rate:
+            return "4xx"
+        return "ok"
+
+
+class CloudHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.server.latency_s)
+        outcome = self.server.roll()
+        if outcome == "corte":
+            with self.server.lock:
+                self.server.disconnects += 1
+            self.close_connection = True
+            self.connection.close()
+            return
+        if outcome in ("5xx", "4xx"):
+            with self.server.lock:
+                self.server.errors += 1
+            self.send_response(503 if outcome == "5xx" else 400)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+        if isinstance(payload, list):  # thingsboard
+            stamps = [row["ts"] for row in payload]
+        else:  # ubidots: todas las variables comparten timestamps
+            stamps = sorted({v["timestamp"] for values in payload.values() for v in values})
+        with self.server.lock:
+            self.server.timestamps.extend(stamps)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def snapshot(i):
+    return {"timestamp": T0 + i * 5, "temp_zinc": 455.0 + i % 7, "flujo_n2": 120.0,
+            "h2_fg": 3.5, "linea_en_marcha": True}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--disconnect-rate", type=float, default=0.05)
+    parser.add_argument("--reject-rate", type=float, default=0.0)
+    parser.add_argument("--platform", default="ubidots", choices=("ubidots", "thingsboard"))
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    server = StandInCloud(args.latency, args.error_rate, args.disconnect_rate, args.reject_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    print(f"Sustituto: latencia {args.latency * 1000:.0f} ms, 5xx {args.error_rate:.0%}, "
+          f"cortes {args.disconnect_rate:.0%}, rechazos {args.reject_rate:.0%}, plataforma {args.platform}")
+    print(f"{'concurrencia':>12} {'gzip':>5} {'muestras/s':>11} {'peticiones':>11} {'reintentos':>11} {'conexiones':>11} {'descartadas':>12}")
+
+    for concurrency, compress in ((1, False), (1, True), (4, True)):
+        with server.lock:
+            server.timestamps.clear()
+            server.requests = server.errors = server.disconnects = server.connections = 0
+        exporter = CloudExporter(platform=args.platform, base_url=f"http://{host}:{port}",
+                                 queue_path=os.path.join(tmp, f"cola_{concurrency}_{compress}.db"),
+                                 max_concurrency=concurrency, compress=compress, timeout=5.0)
+        t = time.perf_counter()
+        for i in range(args.samples):
+            exporter.enqueue(snapshot(i))
+        t_enqueue = time.perf_counter() - t
+
+        t = time.perf_counter()
+        while exporter.backlog():
+            exporter.drain()
+        elapsed = time.perf_counter() - t
+        exporter.close()
+
+        received = server.timestamps
+        expected = [(T0 + i * 5) * 1000 for i in range(args.samples)]
+        assert exporter.sent_samples == len(received), (exporter.sent_samples, len(received))
+        assert len(received) + exporter.dropped_samples == args.samples, (len(received), exporter.dropped_samples)
+        if args.reject_rate:
+            assert len(set(received)) == len(received) and set(received) <= set(expected)
+        else:
+            assert sorted(received) == expected
+        print(f"{concurrency:>12} {'si' if compress else 'no':>5} {args.samples / elapsed:>11,.0f} "
+              f"{server.requests:>11} {server.errors + server.disconnects:>11} {server.connections:>11} "
+              f"{exporter.dropped_samples:>12}")
+
+    print(f"Encolado: {args.samples / t_enqueue:,.0f} snapshots/s (sin red, no bloquea la adquisicion)")
+    print("OK: todas las muestras recibidas una sola vez" + (" (o descartadas por rechazo)" if args.reject_rate else ""))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
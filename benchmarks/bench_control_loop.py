@@ -0,0 +1,132 @@
+"""
+Benchmark: temporizacion del lazo de control de valvulas bajo carga.
+
+Corre ValveController contra el PLC sustituto (escribiendo en el
+sustituto) mientras se generan interferencias tipicas:
+    reposo          - sin carga
+    sqlite_lento    - transacciones grandes con synchronous=FULL (historian)
+    rerun_proceso   - CPU de un rerun del dashboard en otro proceso
+    rerun_hilo      - el mismo trabajo en un hilo del mismo proceso (peor caso, GIL)
+
+Reporta jitter y latencia por ciclo, overruns, y verifica que cada paso de
+rampa respeta MAX_CAMBIO_PCT_POR_CICLO y que el heartbeat se escribe en
+todos los ciclos.
+
+Uso: python -m benchmarks.bench_control_loop [--period 0.05] [--seconds 5]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import config as cfg
+from modules.industrial.modbus_tcp import ModbusStandInServer, ModbusTcpClient
+from modules.industrial.poller import COIL_BASE, HOLDING_BASE
+from modules.industrial.valve_control import ValveController
+
+
+def slow_sqlite(stop):
+    path = os.path.join(tempfile.mkdtemp(), "lento.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute("CREATE TABLE t (ts INTEGER, a REAL, b REAL, c REAL)")
+    rows = [(i, i * 0.5, i * 0.25, i * 0.125) for i in range(50000)]
+    while not stop.is_set():
+        with conn:
+            conn.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", rows)
+            conn.execute("DELETE FROM t WHERE ts < 25000")
+    conn.close()
+
+
+def dashboard_rerun(stop):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.standard_normal((200_000, 8)), columns=list("abcdefgh"))
+    while not stop.is_set():
+        df.rolling(50).mean().describe()
+        df.groupby((df["a"] * 10).round()).agg(["min", "max", "mean"])
+
+
+def run_phase(controller, name, seconds, start_load):
+    for h in controller.latency.values():
+        h.reset()
+    overruns0, cycles0 = controller.overruns, controller.cycles
+    stop = start_load()
+    time.sleep(seconds)
+    stop()
+    jitter = controller.latency["jitter"].summary()
+    cycle = controller.latency["cycle"].summary()
+    print(f"{name:<14} {controller.cycles - cycles0:>7} {jitter['p50_ms']:>8.2f} {jitter['p99_ms']:>8.2f} "
+          f"{jitter['max_ms']:>8.2f} {cycle['p99_ms']:>9.2f} {cycle['max_ms']:>9.2f} {controller.overruns - overruns0:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--period", type=float, default=0.05)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = ModbusStandInServer().start()
+    running = [True]
+
+    def plant():
+        """Arranca y detiene la linea cada segundo para forzar rampas."""
+        server.coils[cfg.ADDR_ESTADO_LINEA - COIL_BASE] = True
+        server.holding[cfg.ADDR_PUREZA_N2 - HOLDING_BASE] = 9900
+        server.holding[cfg.ADDR_FG_PERCENT_H2 - HOLDING_BASE] = 500
+        while running[0]:
+            for speed in (1500, 600, 0):
+                server.holding[cfg.ADDR_VELOCIDAD_REAL - HOLDING_BASE] = speed
+                time.sleep(1.0)
+
+    threading.Thread(target=plant, daemon=True).start()
+    controller = ValveController(ModbusTcpClient(*server.address), period_s=args.period, dry_run=False).start()
+
+    def none():
+        return lambda: None
+
+    def in_thread(target):
+        def start():
+            stop = threading.Event()
+            t = threading.Thread(target=target, args=(stop,), daemon=True)
+            t.start()
+            return lambda: (stop.set(), t.join())
+        return start
+
+    def in_process(target):
+        def start():
+            stop = multiprocessing.Event()
+            p = multiprocessing.Process(target=target, args=(stop,), daemon=True)
+            p.start()
+            return lambda: (stop.set(), p.join())
+        return start
+
+    print(f"Ciclo {args.period * 1000:.0f} ms, {args.seconds:.0f} s por fase (tiempos en ms)")
+    print(f"{'fase':<14} {'ciclos':>7} {'jit p50':>8} {'jit p99':>8} {'jit max':>8} {'ciclo p99':>9} {'ciclo max':>9} {'overruns':>9}")
+    run_phase(controller, "reposo", args.seconds, none)
+    run_phase(controller, "sqlite_lento", args.seconds, in_thread(slow_sqlite))
+    run_phase(controller, "rerun_proceso", args.seconds, in_process(dashboard_rerun))
+    run_phase(controller, "rerun_hilo", args.seconds, in_thread(dashboard_rerun))
+    controller.stop()
+    running[0] = False
+
+    psa = [v for a, v in server.writes if a == cfg.ADDR_VALVULA_N2_PSA - HOLDING_BASE]
+    hb = [v for a, v in server.writes if a == cfg.ADDR_HEARTBEAT - HOLDING_BASE]
+    steps = np.diff(psa)
+    max_up = max(cfg.MAX_CAMBIO_PCT_POR_CICLO, cfg.APERTURA_ARRANQUE) / cfg.ESCALA_VALVULA
+    assert len(hb) == controller.cycles and np.all(np.diff(hb) >= 0)
+    assert np.all(steps <= max_up), steps.max()
+    # Pureza fija en 99%: sin failsafe, las paradas de linea cierran con rampa
+    assert np.all(steps >= -cfg.MAX_CAMBIO_PCT_POR_CICLO / cfg.ESCALA_VALVULA), steps.min()
+    print(f"{controller.cycles} escrituras verificadas: rampa <= {cfg.MAX_CAMBIO_PCT_POR_CICLO:.0f}%/ciclo "
+          f"(tambien al detener la linea), heartbeat en cada ciclo ({hb[-1]} incrementos)")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
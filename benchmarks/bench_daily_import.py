@@ -0,0 +1,97 @@
+"""
+Benchmark: importar N dias de consumo con las funciones por fila vs bulk.
+
+Uso: python -m benchmarks.bench_daily_import [--rows 10000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import daily_update
+from daily_update import DailyTracker
+
+
+def make_rows(n):
+    start = date(1990, 1, 1)
+    return [
+        {
+            'fecha': (start + timedelta(days=i)).strftime('%Y-%m-%d'),
+            'produccion_tm': 19.5,
+            'metros_producidos': 28500,
+            'n2_consumido_m3': 1000 + i % 200,
+            'velocidad_promedio': 165,
+            'horas_operacion': 20,
+            'tipo_producto': 'Alambre 2.5mm',
+            'observaciones': None,
+        }
+        for i in range(n)
+    ]
+
+
+def write_xlsx(path, rows):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(rows[0]))
+    for row in rows:
+        ws.append(list(row.values()))
+    wb.save(path)
+
+
+def fresh_db(tmpdir, name):
+    path = os.path.join(tmpdir, name)
+    daily_update.DB_PATH = path
+    DailyTracker(path).close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000)
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fresh_db(tmpdir, 'per_row.db')
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for row in rows:
+                daily_update.add_daily_consumption(**row)
+        t_per_row = time.perf_counter() - t0
+
+        path = fresh_db(tmpdir, 'tracker_per_row.db')
+        t0 = time.perf_counter()
+        with DailyTracker(path) as tracker:
+            for row in rows:
+                tracker.add_daily_consumption(**row)
+        t_tracker = time.perf_counter() - t0
+
+        path = fresh_db(tmpdir, 'bulk.db')
+        t0 = time.perf_counter()
+        with DailyTracker(path) as tracker:
+            tracker.bulk_add_consumption(rows)
+        t_bulk = time.perf_counter() - t0
+
+        xlsx = os.path.join(tmpdir, 'planilla.xlsx')
+        write_xlsx(xlsx, rows)
+        path = fresh_db(tmpdir, 'bulk_xlsx.db')
+        t0 = time.perf_counter()
+        with DailyTracker(path) as tracker:
+            n = tracker.bulk_add_consumption(xlsx)
+        t_xlsx = time.perf_counter() - t0
+        assert n == len(rows)
+
+    print(f"{args.rows:,} filas")
+    print(f"  add_daily_consumption() por fila : {t_per_row:8.2f} s")
+    print(f"  DailyTracker por fila            : {t_tracker:8.2f} s")
+    print(f"  DailyTracker.bulk (lista)        : {t_bulk:8.3f} s  ({t_per_row / t_bulk:,.0f}x)")
+    print(f"  DailyTracker.bulk (.xlsx)        : {t_xlsx:8.3f} s  (incluye lectura openpyxl)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark y verificacion: agregados de zinc y produccion (daily_rollups).
+
+Carga varios anios de consumo_diario y zinc_diario (con dias faltantes y
+varios tipos de producto), aplica cargas diarias, reemplazos, cambios de
+producto y cargas tardias, y comprueba que las tablas materializadas son
+iguales a recalcular todo con pandas. Compara el costo de lo que haria cada
+rerun de una pagina ejecutiva: lecturas de los agregados vs leer todas las
+filas diarias y agregarlas.
+
+Uso: python -m benchmarks.bench_daily_rollups [--years 5] [--seed 11]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from daily_update import DailyTracker
+from modules.industrial import daily_rollups
+
+PRODUCTOS = ("Alambre 2.5mm", "Alambre 3.0mm", "Alambre 4.0mm", None)
+
+
+def consumo_row(rng, day, tipo=None):
+    return (day.isoformat(), rng.uniform(10, 30), rng.uniform(1e4, 4e4), rng.uniform(500, 1500),
+            rng.uniform(60, 200), rng.uniform(0, 24), tipo or rng.choice(PRODUCTOS), None)
+
+
+def zinc_row(rng, day):
+    dross = rng.uniform(50, 120) if rng.random() > 0.1 else None
+    temp = rng.uniform(445, 460) if rng.random() > 0.05 else None
+    return (day.isoformat(), rng.uniform(150, 350), dross, None, temp, None)
+
+
+def reference(conn, hoy):
+    """Todo desde las filas diarias con pandas (lo que haria una pagina sin agregados)."""
+    c = pd.read_sql("SELECT * FROM consumo_diario", conn, parse_dates=["fecha"])
+    z = pd.read_sql("SELECT * FROM zinc_diario", conn, parse_dates=["fecha"])
+    claves = {
+        "semana": lambda f: (f - pd.to_timedelta(f.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d"),
+        "mes": lambda f: f.dt.strftime("%Y-%m"),
+        "anio": lambda f: f.dt.strftime("%Y"),
+    }
+    periodos = {}
+    for nivel, clave in claves.items():
+        pc = c.groupby(clave(c["fecha"])).agg(produccion_tm=("produccion_tm", "sum"), dias_produccion=("fecha", "size"))
+        pz = z.groupby(clave(z["fecha"])).agg(zinc_consumido_kg=("zinc_consumido_kg", "sum"),
+                                               dross_generado_kg=("dross_generado_kg", "sum"),
+                                               temp=("temp_zinc_promedio", "mean"), dias_zinc=("fecha", "size"))
+        periodos[nivel] = pc.join(pz, how="outer").fillna({"produccion_tm": 0, "dias_produccion": 0,
+                                                           "zinc_consumido_kg": 0, "dross_generado_kg": 0,
+                                                           "dias_zinc": 0})
+    m = c.merge(z, on="fecha")
+    m["tipo"] = m["tipo_producto"].fillna(daily_rollups.SIN_TIPO)
+    producto = m[m["fecha"].dt.year == hoy.year].groupby("tipo").agg(
+        tm=("produccion_tm", "sum"), zinc=("zinc_consumido_kg", "sum"))
+
+    dias = pd.date_range(min(c["fecha"].min(), z["fecha"].min()), max(c["fecha"].max(), z["fecha"].max()))
+    zi = z.set_index("fecha").reindex(dias)
+    tm = c.set_index("fecha")["produccion_tm"].reindex(dias)
+    ambos = zi["zinc_consumido_kg"].notna() & (tm > 0)
+    tendencia = pd.DataFrame(index=dias)
+    for w in daily_rollups.VENTANAS:
+        r = lambda s: s.rolling(w, min_periods=1).sum()
+        tendencia[f"kg_tm_{w}d"] = r(zi["zinc_consumido_kg"].where(ambos, 0)) / r(tm.where(ambos, 0))
+        hay_dross = zi["dross_generado_kg"].notna()
+        tendencia[f"dross_pct_{w}d"] = (r(zi["dross_generado_kg"].where(hay_dross, 0))
+                                        / r(zi["zinc_consumido_kg"].where(hay_dross, 0)) * 100)
+        tendencia[f"zinc_kg_{w}d"] = zi["zinc_consumido_kg"].rolling(w, min_periods=1).mean()
+        tendencia[f"temp_zinc_{w}d"] = zi["temp_zinc_promedio"].rolling(w, min_periods=1).mean()
+    tendencia = tendencia[zi["zinc_consumido_kg"].notna()]
+    return periodos, producto, tendencia
+
+
+def check(conn, hoy):
+    periodos, producto, tendencia = reference(conn, hoy)
+    for nivel, ref in periodos.items():
+        got = {r["periodo"]: r for r in daily_rollups.periodos(conn, nivel)}
+        assert set(got) == set(ref.index), (nivel, set(got) ^ set(ref.index))
+        for periodo, row in ref.iterrows():
+            g = got[periodo]
+            for k in ("produccion_tm", "zinc_consumido_kg", "dross_generado_kg", "dias_produccion", "dias_zinc"):
+                assert np.isclose(g[k], row[k], rtol=1e-9), (nivel, periodo, k, g[k], row[k])
+            assert (g["temp_zinc_promedio"] is None) == pd.isna(row["temp"])
+            if g["temp_zinc_promedio"] is not None:
+                assert np.isclose(g["temp_zinc_promedio"], row["temp"])
+    got = {r["tipo_producto"]: r for r in daily_rollups.por_producto(conn, hoy.year)}
+    assert set(got) == set(producto.index)
+    for tipo, row in producto.iterrows():
+        assert np.isclose(got[tipo]["kg_tm"], row["zinc"] / row["tm"]), tipo
+    got = pd.DataFrame(daily_rollups.tendencia(conn)).set_index("fecha")
+    assert list(got.index) == [d.strftime("%Y-%m-%d") for d in tendencia.index]
+    for col in tendencia.columns:
+        assert np.allclose(got[col].astype(float).to_numpy(), tendencia[col].to_numpy(), equal_nan=True), col
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    start = date(2021, 1, 1)
+    dias = [start + timedelta(days=i) for i in range(args.years * 365)]
+    hoy = dias[-1]
+
+    tmp = tempfile.mkdtemp(prefix="sgi_rollups_")
+    try:
+        tracker = DailyTracker(os.path.join(tmp, "diario.db"))
+        conn = tracker.conn
+        consumo = [consumo_row(rng, d) for d in dias if rng.random() > 0.05]
+        zinc = [zinc_row(rng, d) for d in dias if rng.random() > 0.08]
+        t = time.perf_counter()
+        tracker.bulk_add_consumption(consumo)
+        tracker.bulk_add_zinc(zinc)
+        print(f"carga masiva: {len(consumo):,} dias de consumo + {len(zinc):,} de zinc con agregados en "
+              f"{(time.perf_counter() - t) * 1000:.0f} ms")
+        check(conn, hoy)
+        print("agregados == recalculo completo con pandas: OK")
+
+        # Cargas diarias, reemplazos, cambios de producto y cargas tardias
+        costs = []
+        for i in range(300):
+            day = rng.choice(dias[-60:]) if i % 10 else rng.choice(dias)
+            t = time.perf_counter()
+            if rng.random() < 0.5:
+                tracker.add_daily_zinc(*zinc_row(rng, day)[:5])
+            else:
+                tracker.add_daily_consumption(*consumo_row(rng, day)[:7])
+            costs.append(time.perf_counter() - t)
+        check(conn, hoy)
+        late = [c for i, c in enumerate(costs) if not i % 10]
+        recent = [c for i, c in enumerate(costs) if i % 10]
+        print(f"300 cargas diarias (reemplazos, cambios de producto, tardias) == recalculo: OK")
+        print(f"  add_daily_* con agregados: p50 {np.median(recent) * 1000:.2f} ms (ultimos 60 dias), "
+              f"p50 {np.median(late) * 1000:.2f} ms (cualquier fecha)")
+        with conn:
+            conn.execute("DELETE FROM zinc_tendencia")
+            conn.execute("UPDATE produccion_periodo SET produccion_tm = -1")
+        tracker.rebuild_summaries()
+        check(conn, hoy)
+        print("rebuild_summaries reconstruye los agregados: OK")
+
+        # Lo que hace cada rerun de la pagina ejecutiva
+        def paginas():
+            daily_rollups.resumen(conn, hoy)
+            daily_rollups.periodos(conn, "mes", f"{hoy.year - 1}-01")
+            daily_rollups.periodos(conn, "semana", (hoy - timedelta(days=7 * 26)).isoformat())
+            daily_rollups.tendencia(conn, (hoy - timedelta(days=90)).isoformat())
+            daily_rollups.por_producto(conn, hoy.year)
+
+        for label, fn in (("agregados materializados", paginas), ("re-agregar filas diarias", lambda: reference(conn, hoy))):
+            fn()
+            n, t = 0, time.perf_counter()
+            while time.perf_counter() - t < 1.0:
+                fn()
+                n += 1
+            print(f"  rerun de la pagina, {label:<25}: {(time.perf_counter() - t) / n * 1000:7.2f} ms")
+        tracker.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark y verificacion: alertas de deriva (EWMA + CUSUM + tasa).
+
+Sobre datos del simulador de planta (vagabundeo AR(1) de PSA y forming gas,
+paradas de linea):
+
+1. Un lote == trozos == update() muestra a muestra, con huecos NaN.
+2. Costo por ciclo de lectura en vivo vs AlarmEngine.update.
+3. Recalculo por lotes semanales de un ano de muestras.
+4. Anticipacion: rampas lentas inyectadas (6 h) -> minutos entre la alerta
+   de deriva y la alarma fija de alarms.py (PUREZA_CRITICA,
+   FORMING_GAS_H2_MAX, ...).
+5. Sensibilidad: falsas alertas por dia sobre dias limpios para una grilla
+   de k y h, junto con la anticipacion media.
+6. score_history desde segmentos == episodios de evaluate.
+
+Uso: python -m benchmarks.bench_drift [--days 14] [--year-days 365]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import config as cfg
+from modules.industrial.alarms import AlarmEngine
+from modules.industrial.drift import DriftEngine, score_history
+from modules.industrial.historian import SIGNALS
+from modules.industrial.segments import SegmentWriter
+from modules.industrial.simulator import PlantSimulator
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+DAY = 86400 // 5
+RAMP = 6 * 720      # 6 h a 5 s
+
+# senal -> (cambio total de la rampa, alarma fija que anticipa)
+RAMPS = {
+    "pureza_n2": (-5.0, "pureza_n2_critica"),
+    "dew_point_n2": (25.0, None),
+    "presion_n2": (-5.5, "presion_n2_baja"),
+    "fg_percent_h2": (6.0, "fg_h2_alto"),
+    "fg_temp_mezclador": (25.0, "fg_temp_alta"),
+}
+
+
+def check_consistency(ts, columns):
+    m = 20_000
+    sub = {k: v[:m].astype(np.float64) for k, v in columns.items()}
+    rng = np.random.default_rng(0)
+    for v in sub.values():
+        v[rng.random(m) < 0.01] = np.nan
+        v[5000:5200] = np.nan                        # corte de sensor
+    whole = DriftEngine(warmup=100).evaluate(ts[:m], sub)
+
+    chunked_engine = DriftEngine(warmup=100)
+    parts = [chunked_engine.evaluate(ts[lo:min(lo + 777, m)], {k: v[lo:lo + 777] for k, v in sub.items()})
+             for lo in range(0, m, 777)]
+    chunked = {key: np.hstack([p[key] for p in parts]) for key in whole}
+
+    live_engine = DriftEngine(warmup=100)
+    live = np.empty_like(whole["active"])
+    cusum = np.empty_like(whole["cusum"])
+    rows = [{"timestamp": ts[i], **{k: float(v[i]) for k, v in sub.items()}} for i in range(m)]
+    for i, row in enumerate(rows):
+        live_engine.update(row)
+        live[:, i] = live_engine.active
+        cusum[:, i] = np.where(live_engine._direction[:, 0] > 0, live_engine.up,
+                               np.where(live_engine._direction[:, 0] < 0, live_engine.down,
+                                        np.maximum(live_engine.up, live_engine.down)))
+    assert np.array_equal(whole["active"], chunked["active"]) and np.array_equal(whole["active"], live)
+    for key in ("ewma", "sigma", "cusum", "rate"):
+        assert np.allclose(whole[key], chunked[key], rtol=1e-9, atol=1e-9), key
+    assert np.allclose(whole["cusum"], cusum, rtol=1e-9, atol=1e-9)
+    assert np.allclose(whole["ewma"][:, -1], live_engine.mean, rtol=1e-12)
+    print(f"lote == trozos de 777 == update() muestra a muestra ({m:,} muestras, 1% NaN y un corte): OK "
+          f"({int(whole['active'].any(axis=0).sum())} muestras con alerta)")
+    return rows
+
+
+def time_live(rows):
+    drift, alarms = DriftEngine(), AlarmEngine()
+    for label, engine in (("DriftEngine.update", drift), ("AlarmEngine.update", alarms)):
+        t = time.perf_counter()
+        for row in rows:
+            engine.update(row)
+        print(f"por ciclo de lectura, {label:<18}: {(time.perf_counter() - t) / len(rows) * 1e6:5.1f} us "
+              f"({len(engine.rules)} reglas)")
+
+
+def time_year(days):
+    sim, engine = PlantSimulator(seed=5, t0=T0), DriftEngine()
+    n, elapsed, alerts = 0, 0.0, np.zeros(len(engine.rules), dtype=np.int64)
+    for _ in range(0, days, 7):
+        ts, values = sim.generate(7 * DAY)
+        previous = engine.active
+        t = time.perf_counter()
+        active = engine.evaluate(ts, {k: values[k] for k in engine.signals})["active"]
+        elapsed += time.perf_counter() - t
+        alerts += (np.diff(active.astype(np.int8), axis=1, prepend=previous[:, None].astype(np.int8)) == 1).sum(axis=1)
+        n += len(ts)
+    print(f"recalculo de {n:,} muestras ({days} dias) en lotes semanales: {elapsed:.2f} s "
+          f"({n / elapsed / 1e6:.1f} M muestras/s); {alerts.sum() / (n / DAY):.1f} alertas/dia en total")
+
+
+def first(mask):
+    idx = np.flatnonzero(mask)
+    return idx[0] if len(idx) else None
+
+
+def ramp_scenarios(ts, columns, days):
+    """(senal, inicio, columnas con la rampa, muestra de la alarma fija o None)."""
+    alarms = AlarmEngine()
+    names = [rule.name for rule in alarms.rules]
+    starts = [DAY * d + off for d, off in ((days // 5, 1000), (days // 2, 5000), (4 * days // 5, 9000))]
+    out = []
+    for signal, (delta, alarm) in RAMPS.items():
+        for start in starts:
+            cols = dict(columns)
+            cols[signal] = columns[signal] + np.clip((np.arange(len(ts)) - start) / RAMP, 0.0, 1.0) * delta
+            fixed = None
+            if alarm is not None:
+                lo, hi = start - DAY // 4, start + 2 * RAMP
+                active = AlarmEngine().evaluate(ts[lo:hi], {k: v[lo:hi] for k, v in cols.items()})
+                row = active[names.index(alarm), start - lo:]
+                fixed = first(row)
+            out.append((signal, start, cols, fixed))
+    return out
+
+
+def lead_times(ts, scenarios, **params):
+    """Por senal: [(muestra de la alerta de deriva, muestra de la alarma fija)] desde el inicio de la rampa."""
+    leads = {signal: [] for signal in RAMPS}
+    for signal, start, cols, fixed in scenarios:
+        engine = DriftEngine(**params)
+        row = engine.evaluate(ts[:start + 2 * RAMP], {k: cols[k][:start + 2 * RAMP] for k in engine.signals})["active"]
+        row = row[engine.signals.index(signal)]
+        onset = first(np.diff(row[start:start + RAMP].astype(np.int8)) == 1)
+        leads[signal].append((None if onset is None else onset + 1, fixed))
+    return leads
+
+
+def false_alerts(ts, columns, days, **params):
+    engine = DriftEngine(**params)
+    active = engine.evaluate(ts, {k: columns[k] for k in engine.signals})["active"]
+    return (np.diff(active.astype(np.int8), axis=1) == 1).sum(axis=1) / days
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=14, help="dias limpios para falsas alertas y rampas")
+    parser.add_argument("--year-days", type=int, default=365)
+    args = parser.parse_args()
+
+    ts, columns = PlantSimulator(seed=1, t0=T0).generate(args.days * DAY)
+    signals = DriftEngine().signals
+
+    rows = check_consistency(ts, columns)
+    time_live(rows)
+    time_year(args.year_days)
+
+    # ANTICIPACION (parametros de config.py)
+    scenarios = ramp_scenarios(ts, columns, args.days)
+    print(f"\nrampas de 6 h inyectadas (3 por senal); minutos desde el inicio de la rampa:")
+    print(f"  {'senal':<18} {'cambio':>7}  {'alarma fija':<18} alerta deriva / alarma fija (anticipacion)")
+    for signal, pairs in lead_times(ts, scenarios).items():
+        delta, alarm = RAMPS[signal]
+        cells = []
+        for alert, fixed in pairs:
+            a = "-" if alert is None else f"{alert * 5 / 60:.0f}"
+            f = "-" if fixed is None else f"{fixed * 5 / 60:.0f}"
+            lead = "" if alert is None or fixed is None else f" ({(fixed - alert) * 5 / 60:+.0f})"
+            cells.append(f"{a}/{f}{lead}")
+        print(f"  {signal:<18} {delta:>+7.1f}  {alarm or '(sin alarma)':<18} " + "   ".join(cells))
+
+    # SENSIBILIDAD
+    print(f"\nfalsas alertas por dia ({args.days} dias limpios) y anticipacion media (min) sobre alarmas fijas:")
+    print(f"  {'k':>4} {'h':>5}  " + " ".join(f"{s[:12]:>12}" for s in signals) + "   anticipacion  sin alerta")
+    for k in (1.0, 1.5, 2.0, 3.0):
+        for h in (25.0, 50.0, 100.0):
+            fa = false_alerts(ts, columns, args.days, k=k, h=h)
+            pairs = [p for ps in lead_times(ts, scenarios, k=k, h=h).values() for p in ps]
+            leads = [(f - a) * 5 / 60 for a, f in pairs if a is not None and f is not None]
+            missed = sum(1 for a, _ in pairs if a is None)
+            mark = " <- config" if (k, h) == (cfg.DERIVA_CUSUM_K, cfg.DERIVA_CUSUM_H) else ""
+            print(f"  {k:>4g} {h:>5g}  " + " ".join(f"{x:>12.1f}" for x in fa)
+                  + f"   {np.mean(leads) if leads else float('nan'):>12.0f}  {missed:>4}/{len(pairs)}{mark}")
+
+    # HISTORICO DESDE SEGMENTOS
+    root = tempfile.mkdtemp(prefix="sgi_drift_")
+    try:
+        writer = SegmentWriter(root)
+        writer.write_rows((ts * 1000).astype(np.int64), {s: columns[s] for s in SIGNALS})
+        writer.close()
+        t = time.perf_counter()
+        found = score_history(T0, T0 + args.days * 86400, root=root, chunk_s=86400)
+        t_hist = time.perf_counter() - t
+        stored = {s: columns[s].astype(np.float32) for s in signals}    # los segmentos guardan float32
+        reference = DriftEngine().evaluate(ts, stored)["active"]
+        expected = int(np.sum(np.diff(reference.astype(np.int8), axis=1, prepend=0) == 1))
+        assert len(found) == expected, (len(found), expected)
+        print(f"\nscore_history {args.days} dias desde segmentos (lotes diarios): {t_hist:.2f} s, "
+              f"{len(found)} episodios == evaluate de una vez")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: event log con millones de filas.
+
+Mide log_event (solo memoria), get_recent_events (cola en memoria) y las
+consultas de auditoria filtradas con y sin indices, mostrando el plan de
+SQLite. Verifica que un segundo proceso ve los eventos del primero dentro
+de la demora de escritura.
+
+Uso: python -m benchmarks.bench_event_log [--rows 2000000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from modules.industrial.event_logger import EventLogger
+
+TYPES = ("ALARM", "SYSTEM", "CONTROL", "AUDIT", "LOGIN")
+SEVERITIES = ("INFO", "INFO", "INFO", "WARNING", "CRITICAL")
+
+QUERIES = {
+    "criticos ultimo dia": dict(severity="CRITICAL", desde="2025-12-30"),
+    "alarmas una semana": dict(event_type="ALARM", desde="2025-06-01", hasta="2025-06-08"),
+    "todo un dia": dict(desde="2025-03-10", hasta="2025-03-11"),
+}
+
+
+def populate(path, rows, seed=0):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    EventLogger(path).close()   # crea el esquema
+    start = datetime(2025, 1, 1)
+    step = 365 * 86400 / rows
+    with conn:
+        conn.executemany(
+            "INSERT INTO eventos (timestamp, event_type, severity, description, user) VALUES (?, ?, ?, ?, ?)",
+            (((start + timedelta(seconds=i * step)).strftime("%Y-%m-%d %H:%M:%S"), rng.choice(TYPES),
+              rng.choice(SEVERITIES), f"evento {i}", "sistema") for i in range(rows)),
+        )
+    conn.close()
+
+
+def time_query(logger, kwargs, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        logger.query_events(**kwargs)
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def plan(logger, kwargs):
+    clauses = [f"{k} = '{v}'" for k, v in kwargs.items() if k in ("severity", "event_type")]
+    if "desde" in kwargs:
+        clauses.append(f"timestamp >= '{kwargs['desde']}'")
+    if "hasta" in kwargs:
+        clauses.append(f"timestamp < '{kwargs['hasta']}'")
+    sql = f"SELECT * FROM eventos WHERE {' AND '.join(clauses)} ORDER BY timestamp DESC LIMIT 500"
+    return "; ".join(row[-1] for row in logger.conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "eventos.db")
+    t = time.perf_counter()
+    populate(path, args.rows)
+    print(f"{args.rows:,} eventos cargados en {time.perf_counter() - t:.1f} s")
+
+    logger = EventLogger(path, flush_interval_s=0.2)
+    n = 20000
+    t = time.perf_counter()
+    for i in range(n):
+        logger.log_event("ALARM", "WARNING", f"alarma {i}")
+    t_log = (time.perf_counter() - t) / n
+    t = time.perf_counter()
+    for _ in range(n):
+        logger.get_recent_events(limit=10)
+    t_recent = (time.perf_counter() - t) / n
+    print(f"log_event: {t_log * 1e6:.1f} us/evento   get_recent_events(10): {t_recent * 1e6:.1f} us")
+
+    # Visibilidad entre procesos: otro logger sobre el mismo archivo
+    other = EventLogger(path, flush_interval_s=0.2)
+    logger.log_event("SYSTEM", "INFO", "marca entre procesos")
+    t = time.perf_counter()
+    while other.get_recent_events(1)[0]["description"] != "marca entre procesos":
+        time.sleep(0.01)
+        assert time.perf_counter() - t < 2.0, "el evento no llego al otro logger"
+    print(f"evento visible en el otro logger tras {(time.perf_counter() - t) * 1000:.0f} ms (flush cada 200 ms)")
+    other.close()
+
+    print(f"{'consulta':<22} {'con indices (ms)':>17} {'sin indices (ms)':>17}  plan")
+    with_idx = {name: (time_query(logger, kw), plan(logger, kw)) for name, kw in QUERIES.items()}
+    with logger._lock, logger.conn:
+        for idx in ("idx_eventos_timestamp", "idx_eventos_severity", "idx_eventos_tipo"):
+            logger.conn.execute(f"DROP INDEX {idx}")
+    for name, kw in QUERIES.items():
+        t_idx, p = with_idx[name]
+        t_scan = time_query(logger, kw, repeat=2)
+        print(f"{name:<22} {t_idx * 1000:>17.2f} {t_scan * 1000:>17.1f}  {p}")
+    logger.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: integrador de caudales en linea vs recalculo en bloque.
+
+Un mes del simulador con reconexiones cortas (30 s) y una caida larga que
+cruza la medianoche. Mide el costo por muestra del integrador en linea,
+el recalculo vectorizado desde segmentos, y verifica que ambos escriben
+los mismos consumo_diario, que los resumenes mensuales (triggers) siguen
+cuadrando y que una produccion_tm cargada a mano no se pisa.
+
+Uso: python -m benchmarks.bench_flow_integrator [--days 31]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from daily_update import DailyTracker
+from modules.industrial.flow_integrator import SIGNALS, FlowIntegrator, recompute_days
+from modules.industrial.historian import SIGNALS as ALL_SIGNALS
+from modules.industrial.segments import SegmentWriter
+from modules.industrial.simulator import PlantSimulator
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+DAY = 86400
+
+
+def with_gaps(ts, values, seed=0):
+    """Quita ventanas de 30 s (reconexiones) y 2 h alrededor de la medianoche del dia 10."""
+    rng = np.random.default_rng(seed)
+    keep = np.ones(len(ts), dtype=bool)
+    for start in rng.integers(0, len(ts) - 6, len(ts) // 2000):
+        keep[start:start + 6] = False
+    outage = (ts >= T0 + 10 * DAY - 3600) & (ts < T0 + 10 * DAY + 3600)
+    keep &= ~outage
+    return ts[keep], {k: v[keep] for k, v in values.items()}
+
+
+def consumo(tracker):
+    return {row[0]: row[1:] for row in tracker.conn.execute(
+        "SELECT fecha, n2_consumido_m3, metros_producidos, horas_operacion, velocidad_promedio, produccion_tm "
+        "FROM consumo_diario ORDER BY fecha")}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    ts, values = PlantSimulator(seed=4, t0=T0).generate(args.days * DAY // 5)
+    ts, values = with_gaps(ts, values)
+    tmp = tempfile.mkdtemp(prefix="sgi_integrador_")
+    try:
+        # En linea, con una fila cargada a mano de antemano
+        online = DailyTracker(os.path.join(tmp, "online.db"))
+        online.add_daily_consumption("2025-01-05", 19.5, 1.0, 1.0, observaciones="carga manual")
+        integrator = FlowIntegrator(online)
+        rows = [{"timestamp": t, **dict(zip(SIGNALS, r))}
+                for t, r in zip(ts.tolist(), zip(*(values[s].tolist() for s in SIGNALS)))]
+        t = time.perf_counter()
+        for row in rows:
+            integrator.add(row)
+        integrator.close_day()
+        t_online = time.perf_counter() - t
+        print(f"en linea: {len(rows):,} muestras, {t_online / len(rows) * 1e6:.1f} us/muestra "
+              f"(incluye {args.days} escrituras diarias)")
+
+        # En bloque desde segmentos
+        root = os.path.join(tmp, "segmentos")
+        writer = SegmentWriter(root)
+        writer.write_rows((ts * 1000).astype(np.int64), {s: values[s] for s in ALL_SIGNALS})
+        writer.close()
+        bulk = DailyTracker(os.path.join(tmp, "bulk.db"))
+        bulk.add_daily_consumption("2025-01-05", 19.5, 1.0, 1.0, observaciones="carga manual")
+        desde = min(consumo(online))
+        hasta = str(np.datetime64(max(consumo(online))) + np.timedelta64(1, "D"))
+        t = time.perf_counter()
+        days = recompute_days(bulk, desde, hasta, root)
+        t_bulk = time.perf_counter() - t
+        print(f"recalculo en bloque: {len(days)} dias en {t_bulk:.2f} s")
+
+        a, b = consumo(online), consumo(bulk)
+        assert a.keys() == b.keys(), (a.keys() ^ b.keys())
+        worst = max(abs(x - y) / max(1.0, abs(x)) for f in a for x, y in zip(a[f][:4], b[f][:4]))
+        assert worst < 1e-6, worst
+        print(f"en linea == en bloque en {len(a)} dias (max dif. relativa {worst:.1e})")
+        assert a["2025-01-05"][4] == 19.5, "produccion_tm manual pisada"
+
+        # Contra la serie completa sin huecos (rectangulos de 5 s)
+        ts_full, full = PlantSimulator(seed=4, t0=T0).generate(args.days * DAY // 5)
+        n2_ref = float(full["flujo_n2"].sum()) * 5 / 3600
+        n2 = sum(v[0] for v in a.values())
+        huecos = online.conn.execute("SELECT SUM(huecos_h) FROM consumo_medido").fetchone()[0]
+        print(f"N2 del mes: {n2:,.0f} m³ vs {n2_ref:,.0f} m³ sin huecos ({(n2 / n2_ref - 1) * 100:+.2f} %), "
+              f"huecos no integrados: {huecos:.2f} h")
+        dia10 = online.conn.execute(
+            "SELECT fecha, cobertura_h, huecos_h FROM consumo_medido WHERE fecha IN ('2025-01-10', '2025-01-11')"
+        ).fetchall()
+        print("caida de 2 h en la medianoche: " + ", ".join(f"{f} cobertura {c:.2f} h huecos {h:.2f} h"
+                                                              for f, c, h in dia10))
+
+        # Resumenes mantenidos por triggers == recalculo completo
+        before = online.get_monthly_totals()
+        online.rebuild_summaries()
+        assert before == online.get_monthly_totals()
+        print("consumo_mensual (triggers) == rebuild_summaries: OK")
+        online.close()
+        bulk.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: ingesta con rollups y latencia de consultas por rango.
+
+Uso: python -m benchmarks.bench_historian [--days 35] [--db /tmp/bench_historian.db]
+"""
+import argparse
+import math
+import os
+import time
+
+from modules.industrial.historian import SIGNALS, Historian
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+
+
+def sample(ts):
+    phase = ts / 3600.0
+    row = {name: 100.0 + 10.0 * math.sin(phase + i) for i, name in enumerate(SIGNALS)}
+    row["timestamp"] = ts
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=35)
+    parser.add_argument("--db", default="/tmp/bench_historian.db")
+    parser.add_argument("--interval", type=int, default=5)
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    h = Historian(args.db)
+
+    n = args.days * 86400 // args.interval
+    batch = 3600 // args.interval
+    start = time.perf_counter()
+    for i in range(0, n, batch):
+        h.write_batch([sample(T0 + (i + k) * args.interval) for k in range(min(batch, n - i))])
+    elapsed = time.perf_counter() - start
+    print(f"Ingesta: {n:,} filas x {len(SIGNALS)} senales en {elapsed:.1f}s ({n / elapsed:,.0f} filas/s)")
+
+    end = T0 + n * args.interval
+    signals = ["velocidad_real", "temp_zinc", "pureza_n2", "flujo_n2"]
+    for label, span in (("1 hora", 3600), ("1 dia", 86400), ("1 semana", 7 * 86400), ("1 mes", 30 * 86400)):
+        if span > n * args.interval:
+            continue
+        t0 = time.perf_counter()
+        result = h.query(signals, end - span, end, width_px=1200)
+        dt = (time.perf_counter() - t0) * 1000
+        points = len(result["data"][signals[0]]["ts"])
+        print(f"{label:<9} {result['tier']:<12} {points:>6} puntos/senal  {dt:>8.1f} ms ({len(signals)} senales)")
+    h.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: costo de los hooks de tiempos y verificacion del endpoint /metrics.
+
+Mide el overhead por llamada de timer()/timed() habilitados y
+deshabilitados, y levanta adquisicion real contra el PLC simulado para
+comprobar que el endpoint expone modbus_read, decode e historian_write.
+
+Uso: python -m benchmarks.bench_metrics [--calls 200000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+
+from modules.industrial import metrics
+from modules.industrial.acquisition import AcquisitionService
+from modules.industrial.data_store import DataStore
+from modules.industrial.historian import Historian
+from modules.industrial.modbus_tcp import AsyncModbusClient
+from modules.industrial.simulator import PlantSimulator, SimulatedPLC
+
+
+def per_call_ns(fn, calls):
+    t = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    def plain():
+        return None
+
+    decorated = metrics.timed("bench_decorado")(plain)
+
+    def with_timer():
+        with metrics.timer("bench_contexto"):
+            return None
+
+    base = per_call_ns(plain, args.calls)
+    print(f"{'hook':<12} {'deshabilitado (ns)':>19} {'habilitado (ns)':>16}")
+    for name, fn in (("timed", decorated), ("timer", with_timer)):
+        metrics.set_enabled(False)
+        off = per_call_ns(fn, args.calls) - base
+        metrics.set_enabled(True)
+        on = per_call_ns(fn, args.calls) - base
+        print(f"{name:<12} {off:>19.0f} {on:>16.0f}")
+    t = time.perf_counter()
+    for _ in range(100):
+        metrics.get_registry().snapshot()
+    print(f"snapshot de percentiles: {(time.perf_counter() - t) * 10:.2f} ms")
+
+    # Extremo a extremo: adquisicion contra el simulador y lectura del endpoint
+    tmp = tempfile.mkdtemp()
+    metrics.set_process_name("adquisicion")
+    metrics.get_registry().directory = os.path.join(tmp, "metricas")
+    server = metrics.serve(port=0, host="127.0.0.1")
+    with SimulatedPLC(PlantSimulator(seed=1), speedup=1000) as plc:
+        historian = Historian(os.path.join(tmp, "historico.db"))
+        service = AcquisitionService(client=AsyncModbusClient(*plc.address),
+                                     store=DataStore(os.path.join(tmp, "snapshot.json")), poll_interval=0.01)
+        service.add_listener(historian.write_snapshot)
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_until_complete, args=(service.run(),))
+        thread.start()
+        time.sleep(2.0)
+        loop.call_soon_threadsafe(service.stop)
+        thread.join()
+        historian.close()
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    text = urllib.request.urlopen(url).read().decode()
+    server.shutdown()
+    for op in ("modbus_read", "decode", "historian_write"):
+        assert f'op="{op}",quantile="0.99"' in text, op
+    print(f"{url}:")
+    print("\n".join(line for line in text.splitlines() if "bench_" not in line and 'quantile="0.5"' in line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: adquisicion concurrente de 20 PLCs simulados en localhost.
+
+Cada linea tiene su SimulatedPLC, su cliente (una conexion por PLC) y su
+particion de segmentos. Se agrega un PLC "colgado" (acepta la conexion y
+nunca responde) para verificar que sus timeouts y su backoff no demoran a
+los demas. Reporta el intervalo real entre lecturas por linea vs
+POLL_INTERVAL_S y la latencia de lectura Modbus, y compara una consulta de una
+linea sobre su particion con la misma consulta sobre un archivo comun.
+
+Uso: python -m benchmarks.bench_multiline [--plcs 20] [--seconds 60] [--interval 5]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import config as cfg
+from modules.industrial.acquisition import AcquisitionService
+from modules.industrial.data_store import DataStore
+from modules.industrial.lines import Line
+from modules.industrial.metrics import get_registry
+from modules.industrial.segments import SegmentWriter, read_range
+from modules.industrial.simulator import PlantSimulator, SimulatedPLC
+
+
+class HungPLC:
+    """Acepta conexiones y nunca contesta."""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.address = self.sock.getsockname()
+        self.conns = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                self.conns.append(self.sock.accept()[0])
+            except OSError:
+                return
+
+    def close(self):
+        self.sock.close()
+        for conn in self.conns:
+            conn.close()
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plcs", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--interval", type=float, default=cfg.POLL_INTERVAL_S)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="sgi_lineas_")
+    plcs = [SimulatedPLC(PlantSimulator(seed=i)).start() for i in range(args.plcs)]
+    hung = HungPLC()
+    lines = [Line(id=f"linea{i:02d}", ip="127.0.0.1", port=plc.address[1]) for i, plc in enumerate(plcs)]
+    lines.append(Line(id="colgado", ip=hung.address[0], port=hung.address[1]))
+
+    arrivals = {line.id: [] for line in lines}
+    services, writers = [], []
+    for line in lines:
+        writer = SegmentWriter(line.path(os.path.join(tmp, "segmentos")))
+        service = AcquisitionService(client=line.client(timeout=1.0), poller=line.poller(),
+                                     store=DataStore(line.path(os.path.join(tmp, "snapshot.json"))),
+                                     poll_interval=args.interval, reconnect_wait=1.0, name=line.id)
+
+        def on_snapshot(snapshot, line_id=line.id):
+            arrivals[line_id].append(time.time())
+
+        service.add_listener(on_snapshot)
+        service.add_listener(writer.write_snapshot)
+        services.append(service)
+        writers.append(writer)
+
+    async def run_all():
+        loop = asyncio.get_running_loop()
+        loop.call_later(args.seconds, lambda: [s.stop() for s in services])
+        await asyncio.gather(*(s.run() for s in services))
+
+    t = time.perf_counter()
+    asyncio.run(run_all())
+    elapsed = time.perf_counter() - t
+    for writer in writers:
+        writer.close()
+    for plc in plcs:
+        plc.stop()
+    hung.close()
+
+    gaps = np.concatenate([np.diff(v) for k, v in arrivals.items() if k != "colgado" and len(v) > 1])
+    cycles = [s.cycles for s in services[:-1]]
+    print(f"{args.plcs} PLCs + 1 colgado, {elapsed:.0f} s, POLL_INTERVAL_S={args.interval}s")
+    print(f"  lecturas por linea: min {min(cycles)} max {max(cycles)} "
+          f"(esperadas ~{int(args.seconds / args.interval)}), overruns totales {sum(s.overruns for s in services)}")
+    print(f"  intervalo entre lecturas: media {gaps.mean():.3f} s  p99 {percentile(gaps, 99):.3f} s  "
+          f"max {gaps.max():.3f} s")
+    reads = get_registry().timing("modbus_read").summary()
+    print(f"  lectura Modbus por PLC: p50 {reads['p50'] * 1000:.2f} ms  max {reads['max'] * 1000:.0f} ms (timeouts del colgado)")
+    dead = services[-1]
+    print(f"  PLC colgado: {dead.cycles} lecturas, {dead.errors} errores, ultimo: {dead.last_error}")
+    assert abs(gaps.mean() - args.interval) < 0.05 * args.interval, gaps.mean()
+
+    # Consulta de una linea: su particion vs un archivo comun con todas las lineas
+    shared = os.path.join(tmp, "segmentos_comun")
+    days = 2
+    t_all, cols = [], {}
+    for i in range(args.plcs):
+        ts, values = PlantSimulator(seed=i, t0=1_735_689_600).generate(days * 86400 // 5)
+        ts_ms = (ts * 1000).astype(np.int64) + i   # desfasadas 1 ms para intercalarlas
+        part = SegmentWriter(os.path.join(tmp, "particiones", f"linea{i:02d}"))
+        part.write_rows(ts_ms, values)
+        part.close()
+        t_all.append(ts_ms)
+        for k, v in values.items():
+            cols.setdefault(k, []).append(np.asarray(v, dtype=np.float32))
+    order = np.argsort(np.concatenate(t_all), kind="stable")
+    writer = SegmentWriter(shared)
+    writer.write_rows(np.concatenate(t_all)[order], {k: np.concatenate(v)[order] for k, v in cols.items()})
+    writer.close()
+
+    def timed(root):
+        best = float("inf")
+        for _ in range(5):
+            t = time.perf_counter()
+            ts, _ = read_range(1_735_689_600, 1_735_689_600 + 86400, signals=["flujo_n2"], root=root)
+            best = min(best, time.perf_counter() - t)
+        return best, len(ts)
+
+    t_part, n_part = timed(os.path.join(tmp, "particiones", "linea00"))
+    t_shared, n_shared = timed(shared)
+    print(f"  1 dia de una linea: particion {t_part * 1000:.1f} ms ({n_part:,} filas) vs archivo comun "
+          f"{t_shared * 1000:.1f} ms ({n_shared:,} filas de {args.plcs} lineas a filtrar)")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
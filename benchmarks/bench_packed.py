@@ -0,0 +1,232 @@
+"""
+Benchmark y verificacion: muestras crudas empaquetadas (packed).
+
+1. Exactitud: PackedSamples.column == BlockPoller.decode para registros al
+   azar (con signo, mapa parcial de PSA); historico, segmentos y cola cloud
+   alimentados con registros crudos == alimentados con snapshots.
+2. Memoria a N muestras (10M por defecto): RAW_DTYPE medido; lista de
+   dicts, DataFrame float64 y columnas float32 medidos con tracemalloc en
+   una muestra y extrapolados (a 10M no entran en memoria).
+3. Throughput: empaquetar por lectura vs decodificar, leer una columna y
+   todas las columnas escaladas sobre N muestras, historico y anillo.
+
+Uso: python -m benchmarks.bench_packed [--samples 10000000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from modules.industrial.cloud_exporter import CloudExporter
+from modules.industrial.historian import SIGNALS, Historian
+from modules.industrial.lines import register_map
+from modules.industrial.packed import FIELDS, PackedSamples, pack_columns
+from modules.industrial.poller import RECORD, BlockPoller
+from modules.industrial.ring_buffer import PackedRingBuffer, RingBuffer
+from modules.industrial.segments import SegmentWriter, read_range
+from modules.industrial.simulator import PlantSimulator, encode_registers
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+DAY = 86400 // 5
+
+
+def random_reads(poller, rng, n):
+    for i in range(n):
+        registers = [[rng.randrange(65536) for _ in range(c)] for _, c in poller.holding_blocks]
+        coils = [[rng.random() < 0.5 for _ in range(c)] for _, c in poller.coil_blocks]
+        yield registers, coils, T0 + 5.0 * i
+
+
+def reads_from(poller, snapshots):
+    """Bloques crudos como los leeria el poller del PLC simulado."""
+    for snapshot in snapshots:
+        holding, coils = encode_registers(snapshot)
+        registers = [[holding.get(start + k, 0) for k in range(count)] for start, count in poller.holding_blocks]
+        bits = [[coils.get(start + k, False) for k in range(count)] for start, count in poller.coil_blocks]
+        yield registers, bits, snapshot.timestamp
+
+
+def check_decode(rng):
+    for holding_map, coil_map in (register_map(), register_map(omitir=("temp_zinc", "dew_point_n2", "alarma_zinc"))):
+        poller = BlockPoller(holding_map, coil_map, max_gap=2)
+        snapshots, records = [], []
+        for registers, coils, ts in random_reads(poller, rng, 2000):
+            snapshots.append(poller.decode(registers, coils, ts))
+            records.append(poller.pack(registers, coils, ts))
+        samples = PackedSamples.from_bytes(b"".join(records))
+        for name in FIELDS:
+            expected = np.array([getattr(s, name) for s in snapshots], dtype=np.float64)
+            assert np.array_equal(samples.column(name), expected, equal_nan=True), name
+    print(f"PackedSamples.column == BlockPoller.decode (registros al azar, mapa completo y parcial): OK "
+          f"({RECORD.size} bytes por muestra)")
+
+
+def check_writers(tmp):
+    poller = BlockPoller()
+    snapshots = list(PlantSimulator(seed=3, t0=T0).snapshots(3 * 720))
+    reads = list(reads_from(poller, snapshots))
+    decoded = [poller.decode(r, c, ts) for r, c, ts in reads]
+    records = [poller.pack(r, c, ts) for r, c, ts in reads]
+
+    tables = []
+    for label, feed in (("snap", lambda h: [h.write_snapshot(s) for s in decoded]),
+                        ("raw", lambda h: [h.write_record(r) for r in records])):
+        path = os.path.join(tmp, f"hist_{label}.db")
+        historian = Historian(path)
+        feed(historian)
+        historian.close()
+        with sqlite3.connect(path) as conn:
+            tables.append([conn.execute(f"SELECT * FROM {t} ORDER BY 1, 2").fetchall()
+                           for t in ("raw_samples", "rollup_1m", "rollup_1h")])
+    assert tables[0] == tables[1]
+    print(f"Historian.write_record == write_snapshot ({len(records)} lecturas, crudo y rollups): OK")
+
+    ranges = []
+    for label, write in (("snap", "write_snapshot"), ("raw", "write_record")):
+        root = os.path.join(tmp, f"seg_{label}")
+        writer = SegmentWriter(root)
+        for item in (decoded if label == "snap" else records):
+            getattr(writer, write)(item)
+        writer.close()
+        ranges.append(read_range(T0, T0 + 86400, root=root))
+    assert np.array_equal(ranges[0][0], ranges[1][0])
+    assert all(np.array_equal(ranges[0][1][k], ranges[1][1][k], equal_nan=True) for k in SIGNALS)
+    print(f"SegmentWriter.write_record == write_snapshot ({len(os.listdir(root))} segmentos): OK")
+
+    payloads, sizes = [], []
+    for label, enqueue in (("snap", "enqueue"), ("raw", "enqueue_record")):
+        exporter = CloudExporter(platform="thingsboard", base_url="http://127.0.0.1:9",
+                                 queue_path=os.path.join(tmp, f"cola_{label}.db"))
+        for item in (decoded if label == "snap" else records):
+            getattr(exporter, enqueue)(item)
+        rows = exporter._take(10_000, 0)
+        payloads.append(exporter._values(rows))
+        sizes.append(exporter.conn.execute("SELECT AVG(LENGTH(valores) + IFNULL(LENGTH(crudo), 0)) FROM cola")
+                     .fetchone()[0])
+        exporter.close()
+    for (ts_a, a), (ts_b, b) in zip(*payloads):
+        assert ts_a == ts_b and all(np.isclose(a[k], b[k]) for k in SIGNALS)
+    print(f"cola cloud: registro crudo == JSON al enviar; {sizes[0]:.0f} -> {sizes[1]:.0f} bytes por fila encolada")
+
+
+def per_sample_bytes(build, n):
+    tracemalloc.start()
+    obj = build(n)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    n = args.samples
+    rng = random.Random(args.seed)
+
+    tmp = tempfile.mkdtemp(prefix="sgi_packed_")
+    try:
+        check_decode(rng)
+        check_writers(tmp)
+
+        # Un dia simulado, repetido hasta n muestras
+        ts_day, values_day = PlantSimulator(seed=7, t0=T0).generate(DAY)
+        day = pack_columns(ts_day, values_day)
+        t = time.perf_counter()
+        records = np.resize(day, n)
+        records["ts"] = (T0 + 5 * np.arange(n, dtype=np.int64)) * 1000
+        samples = PackedSamples(records)
+        print(f"\n{n:,} muestras empaquetadas en {time.perf_counter() - t:.2f} s")
+
+        # MEMORIA
+        snap = {key: float(v) for key, v in PackedSamples(day[:1]).rows()[0].items()}
+        layouts = {
+            "lista de dicts (float)": lambda k: [{key: float(v) + i for key, v in snap.items()} for i in range(k)],
+            "DataFrame float64": lambda k: pd.DataFrame(samples[:k].columns()),
+            "columnas float32 (RingBuffer)": lambda k: (samples.ts[:k].copy(), samples[:k].columns(dtype=np.float32)),
+        }
+        print(f"memoria a {n:,} muestras:")
+        print(f"  {'registros crudos (RAW_DTYPE)':<32} {samples.nbytes / n:6.0f} B/muestra  "
+              f"{samples.nbytes / 2**20:8,.0f} MiB (medido)")
+        for label, build in layouts.items():
+            b = per_sample_bytes(build, 200_000)
+            print(f"  {label:<32} {b:6.0f} B/muestra  {b * n / 2**20:8,.0f} MiB (extrapolado de 200k)")
+
+        # THROUGHPUT
+        poller = BlockPoller()
+        reads = list(random_reads(poller, rng, 20_000))
+        for label, fn in (("decode -> PlantSnapshot", poller.decode), ("pack -> RECORD", poller.pack)):
+            t = time.perf_counter()
+            for registers, coils, ts in reads:
+                fn(registers, coils, ts)
+            print(f"por lectura, {label:<24}: {(time.perf_counter() - t) / len(reads) * 1e6:5.1f} us")
+
+        t = time.perf_counter()
+        temp = samples.column("temp_zinc")
+        t_one = time.perf_counter() - t
+        t = time.perf_counter()
+        dew = samples.column("dew_point_n2", np.float32)
+        t_signed = time.perf_counter() - t
+        t = time.perf_counter()
+        samples.column("alarma_psa")
+        t_coil = time.perf_counter() - t
+        print(f"columna escalada sobre {n:,}: temp_zinc {t_one * 1000:.0f} ms ({n / t_one / 1e6:.0f} M/s), "
+              f"dew_point_n2 con signo {t_signed * 1000:.0f} ms, coil {t_coil * 1000:.0f} ms")
+        assert temp.min() > 400 and dew.max() < 0
+        del temp, dew
+        t = time.perf_counter()
+        for name in FIELDS:
+            samples.column(name, np.float32)
+        t_all = time.perf_counter() - t
+        print(f"todas las columnas ({len(FIELDS)}) de a una: {t_all:.2f} s ({n * len(FIELDS) / t_all / 1e6:.0f} M valores/s)")
+        t = time.perf_counter()
+        blob = records.tobytes()
+        again = PackedSamples.from_bytes(blob)
+        print(f"bytes <-> registros: tobytes {(time.perf_counter() - t) * 1000:.0f} ms, "
+              f"from_bytes sin copia ({again.records.base is not None})")
+        del blob, again
+
+        # Historico: lote de 1 h (720 lecturas) como registros vs dicts
+        batch = samples[:720]
+        rows = batch.rows(SIGNALS)
+        for label, write in (("write_batch(dicts)", lambda h: h.write_batch(rows)),
+                             ("write_records(RAW)", lambda h: h.write_records(batch))):
+            historian = Historian(os.path.join(tmp, f"hist_{label[:5]}.db"))
+            write(historian)
+            t = time.perf_counter()
+            for _ in range(20):
+                write(historian)
+            print(f"historico, lote de 720: {label:<20} {(time.perf_counter() - t) / 20 * 1000:6.1f} ms")
+            historian.close()
+
+        # Anillo del dashboard
+        capacity = 100_000
+        ring, packed_ring = RingBuffer(SIGNALS, capacity), PackedRingBuffer(capacity)
+        packed_ring.append_records(samples[:capacity])
+        ts_r, cols = samples[:capacity].ts / 1000.0, samples[:capacity].columns(SIGNALS)
+        for i in range(capacity):
+            ring.append(ts_r[i], {k: c[i] for k, c in cols.items()})
+        a, b = ring.window(signals=["temp_zinc", "flujo_n2"]), packed_ring.window(signals=["temp_zinc", "flujo_n2"])
+        assert np.array_equal(a[0], b[0]) and all(np.array_equal(a[1][k], b[1][k]) for k in a[1])
+        print(f"anillo de {capacity:,}: RingBuffer {ring.nbytes / 2**20:.1f} MiB vs PackedRingBuffer "
+              f"{packed_ring.nbytes / 2**20:.1f} MiB; ventanas iguales")
+        for label, rb in (("RingBuffer", ring), ("PackedRingBuffer", packed_ring)):
+            t = time.perf_counter()
+            for _ in range(50):
+                rb.window(signals=["temp_zinc", "flujo_n2", "pureza_n2"], copy=True)
+            print(f"  ventana completa de 3 senales, {label:<17}: {(time.perf_counter() - t) / 50 * 1000:5.2f} ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: RingBuffer vs lista de dicts / DataFrame concat.
+
+Mide el costo por append con el historial ya lleno a N puntos y el costo
+de obtener la ventana completa como arrays listos para plotly.
+
+Uso: python -m benchmarks.bench_ring_buffer [--sizes 500 50000 500000]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from modules.industrial.poller import HOLDING_MAP
+from modules.industrial.ring_buffer import RingBuffer
+
+SIGNALS = [name for name, _, _, _ in HOLDING_MAP]
+
+
+def make_sample(i):
+    row = {name: float(i % 1000) for name in SIGNALS}
+    row["timestamp"] = 1_700_000_000.0 + i
+    return row
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_ring(n, appends):
+    rb = RingBuffer(SIGNALS, capacity=n)
+    for i in range(n):
+        rb.append_snapshot(make_sample(i))
+    sample = make_sample(n)
+    t_append = timed(lambda: rb.append_snapshot(sample), appends)
+    t_snap = timed(lambda: rb.window(), 20)
+    return t_append, t_snap, rb.nbytes
+
+
+def bench_list_of_dicts(n, appends):
+    rows = [make_sample(i) for i in range(n)]
+    sample = make_sample(n)
+
+    def append():
+        rows.append(sample)
+        if len(rows) > n:
+            del rows[0]
+
+    t_append = timed(append, appends)
+    t_snap = timed(lambda: pd.DataFrame(rows), 3)
+    return t_append, t_snap
+
+
+def bench_concat(n, appends):
+    df = pd.DataFrame([make_sample(i) for i in range(n)])
+    row = pd.DataFrame([make_sample(n)])
+    state = {"df": df}
+
+    def append():
+        state["df"] = pd.concat([state["df"], row], ignore_index=True).iloc[-n:]
+
+    t_append = timed(append, appends)
+    t_snap = timed(lambda: {c: state["df"][c].to_numpy() for c in SIGNALS}, 20)
+    return t_append, t_snap
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 50_000, 500_000])
+    args = parser.parse_args()
+
+    print(f"{'N':>8} {'estructura':<16} {'append (us)':>12} {'snapshot (ms)':>14}")
+    for n in args.sizes:
+        t_a, t_s, nbytes = bench_ring(n, 10_000)
+        print(f"{n:>8} {'RingBuffer':<16} {t_a * 1e6:>12.2f} {t_s * 1e3:>14.4f}   ({nbytes / 1e6:.1f} MB fijos)")
+        t_a, t_s = bench_list_of_dicts(n, 10_000)
+        print(f"{n:>8} {'lista de dicts':<16} {t_a * 1e6:>12.2f} {t_s * 1e3:>14.4f}")
+        t_a, t_s = bench_concat(n, 20 if n > 50_000 else 200)
+        print(f"{n:>8} {'DataFrame concat':<16} {t_a * 1e6:>12.2f} {t_s * 1e3:>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
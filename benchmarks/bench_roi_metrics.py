@@ -0,0 +1,98 @@
+"""
+Benchmark y verificacion: ROI desde resumenes (triggers + cache) vs SUM() completo.
+
+Genera datos aleatorios (altas, reemplazos, updates, borrados y cambios de
+fecha de instalacion) y comprueba en cada paso que ambos caminos coinciden.
+
+Uso: python -m benchmarks.bench_roi_metrics [--days 3000] [--seed 7]
+"""
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from daily_update import DailyTracker
+
+
+def assert_same(fast, slow):
+    assert fast.keys() == slow.keys()
+    for key, value in slow.items():
+        if isinstance(value, float):
+            assert math.isclose(fast[key], value, rel_tol=1e-9, abs_tol=1e-6), (key, fast[key], value)
+        else:
+            assert fast[key] == value, (key, fast[key], value)
+
+
+def random_row(rng, day):
+    return (day.strftime('%Y-%m-%d'), rng.uniform(5, 30), rng.uniform(1e4, 4e4),
+            rng.uniform(200, 2000), rng.uniform(60, 200), rng.uniform(0, 24), None, None)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    start = date(2020, 1, 1)
+    days = [start + timedelta(days=i) for i in range(args.days)]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tracker = DailyTracker(os.path.join(tmpdir, 'roi.db'))
+        tracker.bulk_add_consumption(random_row(rng, d) for d in days[: args.days // 2])
+        tracker.register_psa_installation(days[args.days // 4].strftime('%Y-%m-%d'), 580000, 2.28, 0.778189)
+
+        checks = 0
+        for step in range(400):
+            op = rng.random()
+            if op < 0.4:
+                tracker.add_daily_consumption(*random_row(rng, rng.choice(days)))
+            elif op < 0.6:
+                tracker.bulk_add_consumption([random_row(rng, rng.choice(days)) for _ in range(20)])
+            elif op < 0.75:
+                with tracker.conn:
+                    tracker.conn.execute("UPDATE consumo_diario SET n2_consumido_m3 = ?, fecha = ? WHERE fecha = ?",
+                                         (rng.uniform(200, 2000), '2099-01-01', rng.choice(days).strftime('%Y-%m-%d')))
+                    tracker.conn.execute("DELETE FROM consumo_diario WHERE fecha = '2099-01-01'")
+            elif op < 0.9:
+                with tracker.conn:
+                    tracker.conn.execute("DELETE FROM consumo_diario WHERE fecha = ?",
+                                         (rng.choice(days).strftime('%Y-%m-%d'),))
+            else:
+                tracker.register_psa_installation(rng.choice(days).strftime('%Y-%m-%d'),
+                                                  rng.uniform(1e5, 1e6), 2.28, rng.uniform(0.2, 1.0))
+            assert_same(tracker.get_roi_metrics(), tracker.get_roi_metrics_full_scan())
+            checks += 1
+
+        monthly = sum(m['n2_consumido_m3'] for m in tracker.get_monthly_totals())
+        total = tracker.conn.execute("SELECT SUM(n2_consumido_m3) FROM consumo_diario").fetchone()[0]
+        assert math.isclose(monthly, total, rel_tol=1e-9)
+        print(f"OK: {checks} comparaciones resumen vs SUM() coinciden")
+
+        n = 2000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            tracker.get_roi_metrics_full_scan()
+        t_scan = (time.perf_counter() - t0) / n
+        tracker._roi_cache = None
+        t0 = time.perf_counter()
+        tracker.get_roi_metrics()
+        t_cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(n):
+            tracker.get_roi_metrics()
+        t_cached = (time.perf_counter() - t0) / n
+        rows = tracker.conn.execute("SELECT COUNT(*) FROM consumo_diario").fetchone()[0]
+        tracker.close()
+
+    print(f"{rows:,} dias en consumo_diario")
+    print(f"  SUM() completo     : {t_scan * 1e6:8.1f} us/llamada")
+    print(f"  resumen (sin cache): {t_cold * 1e6:8.1f} us/llamada")
+    print(f"  resumen (cache)    : {t_cached * 1e6:8.1f} us/llamada")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: cargar un mes de datos a 5 s desde segmentos Arrow vs desde CSV.
+
+Uso: python -m benchmarks.bench_segments [--days 30] [--dir /tmp/bench_segments]
+"""
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.industrial.historian import SIGNALS
+from modules.industrial.segments import SegmentWriter, export_csv, read_range
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--dir", default="/tmp/bench_segments")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+    seg_dir = os.path.join(args.dir, "segmentos")
+    csv_path = os.path.join(args.dir, "datos.csv")
+
+    n = args.days * 86400 // 5
+    ts_ms = (T0 + np.arange(n, dtype=np.int64) * 5) * 1000
+    rng = np.random.default_rng(0)
+    columns = {name: (100 + rng.standard_normal(n)).astype(np.float32) for name in SIGNALS}
+
+    t = time.perf_counter()
+    writer = SegmentWriter(seg_dir)
+    writer.write_rows(ts_ms, columns)
+    writer.close()
+    t_write = time.perf_counter() - t
+
+    t = time.perf_counter()
+    export_csv(T0, T0 + args.days * 86400, csv_path, root=seg_dir)
+    t_export = time.perf_counter() - t
+
+    seg_bytes = sum(os.path.getsize(os.path.join(seg_dir, f)) for f in os.listdir(seg_dir))
+    print(f"{n:,} filas x {len(SIGNALS)} senales ({args.days} dias a 5 s)")
+    print(f"  escritura segmentos: {t_write:6.2f} s  ({seg_bytes / 1e6:.0f} MB, {len(os.listdir(seg_dir))} archivos)")
+    print(f"  export CSV         : {t_export:6.2f} s  ({os.path.getsize(csv_path) / 1e6:.0f} MB)")
+
+    t = time.perf_counter()
+    ts, cols = read_range(T0, T0 + args.days * 86400, root=seg_dir)
+    t_seg = time.perf_counter() - t
+    assert len(ts) == n
+
+    t = time.perf_counter()
+    df = pd.read_csv(csv_path, parse_dates=["timestamp"])
+    t_csv = time.perf_counter() - t
+    assert len(df) == n
+
+    t = time.perf_counter()
+    ts, cols = read_range(T0 + 86400, T0 + 2 * 86400, signals=["temp_zinc"], root=seg_dir)
+    t_day = time.perf_counter() - t
+
+    print(f"  lectura mes segmentos: {t_seg:6.3f} s")
+    print(f"  lectura mes CSV      : {t_csv:6.3f} s  ({t_csv / t_seg:.0f}x)")
+    print(f"  lectura 1 dia, 1 senal (segmentos): {t_day * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark: arranque en frio del dashboard (interprete nuevo en cada corrida).
+
+1. Perfil de imports (-X importtime) de los imports de nivel superior de
+   app.py, sobre un proceso que ya cargo el servidor de Streamlit (lo que
+   ya esta en memoria cuando el script corre por primera vez). Reporta el
+   tiempo total, los modulos mas caros y si se colaron librerias pesadas.
+2. Costo en frio de cada libreria pesada por separado, como referencia.
+3. Primer render: AppTest de app.py en un interprete nuevo.
+4. Tiempo al primer byte: `streamlit run app.py` headless hasta que
+   /_stcore/health responde y / entrega el primer byte.
+
+Uso: python -m benchmarks.bench_startup [--runs 5] [--no-server]
+"""
+import argparse
+import ast
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+SERVER_MODULES = "streamlit.web.bootstrap, streamlit.runtime.scriptrunner"
+HEAVY = ("numpy", "pandas", "pyarrow", "plotly.graph_objects")
+MARK = "-- app --"
+
+
+def app_imports(path=APP):
+    """Modulos importados a nivel superior por app.py (los que existen en este arbol)."""
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    found, missing = [], []
+    for module in modules:
+        probe = subprocess.run([sys.executable, "-c", f"import importlib.util as u; "
+                                f"raise SystemExit(u.find_spec({module!r}) is None)"], cwd=ROOT)
+        (missing if probe.returncode else found).append(module)
+    return found, missing
+
+
+def cold(code):
+    """Corre code en un interprete nuevo; devuelve (segundos, stdout, stderr)."""
+    t = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - t
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return elapsed, proc.stdout, proc.stderr
+
+
+def parse_importtime(stderr):
+    """[(modulo, propio_us, acumulado_us, nivel)] de los imports posteriores a MARK."""
+    rows = []
+    lines = stderr.splitlines()
+    start = lines.index(MARK) + 1 if MARK in lines else 0
+    for line in lines[start:]:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(own), int(cumulative), level))
+    return rows
+
+
+def profile_app_imports(modules, runs):
+    code = (f"import sys; import {SERVER_MODULES}; before = set(sys.modules); "
+            f"sys.stderr.write({MARK!r} + '\\n'); sys.stderr.flush(); import {', '.join(modules)}; "
+            f"print(','.join(m for m in {HEAVY!r} if m in set(sys.modules) - before))")
+    totals, last = [], None
+    for _ in range(runs):
+        _, stdout, stderr = cold(code)
+        rows = parse_importtime(stderr)
+        totals.append(sum(own for _, own, _, _ in rows) / 1e6)
+        last = rows, stdout.strip()
+    rows, heavy = last
+    print(f"imports de app.py sobre el servidor ya cargado: mediana {statistics.median(totals) * 1000:.0f} ms "
+          f"({len(rows)} modulos nuevos, {runs} corridas en frio)")
+    top = sorted((r for r in rows if r[3] == 1), key=lambda r: -r[2])[:8]
+    for name, _, cumulative, _ in top:
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
+    print(f"  librerias pesadas que agrega app.py: {heavy or 'ninguna'}")
+    return heavy
+
+
+def profile_heavy(runs):
+    print("costo en frio de cada libreria (referencia):")
+    for module in HEAVY:
+        code = f"import {SERVER_MODULES}, sys; t = __import__('time').perf_counter(); import {module}; " \
+               f"print(__import__('time').perf_counter() - t)"
+        samples = [float(cold(code)[1]) for _ in range(runs)]
+        print(f"  {statistics.median(samples) * 1000:7.1f} ms  {module}")
+
+
+def first_render(runs):
+    code = ("import time, logging; t = time.perf_counter(); "
+            "from streamlit.testing.v1 import AppTest; logging.disable(logging.WARNING); "
+            f"at = AppTest.from_file({APP!r}, default_timeout=60); at.run(); "
+            "print(time.perf_counter() - t); print(at.exception[0].message if at.exception else '')")
+    samples, error = [], ""
+    for _ in range(runs):
+        _, stdout, _ = cold(code)
+        elapsed, error = (stdout.splitlines() + [""])[:2]
+        samples.append(float(elapsed))
+    print(f"primer render de app.py (AppTest, interprete nuevo): mediana {statistics.median(samples) * 1000:.0f} ms")
+    if error:
+        print(f"  ❌ app.py fallo: {error}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_byte(runs, timeout=60.0):
+    health, first_byte = [], []
+    for _ in range(runs):
+        port = free_port()
+        t = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+                                 "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+                                cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                if time.perf_counter() - t > timeout:
+                    raise TimeoutError("el servidor no respondio")
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                        if r.status == 200:
+                            break
+                except OSError:
+                    time.sleep(0.02)
+            health.append(time.perf_counter() - t)
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5) as r:
+                r.read(1)
+            first_byte.append(time.perf_counter() - t)
+        finally:
+            proc.terminate()
+            proc.wait()
+    print(f"streamlit run app.py: health {statistics.median(health) * 1000:.0f} ms, "
+          f"primer byte de / {statistics.median(first_byte) * 1000:.0f} ms (mediana de {runs})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-server", action="store_true", help="omite streamlit run")
+    args = parser.parse_args()
+
+    modules, missing = app_imports()
+    if missing:
+        print(f"⚠️ app.py importa modulos ausentes en este arbol: {', '.join(missing)}")
+    heavy = profile_app_imports(modules, args.runs)
+    profile_heavy(args.runs)
+    first_render(args.runs)
+    if not args.no_server:
+        time_to_first_byte(args.runs)
+    assert not heavy, f"app.py importa en frio: {heavy}"
+
+
+if __name__ == "__main__":
+    main()
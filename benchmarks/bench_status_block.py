@@ -0,0 +1,160 @@
+"""
+Benchmark: bloque de estado en memoria compartida (seqlock).
+
+1. Latencia de lectura del bloque vs el estado JSON del DataStore (con la
+   cache por mtime valida, y tras una publicacion: stat + open + json).
+2. Un proceso escritor publica lo mas rapido posible registros cuyos campos
+   deben coincidir entre si; N procesos lectores verifican que ninguna
+   lectura sale mezclada (torn read).
+3. Adquisicion real contra el PLC simulado, sin dashboard: se detiene el
+   PLC y el propio servicio activa el failsafe en el bloque.
+
+Uso: python -m benchmarks.bench_status_block [--readers 4] [--seconds 3]
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+import time
+
+from modules.industrial.acquisition import AcquisitionService
+from modules.industrial.data_store import DataStore
+from modules.industrial.modbus_tcp import AsyncModbusClient
+from modules.industrial.simulator import PlantSimulator, SimulatedPLC
+from modules.industrial.status_block import StatusBlock
+from modules.industrial.watchdog import Watchdog
+
+
+def per_call_us(fn, calls):
+    t = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t) / calls * 1e6
+
+
+def writer(name, stop):
+    block = StatusBlock.create(name)
+    k = 0
+    while not stop.is_set():
+        k += 1
+        block.write("adquisicion", published_at=float(k), last_read=float(k), cycles=k, errors=k,
+                    connected=k & 1, failsafe=k & 1, last_error=f"error {k}")
+    block.close()
+
+
+def reader(name, seconds, results):
+    block = StatusBlock.open(name)
+    reads = torn = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        s = block.read("adquisicion")
+        if s is None:
+            continue
+        k = s["cycles"]
+        if not (s["errors"] == k and s["last_read"] == k and s["published_at"] == k
+                and s["failsafe"] == k & 1 and s["last_error"] == f"error {k}"):
+            torn += 1
+        reads += 1
+    block.close()
+    results.put((reads, torn))
+
+
+def torn_read_check(readers, seconds):
+    name = f"sgi_bench_{os.getpid()}"
+    StatusBlock.create(name).close()
+    stop = mp.Event()
+    results = mp.Queue()
+    w = mp.Process(target=writer, args=(name, stop))
+    w.start()
+    procs = [mp.Process(target=reader, args=(name, seconds, results)) for _ in range(readers)]
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    stop.set()
+    w.join()
+    block = StatusBlock.open(name)
+    writes = block.read("adquisicion")["cycles"]
+    block.close()
+    block.unlink()
+    reads = sum(r for r, _ in totals)
+    torn = sum(t for _, t in totals)
+    print(f"{readers} lectores x {seconds}s con escritor continuo: {writes:,} escrituras, "
+          f"{reads:,} lecturas, {torn} mezcladas")
+    assert torn == 0, "lecturas mezcladas"
+
+
+async def cut_connection(client):
+    async with client._lock:
+        await client.close()
+
+
+def failsafe_without_ui(tmp):
+    name = f"sgi_bench_fs_{os.getpid()}"
+    block = StatusBlock.create(name)
+    plc = SimulatedPLC(PlantSimulator(seed=2), speedup=1000).start()
+    service = AcquisitionService(client=AsyncModbusClient(*plc.address),
+                                 store=DataStore(os.path.join(tmp, "snapshot.json")),
+                                 poll_interval=0.05, reconnect_wait=0.2,
+                                 status_block=block, heartbeat_timeout=1.0)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(service.run(),))
+    thread.start()
+    reader_block = StatusBlock.open(name)
+    watchdog = Watchdog(store=DataStore(os.path.join(tmp, "snapshot.json")), timeout_s=1.0, shm_name=name)
+    try:
+        time.sleep(1.0)
+        assert reader_block.read("adquisicion")["failsafe"] == 0
+        plc.stop()   # deja de aceptar conexiones; se corta la conexion vigente
+        asyncio.run_coroutine_threadsafe(cut_connection(service.client), loop).result()
+        stopped = time.time()
+        while not reader_block.read("adquisicion")["failsafe"]:
+            time.sleep(0.05)
+            assert time.time() - stopped < 5.0, "failsafe no se activo"
+        print(f"PLC detenido: failsafe en el bloque tras {time.time() - stopped:.1f}s (timeout 1s, sin UI)")
+        status = watchdog.get_status()
+        assert status["failsafe_active"], status
+        print(f"Watchdog del dashboard: {status['failsafe_reason']}")
+    finally:
+        loop.call_soon_threadsafe(service.stop)
+        thread.join()
+        reader_block.close()
+        block.close()
+        block.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    name = f"sgi_bench_lat_{os.getpid()}"
+    block = StatusBlock.create(name)
+    block.write("adquisicion", published_at=time.time(), last_read=time.time(), cycles=1, connected=1)
+    block.write("control", published_at=time.time(), heartbeat=7, apertura_n2=45.0, apertura_h2=45.0)
+    store = DataStore(os.path.join(tmp, "snapshot_lat.json"))
+    store.publish(PlantSimulator(seed=0).step().as_dict(), {"last_read": time.time(), "connected": True})
+    with_block = Watchdog(store=store, shm_name=name)
+    without_block = Watchdog(store=store, shm_name=f"{name}_inexistente")
+    print(f"{'lectura':<32} {'us/llamada':>10}")
+    print(f"{'StatusBlock.read':<32} {per_call_us(lambda: block.read('adquisicion'), args.calls):>10.2f}")
+    print(f"{'Watchdog.get_status (bloque)':<32} {per_call_us(with_block.get_status, args.calls):>10.2f}")
+    print(f"{'DataStore.read_status (cache)':<32} {per_call_us(store.read_status, args.calls // 10):>10.2f}")
+    print(f"{'DataStore.read_status (nuevo)':<32} "
+          f"{per_call_us(lambda: DataStore(store.path).read_status(), args.calls // 10):>10.2f}")
+    print(f"{'Watchdog.get_status (DataStore)':<32} {per_call_us(without_block.get_status, args.calls // 10):>10.2f}")
+    block.close()
+    block.unlink()
+
+    torn_read_check(args.readers, args.seconds)
+    failsafe_without_ui(tmp)
+
+
+if __name__ == "__main__":
+    main()
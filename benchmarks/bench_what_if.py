@@ -0,0 +1,150 @@
+"""
+Benchmark y verificacion: escenarios financieros de la PSA (what_if).
+
+Sobre una base diaria simulada (PSA instalada hace ~6 meses, consumo con
+ciclo semanal y ruido):
+
+1. Caso base == get_roi_metrics / get_roi_metrics_full_scan.
+2. Una grilla de ~50.000 combinaciones vectorizada vs _roi_from_totals
+   combinacion por combinacion (y que coinciden en una muestra).
+3. Memoizacion: la misma consulta (slider sin mover) vs la primera.
+4. Bandas Monte Carlo: cuantiles de payback por banda == cuantiles de la
+   primera pasada de cada camino.
+
+Uso: python -m benchmarks.bench_what_if [--days 180] [--paths 1000]
+"""
+import argparse
+import math
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from daily_update import DailyTracker, _roi_from_totals
+from modules.industrial.flow_integrator import MEDIDO_SCHEMA
+from modules.industrial import what_if
+from modules.industrial.what_if import WhatIfEngine
+
+
+def build(path, days, seed):
+    rng = np.random.default_rng(seed)
+    inicio = date.today() - timedelta(days=days)
+    tracker = DailyTracker(path)
+    tracker.register_psa_installation(inicio.isoformat(), 580000, 2.28, 0.778189)
+    dias = [inicio + timedelta(days=i) for i in range(days)]
+    semanal = np.array([1.0, 1.0, 1.0, 1.0, 1.0, 0.7, 0.3])
+    n2 = 1100 * semanal[[d.weekday() for d in dias]] * rng.lognormal(0, 0.15, days)
+    tracker.bulk_add_consumption([(d.isoformat(), 20.0, 3e4, float(v)) for d, v in zip(dias, n2)])
+    with tracker.conn:
+        tracker.conn.execute(MEDIDO_SCHEMA)
+        tracker.conn.executemany(
+            "INSERT INTO consumo_medido VALUES (?, ?, 0, ?, 0, 0, 0, NULL, 24, 0, 0, '')",
+            [(d.isoformat(), float(v), float(v) * 0.05) for d, v in zip(dias, n2)])
+    return tracker
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--paths", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=2)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="sgi_whatif_")
+    try:
+        tracker = build(os.path.join(tmp, "diario.db"), args.days, args.seed)
+        engine = WhatIfEngine.from_tracker(tracker)
+        psa = tracker.conn.execute(
+            "SELECT installation_date, capex, costo_lin, costo_psa FROM psa_installation WHERE id=1").fetchone()
+
+        # 1. Caso base
+        base = engine.evaluate()
+        for reference in (tracker.get_roi_metrics(), tracker.get_roi_metrics_full_scan()):
+            for key in ("ahorro_acumulado", "ahorro_mensual_proyectado", "ahorro_anual_proyectado", "roi_actual",
+                        "roi_anual_proyectado", "payback_meses", "porcentaje_recuperado"):
+                assert math.isclose(base[key][0], reference[key], rel_tol=1e-12), (key, base[key][0], reference[key])
+        print(f"caso base == get_roi_metrics: payback {base['payback_meses'][0]:.1f} meses, "
+              f"ahorro {base['ahorro_acumulado'][0]:,.0f} USD")
+
+        # 2. Grilla
+        axes = dict(costo_lin=np.linspace(1.8, 3.0, 10), costo_psa=np.linspace(0.5, 1.2, 10),
+                    costo_h2=np.linspace(7, 10, 5), capex=np.linspace(4e5, 8e5, 10),
+                    factor_n2=np.linspace(0.7, 1.3, 5), factor_h2=[0.9, 1.1])
+        combos = int(np.prod([len(v) for v in axes.values()]))
+        t = time.perf_counter()
+        grid = engine.evaluate(**axes)
+        t_grid = time.perf_counter() - t
+        t = time.perf_counter()
+        again = engine.evaluate(**axes)
+        t_memo = time.perf_counter() - t
+        assert again is grid
+
+        rng = np.random.default_rng(0)
+        sample = rng.choice(combos, 2000, replace=False)
+        t = time.perf_counter()
+        for i in sample:
+            ref = _roi_from_totals((psa[0], grid["capex"][i], grid["costo_lin"][i], grid["costo_psa"][i]),
+                                   engine.n2_total * grid["factor_n2"][i])
+            expected_payback = math.inf if ref["payback_meses"] == 999 else ref["payback_meses"]
+            assert math.isclose(grid["payback_meses"][i], expected_payback, rel_tol=1e-9), i
+            assert math.isclose(grid["roi_anual_proyectado"][i], ref["roi_anual_proyectado"], rel_tol=1e-9), i
+        t_scalar = (time.perf_counter() - t) / len(sample) * combos
+        print(f"grilla de {combos:,} combinaciones: {t_grid * 1000:.1f} ms vectorizado vs ~{t_scalar * 1000:.0f} ms "
+              f"con _roi_from_totals por combinacion ({t_scalar / t_grid:.0f}x); muestra de 2.000 coincide")
+        print(f"memoizado (misma consulta): {t_memo * 1e6:.0f} us")
+
+        # Historico: dia de payback real == primer dia con ahorro acumulado >= capex
+        i = int(np.argmin(grid["payback_meses"]))
+        ahorro = np.cumsum(engine.n2) * (grid["costo_lin"][i] - grid["costo_psa"][i]) * grid["factor_n2"][i]
+        crossed = np.flatnonzero(ahorro >= grid["capex"][i])
+        assert (crossed[0] if len(crossed) else np.nan) == grid["dia_payback"][i] or (
+            not len(crossed) and np.isnan(grid["dia_payback"][i]))
+        print(f"escenario mas favorable: payback real en el dia {grid['dia_payback'][i]:.0f} desde la instalacion")
+
+        # 4. Monte Carlo
+        slider = dict(costo_lin=[2.28, 2.60], costo_psa=[psa[3], psa[3] * 1.2], capex=[580000, 650000])
+        t = time.perf_counter()
+        bands = engine.bands(paths=args.paths, **slider)
+        t_bands = time.perf_counter() - t
+        t = time.perf_counter()
+        engine.bands(paths=args.paths, costo_lin=[2.0, 2.4], costo_psa=[psa[3]], capex=[580000])
+        t_bands2 = time.perf_counter() - t
+        print(f"bandas Monte Carlo ({args.paths} caminos x 10 anios): {t_bands * 1000:.0f} ms la primera vez, "
+              f"{t_bands2 * 1000:.1f} ms con otros costos (caminos memorizados)")
+        big = engine.bands(paths=args.paths, **axes)
+        assert engine.bands(paths=args.paths, **axes) is not big
+        assert what_if._memo_bytes <= what_if.MEMO_MAX_BYTES
+        print(f"bandas sobre la grilla completa: {big['ahorro_acumulado'].nbytes / 2**20:.0f} MiB de curvas, "
+              f"no se memorizan (memo: {what_if._memo_bytes / 2**20:.1f} MiB de {what_if.MEMO_MAX_BYTES / 2**20:.0f})")
+        del big
+
+        # Primera pasada por camino, con los mismos caminos
+        weeks = len(engine.n2) // 7
+        history = engine.n2[len(engine.n2) - weeks * 7:].reshape(weeks, 7)
+        picks = np.random.default_rng(0).integers(0, weeks, size=(args.paths, -(-3650 // 7)))
+        cum = np.cumsum(history[picks].reshape(args.paths, -1)[:, :3650], axis=1)
+        point = engine.evaluate(**slider)
+        worst = 0.0
+        for k in range(len(point["capex"])):
+            ahorro_m3 = (point["costo_lin"][k] - point["costo_psa"][k]) * point["factor_n2"][k]
+            restante = (point["capex"][k] - point["ahorro_acumulado"][k]) / ahorro_m3
+            first = np.array([np.searchsorted(c, restante) + 1 for c in cum], dtype=float) / 30
+            brute = np.quantile(first, bands["quantiles"])
+            worst = max(worst, float(np.max(np.abs(brute - bands["payback_meses"][:, k]))))
+        assert worst < 0.5, worst
+        print(f"payback p10/p50/p90 por banda vs primera pasada de cada camino: max dif. {worst * 30:.1f} dias")
+        print(f"  {'LIN':>5} {'PSA':>6} {'capex':>8}   payback p10 / p50 / p90 (meses)   puntual")
+        for k in range(len(point["capex"])):
+            p10, p50, p90 = bands["payback_meses"][:, k]
+            print(f"  {point['costo_lin'][k]:>5.2f} {point['costo_psa'][k]:>6.3f} {point['capex'][k]:>8,.0f}   "
+                  f"{p10:6.1f} / {p50:6.1f} / {p90:6.1f}                {point['payback_meses'][k]:6.1f}")
+        tracker.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Prueba de carga: API de historico con muchos clientes locales concurrentes.
+
+Arma un historico simulado en un directorio temporal, levanta la API y la
+consulta desde N hilos (una conexion keep-alive cada uno) mientras un
+escritor agrega un lote cada pocos segundos, como el servicio de
+adquisicion. La mezcla de consultas imita al dashboard y a los reportes:
+ventanas fijas repetidas (24 h, 7 dias, ultima hora cruda, en JSON y Arrow)
+y ventanas al azar que nunca se repiten. Corre con y sin cache.
+
+Verifica: respuesta == Historian.query, Arrow == JSON, que un lote nuevo
+invalida la cache y que las consultas recorren rangos de la clave primaria.
+
+Uso: python -m benchmarks.load_history_api [--clients 32] [--seconds 20] [--days 7]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from modules.industrial.historian import SIGNALS, Historian
+from modules.industrial.history_api import HistoryService, serve
+from modules.industrial.simulator import PlantSimulator
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+DAY = 86400
+
+
+def rows_from(ts, values):
+    cols = [values[s].tolist() for s in SIGNALS]
+    return [{"timestamp": t, **dict(zip(SIGNALS, r))} for t, r in zip(ts.tolist(), zip(*cols))]
+
+
+def build_history(path, days):
+    sim = PlantSimulator(seed=5, t0=T0)
+    historian = Historian(path)
+    for _ in range(days):
+        historian.write_batch(rows_from(*sim.generate(DAY // 5)))
+    return historian, sim
+
+
+def get(conn, url):
+    conn.request("GET", url)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def run_load(port, end, clients, seconds, writer_step):
+    popular = [
+        f"/history?signals=temp_zinc,pureza_n2&t0={end - DAY}&t1={end}&points=1200",
+        f"/history?signals=flujo_n2,fg_flujo_h2&t0={end - 7 * DAY}&t1={end}&points=1200",
+        f"/history?signals=temp_zinc,pureza_n2&t0={end - DAY}&t1={end}&points=1200&format=arrow",
+        f"/history?signals=velocidad_real&t0={end - 3600}&t1={end}&points=2000",
+        f"/history?signals=flujo_n2,presion_n2,pureza_n2&t0={end - 6 * 3600}&t1={end}&points=800&format=arrow",
+    ]
+    latencies, errors = [], []
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine = []
+        while not stop.is_set():
+            if rng.random() < 0.7:
+                url = rng.choice(popular)
+            else:
+                t0 = rng.randrange(T0, end - 3600)
+                span = rng.choice((3600, 6 * 3600, DAY))
+                url = f"/history?signals={rng.choice(SIGNALS)}&t0={t0}&t1={t0 + span}&points=1000"
+            t = time.perf_counter()
+            try:
+                status, _ = get(conn, url)
+            except (OSError, http.client.HTTPException) as e:
+                with lock:
+                    errors.append(repr(e))
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            mine.append(time.perf_counter() - t)
+            if status != 200:
+                with lock:
+                    errors.append(status)
+        with lock:
+            latencies.extend(mine)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for th in threads:
+        th.start()
+    writes = writer_step(stop, seconds)
+    for th in threads:
+        th.join()
+    return np.array(latencies), errors, writes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--write-every", type=float, default=2.0, help="s entre lotes del escritor")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="sgi_api_")
+    try:
+        path = os.path.join(tmp, "datos.db")
+        t = time.perf_counter()
+        historian, sim = build_history(path, args.days)
+        end = T0 + args.days * DAY
+        print(f"historico: {args.days} dias ({args.days * DAY // 5:,} muestras) en {time.perf_counter() - t:.1f} s")
+
+        # Exactitud y rangos de clave primaria
+        service = HistoryService(path)
+        server = serve(service, port=0)
+        port = server.server_address[1]
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        for span, points in ((DAY, 1200), (7 * DAY, 1200), (3600, 2000)):
+            expected = historian.query(["temp_zinc", "flujo_n2"], end - span, end, points)
+            _, body = get(conn, f"/history?signals=temp_zinc,flujo_n2&t0={end - span}&t1={end}&points={points}")
+            assert json.loads(body) == json.loads(json.dumps(expected)), span
+            _, body = get(conn, f"/history?signals=temp_zinc,flujo_n2&t0={end - span}&t1={end}"
+                                f"&points={points}&format=arrow")
+            table = pa.ipc.open_stream(body).read_all()
+            assert table.num_rows == sum(len(s["ts"]) for s in expected["data"].values())
+            assert table.schema.metadata[b"tier"].decode() == expected["tier"]
+            assert np.allclose(table.filter(pa.compute.equal(table["signal"].cast(pa.string()), "temp_zinc"))["mean"]
+                               .to_numpy(), expected["data"]["temp_zinc"]["mean"])
+        print("API == Historian.query (JSON) y Arrow == JSON en 1 h crudo, 24 h (1 min) y 7 dias (1 h): OK")
+        status, body = get(conn, "/history?signals=temp_zinc;DROP%20TABLE%20signals&t0=0&t1=1")
+        assert status == 400, status
+        print(f"senal desconocida -> {status} {json.loads(body)['error'][:40]}...")
+
+        ro = service.pool._all[0]
+        plans = [ro.execute("EXPLAIN QUERY PLAN SELECT ts FROM raw_samples WHERE ts >= 0 AND ts < 1").fetchall(),
+                 ro.execute("EXPLAIN QUERY PLAN SELECT bucket FROM rollup_1m WHERE signal_id = 1 "
+                            "AND bucket >= 0 AND bucket < 1").fetchall()]
+        for plan in plans:
+            print(f"  plan: {plan[0][-1]}")
+            assert "SEARCH" in plan[0][-1]
+
+        # Invalidacion: un lote nuevo dentro de la ventana cambia la respuesta
+        url = f"/history?signals=flujo_n2&t0={end - 3600}&t1={end + 3600}&points=7200"
+        _, before = get(conn, url)
+        ts_new, values_new = sim.generate(12)
+        historian.write_batch(rows_from(ts_new, values_new))
+        _, after = get(conn, url)
+        n_before = sum(json.loads(before)["data"]["flujo_n2"]["count"])
+        n_after = sum(json.loads(after)["data"]["flujo_n2"]["count"])
+        assert n_after == n_before + 12, (n_before, n_after)
+        print(f"lote nuevo de 12 muestras -> la misma consulta pasa de {n_before} a {n_after} muestras: OK")
+        conn.close()
+        server.shutdown()
+        service.close()
+
+        # Carga con y sin cache, con el escritor activo
+        for label, ttl in (("sin cache", 0.0), ("con cache", 10.0)):
+            service = HistoryService(path, ttl_s=ttl)
+            server = serve(service, port=0)
+            write_times = []
+
+            def writer_step(stop, seconds):
+                deadline = time.monotonic() + seconds
+                while time.monotonic() < deadline:
+                    time.sleep(args.write_every)
+                    ts_new, values_new = sim.generate(int(args.write_every // 5) or 1)
+                    t = time.perf_counter()
+                    historian.write_batch(rows_from(ts_new, values_new))
+                    write_times.append(time.perf_counter() - t)
+                stop.set()
+                return len(write_times)
+
+            service.cache.hits = service.cache.misses = 0
+            lat, errors, writes = run_load(server.server_address[1], end, args.clients, args.seconds, writer_step)
+            total = service.cache.hits + service.cache.misses
+            print(f"{label:<10} {args.clients} clientes: {len(lat) / args.seconds:7.0f} req/s  "
+                  f"p50 {np.percentile(lat, 50) * 1000:6.1f} ms  p99 {np.percentile(lat, 99) * 1000:7.1f} ms  "
+                  f"aciertos {service.cache.hits / max(1, total):4.0%}  errores {len(errors)}  "
+                  f"escritor: {writes} lotes, max {max(write_times) * 1000:.0f} ms")
+            assert not errors, errors[:5]
+            server.shutdown()
+            service.close()
+        historian.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
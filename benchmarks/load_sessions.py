@@ -0,0 +1,110 @@
+"""
+Prueba de carga: N sesiones simuladas del dashboard.
+
+Compara el esquema anterior (objetos por sesion, cada pipeline con su propia
+conexion al PLC) con los singletons por proceso. Cada medicion corre en un
+subproceso limpio y reporta RSS y conexiones abiertas al PLC sustituto.
+
+Uso: python -m benchmarks.load_sessions [--sessions 1 5 20 50] [--reruns 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def run_child(mode, sessions, reruns):
+    os.chdir(tempfile.mkdtemp())  # rutas relativas de config -> directorio temporal
+
+    from modules.industrial.acquisition import AcquisitionService
+    from modules.industrial.data_pipeline import DataPipeline, get_pipeline
+    from modules.industrial.data_store import DataStore
+    from modules.industrial.event_logger import EventLogger, get_event_logger
+    from modules.industrial.modbus_tcp import AsyncModbusClient, ModbusStandInServer, ModbusTcpClient
+    from modules.industrial.poller import BlockPoller
+    from modules.industrial.watchdog import Watchdog, get_watchdog
+
+    server = ModbusStandInServer().start()
+    host, port = server.address
+    service = AcquisitionService(client=AsyncModbusClient(host, port), poll_interval=0.05)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_until_complete, args=(service.run(),), daemon=True).start()
+    while DataStore().read_latest() is None:
+        time.sleep(0.01)
+    baseline = rss_mb()
+
+    objects = []
+    for _ in range(sessions):
+        if mode == "compartido":
+            objects.append((get_pipeline(), get_watchdog(), get_event_logger(), None))
+        else:
+            client = ModbusTcpClient(host, port).connect()
+            objects.append((DataPipeline(store=DataStore()), Watchdog(DataStore()), EventLogger(), client))
+
+    poller = BlockPoller()
+
+    def session(pipeline, watchdog, logger, client):
+        for _ in range(reruns):
+            if client is not None:
+                poller.poll(client)
+            pipeline.latest()
+            pipeline.window(100)
+            watchdog.get_status()
+            logger.get_recent_events(limit=10)
+
+    threads = [threading.Thread(target=session, args=objs) for objs in objects]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    result = {
+        "rss_mb": rss_mb() - baseline,
+        "plc_connections": server.active_connections,
+        "elapsed_s": elapsed,
+    }
+    loop.call_soon_threadsafe(service.stop)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "N"))
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]), args.reruns)
+        return
+
+    print(f"{'modo':<12} {'sesiones':>8} {'RSS extra (MB)':>15} {'conexiones PLC':>15} {'tiempo (s)':>11}")
+    for mode in ("por_sesion", "compartido"):
+        for n in args.sessions:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.load_sessions", "--child", mode, str(n), "--reruns", str(args.reruns)],
+                capture_output=True, text=True, check=True, cwd=os.getcwd(),
+                env={**os.environ, "PYTHONPATH": os.getcwd()},
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{mode:<12} {n:>8} {r['rss_mb']:>15.1f} {r['plc_connections']:>15} {r['elapsed_s']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
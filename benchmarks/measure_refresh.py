@@ -0,0 +1,133 @@
+"""
+Medicion: CPU del servidor y bytes enviados por minuto por sesion abierta.
+
+Levanta `streamlit run` en modo headless y abre N sesiones por websocket que
+se comportan como el navegador:
+    pagina    - rerun completo cada AUTO_REFRESH_INTERVAL (esquema anterior)
+    fragmento - solo rerun de los fragmentos que el servidor pide via
+                auto_rerun (esquema actual con st.fragment(run_every=...))
+
+Uso: python -m benchmarks.measure_refresh [--script app.py] [--seconds 60] [--sessions 1]
+Requiere websockets (pip install -r requirements-dev.txt).
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+import config as cfg
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def rerun_msg(fragment_id=None):
+    msg = BackMsg()
+    msg.rerun_script.query_string = ""
+    if fragment_id:
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.is_auto_rerun = True
+    return msg.SerializeToString()
+
+
+async def session(url, mode, seconds, interval):
+    stats = {"bytes": 0, "messages": 0}
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        await ws.send(rerun_msg())
+        auto_reruns = {}
+        timers = []
+
+        async def page_timer():
+            while True:
+                await asyncio.sleep(interval)
+                await ws.send(rerun_msg())
+
+        async def fragment_timer(fragment_id, every):
+            while True:
+                await asyncio.sleep(every)
+                await ws.send(rerun_msg(fragment_id))
+
+        if mode == "pagina":
+            timers.append(asyncio.create_task(page_timer()))
+
+        deadline = time.monotonic() + seconds
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                stats["bytes"] += len(raw)
+                stats["messages"] += 1
+                msg = ForwardMsg()
+                msg.ParseFromString(raw)
+                if mode == "fragmento" and msg.WhichOneof("type") == "auto_rerun":
+                    fid = msg.auto_rerun.fragment_id
+                    if fid not in auto_reruns:
+                        auto_reruns[fid] = asyncio.create_task(fragment_timer(fid, msg.auto_rerun.interval))
+        finally:
+            for task in timers + list(auto_reruns.values()):
+                task.cancel()
+    return stats
+
+
+async def measure(port, pid, mode, seconds, sessions, interval):
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    cpu0 = cpu_seconds(pid)
+    results = await asyncio.gather(*(session(url, mode, seconds, interval) for _ in range(sessions)))
+    cpu = cpu_seconds(pid) - cpu0
+    total_bytes = sum(r["bytes"] for r in results)
+    per_min = 60.0 / seconds / sessions
+    return cpu * per_min, total_bytes * per_min
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--script", default="app.py")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--sessions", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=cfg.AUTO_REFRESH_INTERVAL)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.script, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(300):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        time.sleep(1.0)
+        print(f"{args.script}: {args.sessions} sesion(es), {args.seconds:.0f}s, refresco {args.interval}s")
+        print(f"{'modo':<10} {'CPU servidor (s/min/sesion)':>28} {'KB/min/sesion':>15}")
+        for mode in ("pagina", "fragmento"):
+            cpu, sent = asyncio.run(measure(port, server.pid, mode, args.seconds, args.sessions, args.interval))
+            print(f"{mode:<10} {cpu:>28.3f} {sent / 1024:>15.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
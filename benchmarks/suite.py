@@ -0,0 +1,383 @@
+"""
+Suite de benchmarks de extremo a extremo sobre datos del simulador.
+
+Cada benchmark mide una operacion del sistema con datos deterministas
+(PlantSimulator con semilla fija) y reporta mediana, p95 y tasa. Los
+resultados se guardan en JSON y se comparan contra una linea base para que
+las regresiones aparezcan como numeros:
+
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json [--tolerance 0.25]
+    python -m benchmarks.suite --only ingest_historian query_mes
+
+Grupos: ingest_* (tasa de ingesta), query_* (latencia de historico),
+agg_* (agregados), render_* (tiempo de render de pagina con AppTest).
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+BENCHMARKS = {}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+T0 = 1_735_689_600  # 2025-01-01 UTC
+DAY = 86400
+
+
+def benchmark(name, unit, repeat=5):
+    """Registra fn(ctx) -> (callable, unidades_por_llamada)."""
+    def register(fn):
+        BENCHMARKS[name] = (fn, unit, repeat)
+        return fn
+    return register
+
+
+class Context:
+    """Datos compartidos por los benchmarks, generados una vez por corrida."""
+
+    def __init__(self, days, seed):
+        from modules.industrial.simulator import PlantSimulator
+
+        self.days = days
+        self.seed = seed
+        self.dir = tempfile.mkdtemp(prefix="sgi_suite_")
+        self.ts, self.values = PlantSimulator(seed=seed, t0=T0).generate(days * DAY // 5)
+        self._historian = None
+        self._segments = None
+
+    def rows(self, lo, hi):
+        """Filas tipo snapshot (dict) entre los indices lo y hi."""
+        from modules.industrial.historian import SIGNALS
+
+        columns = [(name, self.values[name][lo:hi].tolist()) for name in SIGNALS]
+        return [{"timestamp": float(self.ts[lo + i]), **{name: col[i] for name, col in columns}}
+                for i in range(hi - lo)]
+
+    @property
+    def historian(self):
+        if self._historian is None:
+            from modules.industrial.historian import Historian
+
+            self._historian = Historian(os.path.join(self.dir, "historico.db"))
+            for lo in range(0, len(self.ts), 720):
+                self._historian.write_batch(self.rows(lo, lo + 720))
+        return self._historian
+
+    @property
+    def segments(self):
+        if self._segments is None:
+            from modules.industrial.historian import SIGNALS
+            from modules.industrial.segments import SegmentWriter
+
+            self._segments = os.path.join(self.dir, "segmentos")
+            writer = SegmentWriter(self._segments)
+            writer.write_rows((self.ts * 1000).astype(np.int64), {s: self.values[s] for s in SIGNALS})
+            writer.close()
+        return self._segments
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def close(self):
+        if self._historian is not None:
+            self._historian.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+# INGESTA
+
+@benchmark("ingest_simulador", "muestras/s")
+def ingest_simulador(ctx):
+    from modules.industrial.simulator import PlantSimulator
+
+    n = DAY // 5
+    return (lambda: PlantSimulator(seed=ctx.seed, t0=T0).generate(n)), n
+
+
+@benchmark("ingest_historian", "muestras/s", repeat=3)
+def ingest_historian(ctx):
+    from modules.industrial.historian import Historian
+
+    rows = ctx.rows(0, DAY // 5)
+    counter = [0]
+
+    def run():
+        counter[0] += 1
+        h = Historian(ctx.path(f"ingesta_{counter[0]}.db"))
+        for lo in range(0, len(rows), 12):   # lotes de 1 minuto, como en adquisicion
+            h.write_batch(rows[lo:lo + 12])
+        h.close()
+    return run, len(rows)
+
+
+@benchmark("ingest_segmentos", "muestras/s")
+def ingest_segmentos(ctx):
+    from modules.industrial.historian import SIGNALS
+    from modules.industrial.segments import SegmentWriter
+
+    n = DAY // 5
+    ts_ms = (ctx.ts[:n] * 1000).astype(np.int64)
+    columns = {s: ctx.values[s][:n] for s in SIGNALS}
+    counter = [0]
+
+    def run():
+        counter[0] += 1
+        writer = SegmentWriter(ctx.path(f"seg_{counter[0]}"))
+        writer.write_rows(ts_ms, columns)
+        writer.close()
+    return run, n
+
+
+@benchmark("ingest_adquisicion", "ciclos/s", repeat=3)
+def ingest_adquisicion(ctx):
+    """Extremo a extremo: PLC simulado -> Modbus TCP -> AcquisitionService -> historian."""
+    from modules.industrial.acquisition import AcquisitionService
+    from modules.industrial.data_store import DataStore
+    from modules.industrial.historian import Historian
+    from modules.industrial.modbus_tcp import AsyncModbusClient
+    from modules.industrial.simulator import PlantSimulator, SimulatedPLC
+
+    cycles = 300
+
+    def run():
+        with SimulatedPLC(PlantSimulator(seed=ctx.seed), speedup=10000) as plc:
+            historian = Historian(ctx.path(f"adq_{time.monotonic_ns()}.db"))
+            service = AcquisitionService(client=AsyncModbusClient(*plc.address),
+                                         store=DataStore(ctx.path("snapshot.json")), poll_interval=0.001)
+            count = [0]
+
+            def on_snapshot(snapshot):
+                historian.write_snapshot(snapshot)
+                count[0] += 1
+                if count[0] >= cycles:
+                    service.stop()
+            service.add_listener(on_snapshot)
+            asyncio.run(service.run())
+            historian.close()
+    return run, cycles
+
+
+# CONSULTAS
+
+def _query(ctx, days):
+    h = ctx.historian
+    t1 = T0 + ctx.days * DAY
+    return (lambda: h.query(["temp_zinc", "pureza_n2", "flujo_n2"], t1 - days * DAY, t1, 1200)), 1
+
+
+@benchmark("query_hora", "consultas/s", repeat=20)
+def query_hora(ctx):
+    h = ctx.historian
+    t1 = T0 + ctx.days * DAY
+    return (lambda: h.query(["temp_zinc", "pureza_n2", "flujo_n2"], t1 - 3600, t1, 1200)), 1
+
+
+@benchmark("query_dia", "consultas/s", repeat=20)
+def query_dia(ctx):
+    return _query(ctx, 1)
+
+
+@benchmark("query_semana", "consultas/s", repeat=20)
+def query_semana(ctx):
+    return _query(ctx, 7)
+
+
+@benchmark("query_mes", "consultas/s", repeat=20)
+def query_mes(ctx):
+    return _query(ctx, min(30, ctx.days))
+
+
+@benchmark("query_segmentos_mes", "muestras/s")
+def query_segmentos_mes(ctx):
+    from modules.industrial.segments import read_range
+
+    root = ctx.segments
+    days = min(30, ctx.days)
+    return (lambda: read_range(T0, T0 + days * DAY, root=root)), days * DAY // 5
+
+
+# AGREGADOS
+
+@benchmark("agg_alarmas_mes", "muestras/s")
+def agg_alarmas_mes(ctx):
+    from modules.industrial.alarms import AlarmEngine
+
+    n = min(30, ctx.days) * DAY // 5
+    ts, values = ctx.ts[:n], {k: v[:n] for k, v in ctx.values.items()}
+    return (lambda: AlarmEngine().evaluate(ts, values)), n
+
+
+@benchmark("agg_rollups_semana", "muestras/s", repeat=3)
+def agg_rollups_semana(ctx):
+    """Recalculo de rollup_1m/rollup_1h de una semana desde raw_samples."""
+    h = ctx.historian
+    days = min(7, ctx.days)
+
+    def run():
+        with h._lock, h.conn:
+            h._refresh_rollups(T0, T0 + days * DAY)
+    return run, days * DAY // 5
+
+
+@benchmark("agg_roi", "consultas/s", repeat=20)
+def agg_roi(ctx):
+    """ROI sobre 3 anos de consumo diario: camino con resumenes y SUM() completo."""
+    from daily_update import DailyTracker
+
+    tracker = DailyTracker(ctx.path("roi.db"))
+    start = date(2023, 1, 1)
+    rng = np.random.default_rng(ctx.seed)
+    tracker.bulk_add_consumption(
+        ((start + timedelta(days=i)).strftime("%Y-%m-%d"), float(rng.uniform(5, 30)), float(rng.uniform(1e4, 4e4)),
+         float(rng.uniform(200, 2000)), float(rng.uniform(60, 200)), float(rng.uniform(0, 24)), None, None)
+        for i in range(3 * 365)
+    )
+    tracker.register_psa_installation("2024-01-01", 580000, 2.28, 0.778189)
+
+    def run():
+        tracker._roi_cache = None
+        tracker.get_roi_metrics()
+        tracker.get_monthly_totals()
+    return run, 1
+
+
+# RENDER
+
+def _quiet_streamlit():
+    """AppTest corre en modo bare y avisa de ScriptRunContext en cada render."""
+    from streamlit.logger import set_log_level
+
+    set_log_level("error")
+
+
+@benchmark("render_app", "renders/s", repeat=3)
+def render_app(ctx):
+    """Render completo de app.py con streamlit.testing (sin navegador)."""
+    from streamlit.testing.v1 import AppTest
+
+    _quiet_streamlit()
+
+    def run():
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return run, 1
+
+
+@benchmark("render_historia", "renders/s", repeat=5)
+def render_historia(ctx):
+    """Pagina minima de historico: consulta de un dia + grafico plotly."""
+    from streamlit.testing.v1 import AppTest
+
+    _quiet_streamlit()
+    db = ctx.historian.path
+    t1 = T0 + ctx.days * DAY
+    script = f"""
+import plotly.graph_objects as go
+import streamlit as st
+from modules.industrial.historian import Historian
+
+h = Historian({db!r})
+result = h.query(["temp_zinc", "pureza_n2"], {t1 - DAY}, {t1}, 1200)
+fig = go.Figure()
+for name, serie in result["data"].items():
+    fig.add_trace(go.Scatter(x=serie["ts"], y=serie["mean"], name=name))
+st.plotly_chart(fig)
+st.metric("Muestras", sum(result["data"]["temp_zinc"]["count"]))
+"""
+
+    def run():
+        at = AppTest.from_string(script, default_timeout=60)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return run, 1
+
+
+# EJECUCION
+
+def run_benchmark(ctx, name):
+    fn, unit, repeat = BENCHMARKS[name]
+    call, units = fn(ctx)
+    call()   # calentamiento (y preparacion perezosa de fixtures)
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - t)
+    times.sort()
+    median = statistics.median(times)
+    return {
+        "median_ms": median * 1000,
+        "p95_ms": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))] * 1000,
+        "rate": units / median,
+        "unit": unit,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=35, help="dias simulados en el historico")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="nombres o prefijos (ingest, query, agg, render)")
+    parser.add_argument("--save", help="guardar resultados JSON")
+    parser.add_argument("--compare", help="JSON de linea base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="regresion tolerada (fraccion)")
+    args = parser.parse_args()
+
+    names = [n for n in BENCHMARKS if not args.only or any(n.startswith(p) for p in args.only)]
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    t = time.perf_counter()
+    ctx = Context(args.days, args.seed)
+    print(f"Simulador: {args.days} dias, semilla {args.seed} ({time.perf_counter() - t:.1f} s)")
+    print(f"{'benchmark':<22} {'mediana ms':>11} {'p95 ms':>9} {'tasa':>14} {'unidad':<12} {'vs base':>8}")
+    results = {}
+    regressions = []
+    try:
+        for name in names:
+            try:
+                r = run_benchmark(ctx, name)
+            except Exception as exc:  # un benchmark roto no tapa el resto
+                print(f"{name:<22} {'ERROR':>11}  {type(exc).__name__}: {exc}")
+                results[name] = {"error": f"{type(exc).__name__}: {exc}"}
+                continue
+            results[name] = r
+            delta = ""
+            base = baseline.get(name, {})
+            if "median_ms" in base:
+                change = r["median_ms"] / base["median_ms"] - 1.0
+                delta = f"{change:+.0%}"
+                if change > args.tolerance:
+                    regressions.append((name, change))
+            print(f"{name:<22} {r['median_ms']:>11.2f} {r['p95_ms']:>9.2f} {r['rate']:>14,.1f} {r['unit']:<12} {delta:>8}")
+    finally:
+        ctx.close()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"days": args.days, "seed": args.seed, "python": sys.version.split()[0],
+                       "results": results}, f, indent=2)
+        print(f"Resultados guardados en {args.save}")
+    if regressions:
+        for name, change in regressions:
+            print(f"REGRESION {name}: {change:+.0%} (tolerancia {args.tolerance:.0%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
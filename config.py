@@ -3,9 +3,19 @@ PLC_IP = "192.168.1.10"  # Cambiar por IP real del PLC Druids
 PLC_PORT = 502
 SLAVE_ID = 1
 
+# LINEAS / PLCs (registro en modules/industrial/lines.py)
+# id -> endpoint; "direcciones" reemplaza ADDR_* por campo ({"velocidad_real": 40101})
+# y "omitir" lista los campos que ese PLC no tiene (p. ej. una unidad PSA).
+# La primera linea usa las rutas de siempre; las demas particionan snapshot,
+# historico y segmentos por id.
+LINEAS = {
+    "kinnox": {"ip": PLC_IP, "port": PLC_PORT, "slave_id": SLAVE_ID},
+}
+
 # INTERVALOS DE ACTUALIZACION
 POLL_INTERVAL_S = 5
 RECONNECT_WAIT_S = 15
+RECONNECT_MAX_WAIT_S = 120  # backoff exponencial por linea hasta este tope
 CLOUD_EXPORT_INTERVAL = 60
 
 # UMBRALES DE PROCESO
@@ -48,6 +58,17 @@ JET_WIPE_FLUJO_NOMINAL = 20.0   # Nm³/h N2 puro para jet wipe
 # Total N2 consumido
 N2_TOTAL_NOMINAL = FORMING_GAS_N2_FLUJO + JET_WIPE_FLUJO_NOMINAL  # 96 Nm³/h
 
+# ALARMAS (reglas compiladas en modules/industrial/alarms.py)
+ALARMA_DEBOUNCE_S = 10.0    # s - condicion sostenida antes de activar la alarma
+
+# ALERTA TEMPRANA DE DERIVA (detectores en modules/industrial/drift.py)
+DERIVA_EWMA_ALPHA = 0.001   # peso por muestra de la linea base (~1000 muestras = 80 min a 5 s)
+DERIVA_VAR_ALPHA = 0.0001   # peso por muestra de la varianza de los desvios (~14 h: una deriva no la infla)
+DERIVA_TASA_ALPHA = 0.05    # peso por muestra de la tasa de cambio suavizada
+DERIVA_CUSUM_K = 2.0        # sigmas - holgura por muestra del CUSUM (absorbe el vagabundeo normal)
+DERIVA_CUSUM_H = 50.0       # sigmas - CUSUM acumulado para alertar (se borra bajo la mitad)
+DERIVA_WARMUP = 720         # muestras - aprendizaje de la linea base antes de alertar (1 h)
+
 # CONTROL DE VALVULA
 APERTURA_LINEA_DETENIDA = 0.0   # %
 APERTURA_ARRANQUE = 20.0        # %
@@ -57,6 +78,8 @@ APERTURA_MAXIMA = 95.0          # %
 APERTURA_FAILSAFE = 0.0         # %
 
 MAX_CAMBIO_PCT_POR_CICLO = 10.0 # % - rampa anti-golpe
+CONTROL_CYCLE_S = 5.0           # s - ciclo de control (la rampa se aplica por ciclo)
+ALGORITHM_VERSION = "1.0"       # version vigente (registro en modules/industrial/backtest.py)
 
 # HEARTBEAT
 HEARTBEAT_INTERVALO_S = 10.0
@@ -132,13 +155,43 @@ CLOUD_ENABLED = False
 CLOUD_PLATFORM = "ubidots"
 UBIDOTS_TOKEN = "BBFF-xxxx"
 UBIDOTS_DEVICE = "kinnox-line"
+UBIDOTS_URL = "https://industrial.api.ubidots.com"
 THINGSBOARD_URL = "http://demo.thingsboard.io"
 THINGSBOARD_TOKEN = "ACCESS_TOKEN"
 
+CLOUD_QUEUE_PATH = "data/cola_cloud.db"  # cola store-and-forward (sobrevive cortes del enlace)
+CLOUD_BATCH_SIZE = 500                   # muestras por peticion HTTP
+CLOUD_MAX_CONCURRENCY = 4                # peticiones en paralelo al vaciar backlog
+CLOUD_QUEUE_MAX_ROWS = 120960            # 7 dias a 5 s; lo mas viejo se descarta
+
+# INTEGRADOR DE CAUDALES (consumo_diario automatico, modules/industrial/flow_integrator.py)
+INTEGRADOR_MAX_GAP_S = 60.0     # s - huecos hasta este largo se interpolan (reconexiones); mas largos no se integran
+
 # ARCHIVOS DE SALIDA
-CSV_PATH = "data/datos_kinnox.csv"
+CSV_PATH = "data/datos_kinnox.csv"  # solo export (python -m modules.industrial.segments export-csv)
 SQLITE_PATH = "data/datos_kinnox.db"
 LOG_PATH = "logs/cerebro_sgi.log"
+SNAPSHOT_PATH = "data/snapshot_actual.json"  # publicado por el servicio de adquisicion
+SNAPSHOT_STALE_S = RECONNECT_MAX_WAIT_S + 2 * POLL_INTERVAL_S  # s - sin publicar: servicio detenido
+STATUS_SHM_NAME = "sgi_estado"      # bloque de estado en memoria compartida (status_block.py)
+EVENTS_DB_PATH = "data/eventos.db"
+EVENTS_FLUSH_INTERVAL_S = 1.0       # demora maxima de escritura del event log
+EVENTS_TAIL_SIZE = 200              # eventos recientes en memoria (get_recent_events sin I/O)
+SEGMENTS_DIR = "data/segmentos"     # historico columnar (Arrow IPC), ver modules/industrial/segments.py
+SEGMENT_ROTATE_S = 3600             # un segmento por hora
+
+# METRICAS DE TIEMPOS (modules/industrial/metrics.py)
+METRICS_ENABLED = True
+METRICS_DIR = "data/metricas"       # un JSON por proceso (adquisicion, dashboard)
+METRICS_WINDOW = 1024               # ultimas N mediciones por operacion para percentiles
+METRICS_PORT = 9108                 # endpoint Prometheus (texto) del servicio de adquisicion; None = apagado
+METRICS_HOST = "127.0.0.1"          # interfaz del endpoint; "0.0.0.0" para un Prometheus remoto
+
+# API DE HISTORICO (modules/industrial/history_api.py)
+HISTORY_API_PORT = 9109             # consultas de solo lectura sobre SQLITE_PATH (JSON / Arrow IPC)
+HISTORY_API_POOL = 4                # conexiones de solo lectura (consultas simultaneas)
+HISTORY_CACHE_SIZE = 256            # respuestas en cache (LRU)
+HISTORY_CACHE_TTL_S = 10.0          # vida maxima de una respuesta; datos nuevos la invalidan antes
 
 # STREAMLIT ESPECIFICO
 MAX_HISTORY_POINTS = 500
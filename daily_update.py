@@ -1,15 +1,16 @@
+import os
 import sqlite3
+import threading
 from datetime import datetime, date
 
+from modules.industrial import daily_rollups
+from modules.industrial.metrics import timed
+
 # Configuracion
 DB_PATH = "data/consumo_n2_diario.db"
 
-def init_database():
-    """Crea la base de datos si no existe."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+SCHEMA = (
+    """
         CREATE TABLE IF NOT EXISTS psa_installation (
             id INTEGER PRIMARY KEY,
             installation_date TEXT NOT NULL,
@@ -17,9 +18,8 @@ def init_database():
             costo_lin REAL NOT NULL,
             costo_psa REAL NOT NULL
         )
-    """)
-    
-    cursor.execute("""
+    """,
+    """
         CREATE TABLE IF NOT EXISTS consumo_diario (
             fecha TEXT PRIMARY KEY,
             produccion_tm REAL NOT NULL,
@@ -30,9 +30,8 @@ def init_database():
             tipo_producto TEXT,
             observaciones TEXT
         )
-    """)
-    
-    cursor.execute("""
+    """,
+    """
         CREATE TABLE IF NOT EXISTS zinc_diario (
             fecha TEXT PRIMARY KEY,
             zinc_consumido_kg REAL NOT NULL,
@@ -41,110 +40,355 @@ def init_database():
             temp_zinc_promedio REAL,
             observaciones TEXT
         )
-    """)
-    
-    conn.commit()
-    conn.close()
-    print("✅ Base de datos inicializada")
+    """,
+)
 
-def register_psa_installation(installation_date=None, capex=580000, costo_lin=2.28, costo_psa=0.778189):
-    """Registra la fecha de instalacion de la PSA."""
-    if installation_date is None:
-        installation_date = datetime.now().strftime('%Y-%m-%d')
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Verificar si ya existe
-    cursor.execute("SELECT COUNT(*) FROM psa_installation")
-    if cursor.fetchone()[0] > 0:
-        print("⚠️ PSA ya registrada. Actualizando datos...")
-        cursor.execute("""
-            UPDATE psa_installation 
-            SET installation_date=?, capex=?, costo_lin=?, costo_psa=?
-            WHERE id=1
-        """, (installation_date, capex, costo_lin, costo_psa))
-    else:
-        cursor.execute("""
-            INSERT INTO psa_installation (id, installation_date, capex, costo_lin, costo_psa)
-            VALUES (1, ?, ?, ?, ?)
-        """, (installation_date, capex, costo_lin, costo_psa))
-    
-    conn.commit()
-    conn.close()
-    print(f"✅ PSA registrada con fecha: {installation_date}")
+# Resumenes mantenidos por triggers: el ROI sale de una fila, sin SUM() sobre
+# todo consumo_diario. INSERT OR REPLACE no dispara el trigger DELETE (sin
+# recursive_triggers), por eso el BEFORE INSERT descuenta la fila reemplazada
+# (y el BEFORE UPDATE, la que pisa un UPDATE OR REPLACE de fecha).
+SUMMARY_SCHEMA = (
+    """
+        CREATE TABLE IF NOT EXISTS consumo_mensual (
+            mes TEXT PRIMARY KEY,
+            n2_consumido_m3 REAL NOT NULL DEFAULT 0,
+            produccion_tm REAL NOT NULL DEFAULT 0,
+            metros_producidos REAL NOT NULL DEFAULT 0,
+            dias INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS roi_resumen (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            n2_desde_instalacion REAL NOT NULL DEFAULT 0
+        )
+    """,
+    "INSERT OR IGNORE INTO roi_resumen (id, n2_desde_instalacion) VALUES (1, 0)",
+    """
+        CREATE TRIGGER IF NOT EXISTS consumo_diario_bi BEFORE INSERT ON consumo_diario
+        WHEN EXISTS (SELECT 1 FROM consumo_diario WHERE fecha = NEW.fecha)
+        BEGIN
+            UPDATE consumo_mensual SET
+                n2_consumido_m3 = n2_consumido_m3 - (SELECT n2_consumido_m3 FROM consumo_diario WHERE fecha = NEW.fecha),
+                produccion_tm = produccion_tm - (SELECT produccion_tm FROM consumo_diario WHERE fecha = NEW.fecha),
+                metros_producidos = metros_producidos - (SELECT metros_producidos FROM consumo_diario WHERE fecha = NEW.fecha),
+                dias = dias - 1
+            WHERE mes = substr(NEW.fecha, 1, 7);
+            UPDATE roi_resumen SET
+                n2_desde_instalacion = n2_desde_instalacion - (SELECT n2_consumido_m3 FROM consumo_diario WHERE fecha = NEW.fecha)
+            WHERE NEW.fecha >= (SELECT installation_date FROM psa_installation WHERE id = 1);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS consumo_diario_ai AFTER INSERT ON consumo_diario
+        BEGIN
+            INSERT INTO consumo_mensual (mes, n2_consumido_m3, produccion_tm, metros_producidos, dias)
+            VALUES (substr(NEW.fecha, 1, 7), NEW.n2_consumido_m3, NEW.produccion_tm, NEW.metros_producidos, 1)
+            ON CONFLICT (mes) DO UPDATE SET
+                n2_consumido_m3 = n2_consumido_m3 + excluded.n2_consumido_m3,
+                produccion_tm = produccion_tm + excluded.produccion_tm,
+                metros_producidos = metros_producidos + excluded.metros_producidos,
+                dias = dias + 1;
+            UPDATE roi_resumen SET n2_desde_instalacion = n2_desde_instalacion + NEW.n2_consumido_m3
+            WHERE NEW.fecha >= (SELECT installation_date FROM psa_installation WHERE id = 1);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS consumo_diario_ad AFTER DELETE ON consumo_diario
+        BEGIN
+            UPDATE consumo_mensual SET
+                n2_consumido_m3 = n2_consumido_m3 - OLD.n2_consumido_m3,
+                produccion_tm = produccion_tm - OLD.produccion_tm,
+                metros_producidos = metros_producidos - OLD.metros_producidos,
+                dias = dias - 1
+            WHERE mes = substr(OLD.fecha, 1, 7);
+            UPDATE roi_resumen SET n2_desde_instalacion = n2_desde_instalacion - OLD.n2_consumido_m3
+            WHERE OLD.fecha >= (SELECT installation_date FROM psa_installation WHERE id = 1);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS consumo_diario_au AFTER UPDATE ON consumo_diario
+        BEGIN
+            UPDATE consumo_mensual SET
+                n2_consumido_m3 = n2_consumido_m3 - OLD.n2_consumido_m3,
+                produccion_tm = produccion_tm - OLD.produccion_tm,
+                metros_producidos = metros_producidos - OLD.metros_producidos,
+                dias = dias - 1
+            WHERE mes = substr(OLD.fecha, 1, 7);
+            INSERT INTO consumo_mensual (mes, n2_consumido_m3, produccion_tm, metros_producidos, dias)
+            VALUES (substr(NEW.fecha, 1, 7), NEW.n2_consumido_m3, NEW.produccion_tm, NEW.metros_producidos, 1)
+            ON CONFLICT (mes) DO UPDATE SET
+                n2_consumido_m3 = n2_consumido_m3 + excluded.n2_consumido_m3,
+                produccion_tm = produccion_tm + excluded.produccion_tm,
+                metros_producidos = metros_producidos + excluded.metros_producidos,
+                dias = dias + 1;
+            UPDATE roi_resumen SET n2_desde_instalacion = n2_desde_instalacion - OLD.n2_consumido_m3
+            WHERE OLD.fecha >= (SELECT installation_date FROM psa_installation WHERE id = 1);
+            UPDATE roi_resumen SET n2_desde_instalacion = n2_desde_instalacion + NEW.n2_consumido_m3
+            WHERE NEW.fecha >= (SELECT installation_date FROM psa_installation WHERE id = 1);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS consumo_diario_bu BEFORE UPDATE OF fecha ON consumo_diario
+        WHEN NEW.fecha != OLD.fecha AND EXISTS (SELECT 1 FROM consumo_diario WHERE fecha = NEW.fecha)
+        BEGIN
+            UPDATE consumo_mensual SET
+                n2_consumido_m3 = n2_consumido_m3 - (SELECT n2_consumido_m3 FROM consumo_diario WHERE fecha = NEW.fecha),
+                produccion_tm = produccion_tm - (SELECT produccion_tm FROM consumo_diario WHERE fecha = NEW.fecha),
+                metros_producidos = metros_producidos - (SELECT metros_producidos FROM consumo_diario WHERE fecha = NEW.fecha),
+                dias = dias - 1
+            WHERE mes = substr(NEW.fecha, 1, 7);
+            UPDATE roi_resumen SET
+                n2_desde_instalacion = n2_desde_instalacion - (SELECT n2_consumido_m3 FROM consumo_diario WHERE fecha = NEW.fecha)
+            WHERE NEW.fecha >= (SELECT installation_date FROM psa_installation WHERE id = 1);
+        END
+    """,
+    # Cambio de fecha de instalacion: recalculo completo (evento raro)
+    """
+        CREATE TRIGGER IF NOT EXISTS psa_installation_ai AFTER INSERT ON psa_installation
+        BEGIN
+            UPDATE roi_resumen SET n2_desde_instalacion =
+                (SELECT COALESCE(SUM(n2_consumido_m3), 0) FROM consumo_diario WHERE fecha >= NEW.installation_date);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS psa_installation_au AFTER UPDATE OF installation_date ON psa_installation
+        BEGIN
+            UPDATE roi_resumen SET n2_desde_instalacion =
+                (SELECT COALESCE(SUM(n2_consumido_m3), 0) FROM consumo_diario WHERE fecha >= NEW.installation_date);
+        END
+    """,
+)
 
-def add_daily_consumption(
-    fecha,
-    produccion_tm,
-    metros_producidos,
-    n2_consumido_m3,
-    velocidad_promedio=None,
-    horas_operacion=None,
-    tipo_producto=None,
-    observaciones=None
-):
-    """Registra el consumo diario de N2."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT OR REPLACE INTO consumo_diario 
-        (fecha, produccion_tm, metros_producidos, n2_consumido_m3, velocidad_promedio, 
-         horas_operacion, tipo_producto, observaciones)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (fecha, produccion_tm, metros_producidos, n2_consumido_m3, velocidad_promedio,
-          horas_operacion, tipo_producto, observaciones))
-    
-    conn.commit()
-    conn.close()
-    print(f"✅ Consumo registrado para {fecha}: {n2_consumido_m3:.2f} m³")
+CONSUMO_COLUMNS = (
+    'fecha', 'produccion_tm', 'metros_producidos', 'n2_consumido_m3',
+    'velocidad_promedio', 'horas_operacion', 'tipo_producto', 'observaciones'
+)
+ZINC_COLUMNS = (
+    'fecha', 'zinc_consumido_kg', 'dross_generado_kg', 'ratio_kg_tm',
+    'temp_zinc_promedio', 'observaciones'
+)
 
-def add_daily_zinc(
-    fecha,
-    zinc_consumido_kg,
-    dross_generado_kg=None,
-    ratio_kg_tm=None,
-    temp_zinc_promedio=None,
-    observaciones=None
-):
-    """Registra el consumo diario de zinc."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT OR REPLACE INTO zinc_diario
-        (fecha, zinc_consumido_kg, dross_generado_kg, ratio_kg_tm, temp_zinc_promedio, observaciones)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (fecha, zinc_consumido_kg, dross_generado_kg, ratio_kg_tm, temp_zinc_promedio, observaciones))
-    
-    conn.commit()
-    conn.close()
-    print(f"✅ Zinc registrado para {fecha}: {zinc_consumido_kg:.2f} kg")
+def _normalize_fecha(value):
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return value
 
-def get_roi_metrics():
-    """Calcula ROI y Payback basados en datos reales."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Verificar instalacion PSA
-    cursor.execute("SELECT installation_date, capex, costo_lin, costo_psa FROM psa_installation WHERE id=1")
-    psa_data = cursor.fetchone()
-    
-    if not psa_data:
-        print("❌ PSA no registrada. Ejecutar register_psa_installation() primero.")
-        conn.close()
+def _normalize_value(value):
+    # NaN (celdas vacias en DataFrame) -> NULL
+    if isinstance(value, float) and value != value:
         return None
-    
+    return value
+
+def _read_xlsx(path, sheet=None):
+    """Lee una hoja de Excel (fila 1 = encabezados) como lista de dicts."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else None for h in next(rows, ())]
+        return [dict(zip(header, row)) for row in rows if any(v is not None for v in row)]
+    finally:
+        wb.close()
+
+def _rows_from(source, columns, sheet=None):
+    """
+    Normaliza la fuente de un import masivo a tuplas en el orden de `columns`.
+
+    Acepta: ruta .xlsx, DataFrame, o iterable de dicts / tuplas.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        source = _read_xlsx(source, sheet)
+    elif hasattr(source, 'columns') and hasattr(source, 'to_dict'):
+        source = source.to_dict('records')
+
+    for record in source:
+        if isinstance(record, dict):
+            values = [record.get(col) for col in columns]
+        else:
+            values = list(record) + [None] * (len(columns) - len(record))
+        values[0] = _normalize_fecha(values[0])
+        yield tuple(_normalize_value(v) for v in values[:len(columns)])
+
+class DailyTracker:
+    """
+    Tracking diario con una sola conexion persistente (modo WAL).
+
+    Para cargas masivas (backfill desde Excel) usar bulk_add_consumption /
+    bulk_add_zinc: todo el lote se escribe en una transaccion.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Cache de get_roi_metrics: se invalida con escrituras propias
+        # (total_changes), de otras conexiones (PRAGMA data_version) o cambio de dia.
+        self._roi_cache = None
+        self.init_database()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def init_database(self):
+        with self.conn:
+            for ddl in SCHEMA:
+                self.conn.execute(ddl)
+            needs_rebuild = self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE name='roi_resumen'"
+            ).fetchone() is None
+            for ddl in SUMMARY_SCHEMA:
+                self.conn.execute(ddl)
+            if daily_rollups.create_schema(self.conn) and not needs_rebuild:
+                daily_rollups.rebuild(self.conn)
+        if needs_rebuild:
+            self.rebuild_summaries()
+
+    def rebuild_summaries(self):
+        """Recalcula consumo_mensual, roi_resumen y los agregados de zinc/produccion (migracion/auditoria)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM consumo_mensual")
+            self.conn.execute("""
+                INSERT INTO consumo_mensual (mes, n2_consumido_m3, produccion_tm, metros_producidos, dias)
+                SELECT substr(fecha, 1, 7), SUM(n2_consumido_m3), SUM(produccion_tm), SUM(metros_producidos), COUNT(*)
+                FROM consumo_diario GROUP BY substr(fecha, 1, 7)
+            """)
+            self.conn.execute("""
+                UPDATE roi_resumen SET n2_desde_instalacion = COALESCE((
+                    SELECT SUM(n2_consumido_m3) FROM consumo_diario
+                    WHERE fecha >= (SELECT installation_date FROM psa_installation WHERE id = 1)
+                ), 0)
+            """)
+            daily_rollups.rebuild(self.conn)
+
+    def register_psa_installation(self, installation_date, capex, costo_lin, costo_psa):
+        """Registra (o actualiza) la instalacion PSA. Devuelve True si ya existia."""
+        with self.conn:
+            cursor = self.conn.execute("SELECT COUNT(*) FROM psa_installation")
+            existed = cursor.fetchone()[0] > 0
+            if existed:
+                self.conn.execute("""
+                    UPDATE psa_installation 
+                    SET installation_date=?, capex=?, costo_lin=?, costo_psa=?
+                    WHERE id=1
+                """, (installation_date, capex, costo_lin, costo_psa))
+            else:
+                self.conn.execute("""
+                    INSERT INTO psa_installation (id, installation_date, capex, costo_lin, costo_psa)
+                    VALUES (1, ?, ?, ?, ?)
+                """, (installation_date, capex, costo_lin, costo_psa))
+        return existed
+
+    def add_daily_consumption(self, fecha, produccion_tm, metros_producidos, n2_consumido_m3,
+                              velocidad_promedio=None, horas_operacion=None,
+                              tipo_producto=None, observaciones=None):
+        self.bulk_add_consumption([(fecha, produccion_tm, metros_producidos, n2_consumido_m3,
+                                    velocidad_promedio, horas_operacion, tipo_producto, observaciones)])
+
+    def add_daily_zinc(self, fecha, zinc_consumido_kg, dross_generado_kg=None, ratio_kg_tm=None,
+                       temp_zinc_promedio=None, observaciones=None):
+        self.bulk_add_zinc([(fecha, zinc_consumido_kg, dross_generado_kg, ratio_kg_tm,
+                             temp_zinc_promedio, observaciones)])
+
+    def bulk_add_consumption(self, source, sheet=None):
+        """Importa consumos diarios (iterable, DataFrame o .xlsx) en una transaccion."""
+        rows = list(_rows_from(source, CONSUMO_COLUMNS, sheet))
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO consumo_diario 
+                (fecha, produccion_tm, metros_producidos, n2_consumido_m3, velocidad_promedio, 
+                 horas_operacion, tipo_producto, observaciones)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            daily_rollups.refresh(self.conn, [row[0] for row in rows])
+        return len(rows)
+
+    def bulk_add_zinc(self, source, sheet=None):
+        """Importa consumos de zinc (iterable, DataFrame o .xlsx) en una transaccion."""
+        rows = list(_rows_from(source, ZINC_COLUMNS, sheet))
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO zinc_diario
+                (fecha, zinc_consumido_kg, dross_generado_kg, ratio_kg_tm, temp_zinc_promedio, observaciones)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            daily_rollups.refresh(self.conn, [row[0] for row in rows])
+        return len(rows)
+
+    def _cache_key(self):
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return (data_version, self.conn.total_changes, date.today())
+
+    @timed("roi_metrics")
+    def get_roi_metrics(self):
+        """Calcula ROI y Payback basados en datos reales. None si la PSA no esta registrada."""
+        key = self._cache_key()
+        if self._roi_cache is not None and self._roi_cache[0] == key:
+            return dict(self._roi_cache[1])
+        
+        psa_data = self.conn.execute(
+            "SELECT installation_date, capex, costo_lin, costo_psa FROM psa_installation WHERE id=1"
+        ).fetchone()
+        if not psa_data:
+            return None
+        
+        # Consumo total desde la instalacion (mantenido por triggers)
+        n2_total = self.conn.execute("SELECT n2_desde_instalacion FROM roi_resumen WHERE id=1").fetchone()[0]
+        
+        metrics = _roi_from_totals(psa_data, n2_total)
+        self._roi_cache = (key, metrics)
+        return dict(metrics)
+
+    def get_roi_metrics_full_scan(self):
+        """Referencia: mismo calculo con SUM() sobre consumo_diario (auditoria de los resumenes)."""
+        cursor = self.conn.cursor()
+        
+        # Verificar instalacion PSA
+        cursor.execute("SELECT installation_date, capex, costo_lin, costo_psa FROM psa_installation WHERE id=1")
+        psa_data = cursor.fetchone()
+        
+        if not psa_data:
+            return None
+        
+        # Consumo total
+        cursor.execute("SELECT SUM(n2_consumido_m3) FROM consumo_diario WHERE fecha >= ?", (psa_data[0],))
+        n2_total = cursor.fetchone()[0] or 0
+        
+        return _roi_from_totals(psa_data, n2_total)
+
+    @timed("monthly_totals")
+    def get_monthly_totals(self):
+        """Totales por mes (mes, n2_consumido_m3, produccion_tm, metros_producidos, dias, ahorro_usd)."""
+        row = self.conn.execute("SELECT costo_lin - costo_psa FROM psa_installation WHERE id=1").fetchone()
+        ahorro_por_m3 = row[0] if row else 0
+        return [
+            {
+                'mes': mes, 'n2_consumido_m3': n2, 'produccion_tm': tm,
+                'metros_producidos': metros, 'dias': dias, 'ahorro_usd': n2 * ahorro_por_m3,
+            }
+            for mes, n2, tm, metros, dias in self.conn.execute("""
+                SELECT mes, n2_consumido_m3, produccion_tm, metros_producidos, dias
+                FROM consumo_mensual WHERE dias > 0 ORDER BY mes
+            """)
+        ]
+
+def _roi_from_totals(psa_data, n2_total):
+    """Formulas de ROI/Payback a partir de la fila PSA y el N2 acumulado."""
     installation_date = datetime.strptime(psa_data[0], '%Y-%m-%d')
     capex = psa_data[1]
     costo_lin = psa_data[2]
     costo_psa = psa_data[3]
     
-    # Consumo total
-    cursor.execute("SELECT SUM(n2_consumido_m3) FROM consumo_diario WHERE fecha >= ?", (psa_data[0],))
-    n2_total = cursor.fetchone()[0] or 0
-    
     # Dias de operacion
     dias_operacion = (datetime.now() - installation_date).days
     if dias_operacion == 0:
@@ -169,8 +413,6 @@ def get_roi_metrics():
     
     porcentaje_recuperado = (ahorro_acumulado / capex) * 100
     
-    conn.close()
-    
     return {
         'fecha_instalacion': installation_date.strftime('%Y-%m-%d'),
         'dias_operacion': dias_operacion,
@@ -186,6 +428,73 @@ def get_roi_metrics():
         'porcentaje_recuperado': porcentaje_recuperado
     }
 
+def init_database():
+    """Crea la base de datos si no existe."""
+    DailyTracker().close()
+    print("✅ Base de datos inicializada")
+
+def register_psa_installation(installation_date=None, capex=580000, costo_lin=2.28, costo_psa=0.778189):
+    """Registra la fecha de instalacion de la PSA."""
+    if installation_date is None:
+        installation_date = datetime.now().strftime('%Y-%m-%d')
+    
+    with DailyTracker() as tracker:
+        if tracker.register_psa_installation(installation_date, capex, costo_lin, costo_psa):
+            print("⚠️ PSA ya registrada. Datos actualizados.")
+    print(f"✅ PSA registrada con fecha: {installation_date}")
+
+def add_daily_consumption(
+    fecha,
+    produccion_tm,
+    metros_producidos,
+    n2_consumido_m3,
+    velocidad_promedio=None,
+    horas_operacion=None,
+    tipo_producto=None,
+    observaciones=None
+):
+    """Registra el consumo diario de N2."""
+    with DailyTracker() as tracker:
+        tracker.add_daily_consumption(fecha, produccion_tm, metros_producidos, n2_consumido_m3,
+                                      velocidad_promedio, horas_operacion, tipo_producto, observaciones)
+    print(f"✅ Consumo registrado para {fecha}: {n2_consumido_m3:.2f} m³")
+
+def add_daily_zinc(
+    fecha,
+    zinc_consumido_kg,
+    dross_generado_kg=None,
+    ratio_kg_tm=None,
+    temp_zinc_promedio=None,
+    observaciones=None
+):
+    """Registra el consumo diario de zinc."""
+    with DailyTracker() as tracker:
+        tracker.add_daily_zinc(fecha, zinc_consumido_kg, dross_generado_kg, ratio_kg_tm,
+                               temp_zinc_promedio, observaciones)
+    print(f"✅ Zinc registrado para {fecha}: {zinc_consumido_kg:.2f} kg")
+
+_shared = threading.local()
+
+def _shared_tracker():
+    """
+    Tracker por hilo que se conserva entre llamadas (sqlite3 no comparte la
+    conexion entre hilos): asi el cache de get_roi_metrics sobrevive. Se
+    reabre si cambia DB_PATH.
+    """
+    tracker = getattr(_shared, "tracker", None)
+    if tracker is None or tracker.db_path != DB_PATH:
+        if tracker is not None:
+            tracker.close()
+        tracker = _shared.tracker = DailyTracker(DB_PATH)
+    return tracker
+
+def get_roi_metrics():
+    """Calcula ROI y Payback basados en datos reales (cacheado mientras no cambien los datos)."""
+    metrics = _shared_tracker().get_roi_metrics()
+    if metrics is None:
+        print("❌ PSA no registrada. Ejecutar register_psa_installation() primero.")
+    return metrics
+
 def print_summary():
     """Imprime resumen de metricas actuales."""
     metrics = get_roi_metrics()
@@ -253,4 +562,5 @@ if __name__ == "__main__":
     print("  - add_daily_consumption()      -> Registrar consumo diario")
     print("  - add_daily_zinc()             -> Registrar zinc diario")
     print("  - get_roi_metrics()            -> Obtener metricas")
+    print("  - DailyTracker().bulk_add_consumption('planilla.xlsx') -> Importar historico")
     print("  - print_summary()              -> Ver resumen")
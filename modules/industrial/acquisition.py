@@ -0,0 +1,320 @@
+"""
+Servicio de adquisicion asyncio, independiente de Streamlit.
+
+Corre como proceso propio (python -m modules.industrial.acquisition) y es
+el unico que habla con el PLC. Publica cada snapshot en el DataStore, que
+el dashboard solo lee: la carga sobre el PLC no depende del numero de
+sesiones abiertas.
+
+Con varias lineas (LINEAS en config.py) corre un AcquisitionService por
+linea en el mismo loop: una conexion por PLC, calendario y backoff de
+reconexion propios, asi que un PLC caido no demora a los demas; un error
+inesperado reinicia solo esa linea (AcquisitionService.supervise). Cada
+linea escribe en sus propias particiones (modules/industrial/lines.py).
+
+Historico, segmentos y cola cloud reciben el registro crudo empaquetado de
+cada lectura (add_record_listener, modules/industrial/packed.py), no el
+snapshot escalado; alarmas, alertas de deriva e integrador de caudal siguen
+con el snapshot.
+
+El watchdog corre aca (watchdog_loop), no en el dashboard: cada segundo
+compara la ultima lectura con HEARTBEAT_TIMEOUT_S y publica el flag de
+failsafe en el bloque de memoria compartida, aunque la UI este trabada.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import time
+
+import config as cfg
+import daily_update
+from daily_update import DailyTracker
+from modules.industrial.alarms import AlarmEngine, alarm_listener
+from modules.industrial.cloud_exporter import CloudExporter
+from modules.industrial.data_store import DataStore
+from modules.industrial.drift import DriftEngine, compile_rules, drift_listener
+from modules.industrial.event_logger import EventLogger
+from modules.industrial.flow_integrator import SIGNALS as FLOW_SIGNALS
+from modules.industrial.flow_integrator import FlowIntegrator
+from modules.industrial.historian import Historian
+from modules.industrial.lines import load_lines
+from modules.industrial.metrics import get_registry, serve, set_process_name, timer
+from modules.industrial.modbus_tcp import AsyncModbusClient, ModbusError
+from modules.industrial.poller import BlockPoller
+from modules.industrial.segments import SegmentWriter
+from modules.industrial.status_block import StatusBlock, publish_acquisition
+
+log = logging.getLogger(__name__)
+
+
+class AcquisitionService:
+    """Lectura periodica del PLC con calendario sin deriva y reconexion."""
+
+    def __init__(
+        self,
+        client=None,
+        store=None,
+        poller=None,
+        exporter=None,
+        poll_interval=cfg.POLL_INTERVAL_S,
+        reconnect_wait=cfg.RECONNECT_WAIT_S,
+        export_interval=cfg.CLOUD_EXPORT_INTERVAL,
+        status_block=None,
+        heartbeat_timeout=cfg.HEARTBEAT_TIMEOUT_S,
+        reconnect_max_wait=cfg.RECONNECT_MAX_WAIT_S,
+        name=None,
+    ):
+        self.client = client or AsyncModbusClient(cfg.PLC_IP, cfg.PLC_PORT, cfg.SLAVE_ID)
+        self.store = store or DataStore()
+        self.poller = poller or BlockPoller()
+        self.exporter = exporter
+        self.poll_interval = poll_interval
+        self.reconnect_wait = reconnect_wait
+        self.reconnect_max_wait = reconnect_max_wait
+        self.name = name or "plc"
+        self.export_interval = export_interval
+        self.status_block = status_block
+        self.heartbeat_timeout = heartbeat_timeout
+        self.listeners = []
+        self.record_listeners = []
+
+        self.latest = None
+        self.cycles = 0
+        self.errors = 0
+        self.overruns = 0
+        self.reconnects = 0
+        self.last_error = None
+        self.consecutive_errors = 0
+        self.failsafe = False
+        self._started = time.time()
+        self._stop = asyncio.Event()
+
+    def add_listener(self, callback):
+        """Registra callback(snapshot) invocado tras cada lectura correcta."""
+        self.listeners.append(callback)
+
+    def add_record_listener(self, callback):
+        """Registra callback(record) con el registro crudo RECORD de cada lectura correcta."""
+        self.record_listeners.append(callback)
+
+    def status(self):
+        return {
+            "connected": self.client.connected,
+            "cycles": self.cycles,
+            "errors": self.errors,
+            "overruns": self.overruns,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "last_read": self.latest.timestamp if self.latest else None,
+            "failsafe": self.failsafe,
+            "line": self.name,
+        }
+
+    def publish_status(self):
+        if self.status_block is not None:
+            publish_acquisition(self.status_block, self, self.failsafe)
+
+    def stop(self):
+        self._stop.set()
+
+    async def _sleep_until(self, deadline):
+        """Duerme hasta `deadline` (reloj del loop); True si se pidio parar."""
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(self._stop.wait(), max(0.0, deadline - loop.time()))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def poll_once(self):
+        registers, coils = await self.poller.read_async(self.client)
+        timestamp = time.time()
+        with timer("decode"):
+            snapshot = self.poller.decode(registers, coils, timestamp)
+            record = self.poller.pack(registers, coils, timestamp)
+        self.latest = snapshot
+        self.cycles += 1
+        self.consecutive_errors = 0
+        for callbacks, item in ((self.listeners, snapshot), (self.record_listeners, record)):
+            for callback in callbacks:
+                try:
+                    callback(item)
+                except Exception:
+                    log.exception("Error en listener de adquisicion")
+        self.check_failsafe()
+        self.store.publish(snapshot.as_dict(), self.status())
+        self.publish_status()
+        get_registry().publish_if_due()
+        return snapshot
+
+    async def poll_loop(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while not self._stop.is_set():
+            try:
+                await self.poll_once()
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ModbusError) as exc:
+                self.errors += 1
+                self.reconnects += 1
+                self.consecutive_errors += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                wait = min(self.reconnect_wait * 2 ** (self.consecutive_errors - 1), self.reconnect_max_wait)
+                log.warning("Fallo de lectura PLC %s (%s); reintento en %ss", self.name, self.last_error, wait)
+                await self.client.close()
+                # Sin snapshot: el ultimo valido ya no es actual (status conserva last_read)
+                self.store.publish(None, self.status())
+                self.publish_status()
+                if await self._sleep_until(loop.time() + wait):
+                    return
+                next_tick = loop.time()
+                continue
+
+            # Calendario absoluto: k * intervalo desde el inicio, sin acumular deriva.
+            next_tick += self.poll_interval
+            now = loop.time()
+            if next_tick <= now:
+                missed = int((now - next_tick) // self.poll_interval) + 1
+                self.overruns += missed
+                next_tick += missed * self.poll_interval
+            if await self._sleep_until(next_tick):
+                return
+
+    async def export_loop(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.export_interval
+        while not await self._sleep_until(next_tick):
+            next_tick += self.export_interval
+            try:
+                await self.exporter.export()
+            except Exception:
+                log.exception("Error en exportacion a la nube")
+
+    def check_failsafe(self, now=None):
+        """Actualiza self.failsafe segun la antiguedad de la ultima lectura; True si cambio."""
+        now = time.time() if now is None else now
+        last_read = self.latest.timestamp if self.latest else self._started
+        failsafe = now - last_read > self.heartbeat_timeout
+        changed = failsafe != self.failsafe
+        self.failsafe = failsafe
+        if changed and failsafe:
+            log.error("FAILSAFE %s: sin lectura del PLC hace %.0fs (> %.0fs)",
+                      self.name, now - last_read, self.heartbeat_timeout)
+        elif changed:
+            log.info("Failsafe %s liberado: lecturas del PLC restablecidas", self.name)
+        return changed
+
+    async def watchdog_loop(self, interval=1.0):
+        """Evalua el failsafe y refresca el bloque compartido aunque el PLC no responda."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while not await self._sleep_until(next_tick):
+            next_tick += interval
+            self.check_failsafe()
+            self.publish_status()
+
+    async def run(self):
+        tasks = [asyncio.create_task(self.poll_loop()), asyncio.create_task(self.watchdog_loop())]
+        if self.exporter is not None:
+            tasks.append(asyncio.create_task(self.export_loop()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.client.close()
+
+    async def supervise(self):
+        """
+        run() con reinicio: un error inesperado (no de comunicacion) se
+        registra y la linea vuelve a arrancar con backoff, sin tocar las demas.
+        """
+        loop = asyncio.get_running_loop()
+        failures = 0
+        while not self._stop.is_set():
+            cycles = self.cycles
+            try:
+                await self.run()
+                return
+            except Exception as exc:
+                # Con lecturas correctas desde el ultimo reinicio el backoff empieza de nuevo
+                failures = 1 if self.cycles > cycles else failures + 1
+                self.errors += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                wait = min(self.reconnect_wait * 2 ** (failures - 1), self.reconnect_max_wait)
+                log.exception("Error inesperado en la linea %s; reinicio en %ss", self.name, wait)
+                self.store.publish(None, self.status())
+                self.publish_status()
+                if await self._sleep_until(loop.time() + wait):
+                    return
+
+
+def build_line_service(line, events, exporter=None):
+    """AcquisitionService de una linea con sus listeners; devuelve (servicio, cierres)."""
+    status_block = StatusBlock.create(line.shm_name)
+    service = AcquisitionService(
+        client=line.client(),
+        store=DataStore(line.path(cfg.SNAPSHOT_PATH)),
+        poller=line.poller(),
+        exporter=exporter,
+        status_block=status_block,
+        name=line.id,
+    )
+    if exporter is not None:
+        service.add_record_listener(exporter.enqueue_record)
+    historian = Historian(line.path(cfg.SQLITE_PATH))
+    segments = SegmentWriter(line.path(cfg.SEGMENTS_DIR))
+    service.add_record_listener(historian.write_record)
+    service.add_record_listener(segments.write_record)
+    closers = [historian.close, segments.close]
+    if line.has(*FLOW_SIGNALS):
+        integrator = FlowIntegrator(DailyTracker(line.path(daily_update.DB_PATH)))
+        service.add_listener(integrator.add)
+        closers.append(integrator.close)
+    source = None if line.principal else line.id
+    service.add_listener(alarm_listener(AlarmEngine(), events, source=source))
+    drift_rules = [rule for rule in compile_rules() if line.has(rule.signal)]
+    if drift_rules:
+        service.add_listener(drift_listener(DriftEngine(drift_rules), events, source=source))
+    closers.append(status_block.close)
+    return service, closers
+
+
+async def main(line_ids=None):
+    set_process_name("adquisicion")
+    metrics_server = serve(cfg.METRICS_PORT) if cfg.METRICS_PORT else None
+    lines = [line for line in load_lines() if not line_ids or line.id in line_ids]
+    exporter = CloudExporter() if cfg.CLOUD_ENABLED else None
+    events = EventLogger()
+    services, closers = [], []
+    for line in lines:
+        # La exportacion a la nube sigue siendo de la linea principal
+        service, line_closers = build_line_service(line, events, exporter if line.principal else None)
+        services.append(service)
+        closers.extend(line_closers)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: [service.stop() for service in services])
+        except NotImplementedError:
+            pass
+    for line in lines:
+        log.info("Adquisicion %s: PLC %s:%s cada %ss", line.id, line.ip, line.port, cfg.POLL_INTERVAL_S)
+    try:
+        await asyncio.gather(*(service.supervise() for service in services))
+    finally:
+        for close in closers:
+            close()
+        events.close()
+        if exporter is not None:
+            exporter.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Servicio de adquisicion")
+    parser.add_argument("--lineas", nargs="*", help="ids de LINEAS a leer (por defecto todas)")
+    args = parser.parse_args()
+    asyncio.run(main(args.lineas))
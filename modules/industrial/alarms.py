@@ -0,0 +1,204 @@
+"""
+Motor de alarmas de proceso: tabla de reglas compilada desde los limites de config.py.
+
+Todas las reglas se evaluan a la vez como comparaciones NumPy sobre una
+matriz (reglas x muestras), con histeresis y tiempo minimo por regla:
+
+    activa   cuando el valor cruza el limite (> max o < min)
+    se borra cuando vuelve mas alla del limite +/- banda muerta
+    alarma   solo si la condicion se sostiene min_duration_s
+
+El mismo motor sirve para el snapshot en vivo (update) y para recalcular
+la linea de tiempo de alarmas sobre meses de historico (evaluate_history)
+cuando se cambian los limites. El estado se arrastra entre lotes, asi que
+evaluar por trozos da lo mismo que evaluar todo junto.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+import config as cfg
+
+
+@dataclass(frozen=True)
+class AlarmRule:
+    name: str
+    signal: str
+    op: str                 # ">" alarma por alto, "<" alarma por bajo
+    limit: float
+    deadband: float         # histeresis, en unidades de la senal
+    min_duration_s: float
+    severity: str
+    description: str
+
+
+def compile_rules(config=cfg):
+    """Tabla de reglas a partir de las constantes de limites de config.py."""
+    debounce = config.ALARMA_DEBOUNCE_S
+    return (
+        AlarmRule("temp_zinc_baja", "temp_zinc", "<", config.TEMP_ZINC_MIN, 2.0, debounce,
+                  "WARNING", "Temperatura de zinc bajo el minimo"),
+        AlarmRule("temp_zinc_alta", "temp_zinc", ">", config.TEMP_ZINC_MAX, 2.0, debounce,
+                  "WARNING", "Temperatura de zinc sobre el maximo"),
+        AlarmRule("pureza_n2_baja", "pureza_n2", "<", config.PUREZA_MIN_OPERATIVA, 0.2, debounce,
+                  "WARNING", "Pureza N2 bajo el minimo operativo"),
+        AlarmRule("pureza_n2_critica", "pureza_n2", "<", config.PUREZA_CRITICA, 0.2, 0.0,
+                  "CRITICAL", "Pureza N2 critica"),
+        AlarmRule("presion_n2_baja", "presion_n2", "<", config.PRESION_MIN_SEGURA, 0.05, debounce,
+                  "WARNING", "Presion N2 bajo el minimo seguro"),
+        AlarmRule("presion_n2_alta", "presion_n2", ">", config.PRESION_MAX_SEGURA, 0.1, debounce,
+                  "CRITICAL", "Presion N2 sobre el maximo seguro"),
+        AlarmRule("fg_h2_bajo", "fg_percent_h2", "<", config.FORMING_GAS_H2_MIN, 0.1, debounce,
+                  "WARNING", "H2 en forming gas bajo el minimo"),
+        AlarmRule("fg_h2_alto", "fg_percent_h2", ">", config.FORMING_GAS_H2_MAX, 0.1, 0.0,
+                  "CRITICAL", "H2 en forming gas sobre el maximo"),
+        AlarmRule("fg_presion_baja", "fg_presion", "<", config.FORMING_GAS_PRESION_MIN, 0.02, debounce,
+                  "WARNING", "Presion forming gas bajo el minimo"),
+        AlarmRule("fg_presion_alta", "fg_presion", ">", config.FORMING_GAS_PRESION_MAX, 0.05, debounce,
+                  "WARNING", "Presion forming gas sobre el maximo"),
+        AlarmRule("fg_temp_alta", "fg_temp_mezclador", ">", config.FORMING_GAS_TEMP_MAX, 1.0, debounce,
+                  "WARNING", "Temperatura del mezclador sobre el maximo"),
+        AlarmRule("velocidad_alta", "velocidad_real", ">", config.VEL_MAX, 2.0, debounce,
+                  "WARNING", "Velocidad de linea sobre el maximo"),
+    )
+
+
+class AlarmEngine:
+    """Evaluacion vectorizada de todas las reglas con estado arrastrado entre lotes."""
+
+    def __init__(self, rules=None):
+        self.rules = tuple(rules if rules is not None else compile_rules())
+        for rule in self.rules:
+            if rule.op not in ("<", ">"):
+                raise ValueError(f"Operador no soportado en {rule.name}: {rule.op}")
+        self.signals = tuple(dict.fromkeys(rule.signal for rule in self.rules))
+        self._rows = np.array([self.signals.index(rule.signal) for rule in self.rules])
+        # "<" se evalua como ">" sobre el valor negado
+        self._sign = np.array([1.0 if rule.op == ">" else -1.0 for rule in self.rules])[:, None]
+        self._limit = self._sign * np.array([rule.limit for rule in self.rules])[:, None]
+        self._clear = self._limit - np.array([rule.deadband for rule in self.rules])[:, None]
+        self._min_duration = np.array([rule.min_duration_s for rule in self.rules])[:, None]
+        self.reset()
+
+    def reset(self):
+        n = len(self.rules)
+        self._hyst = np.zeros(n, dtype=bool)     # condicion con histeresis
+        self._since = np.full(n, np.nan)         # inicio de la condicion actual
+        self.active = np.zeros(n, dtype=bool)    # alarma (tras debounce)
+
+    def evaluate(self, ts, columns):
+        """
+        Evalua un lote ordenado en el tiempo.
+
+        ts: epoch s (n,); columns: {senal: array (n,)}. NaN mantiene el estado.
+        Devuelve la matriz booleana de alarmas activas (reglas x n).
+        """
+        ts = np.asarray(ts, dtype=np.float64)
+        n = len(ts)
+        if n == 0:
+            return np.zeros((len(self.rules), 0), dtype=bool)
+        values = np.stack([np.asarray(columns[name], dtype=np.float64) for name in self.signals])
+        x = self._sign * values[self._rows]
+        trip = x > self._limit
+        clear = x <= self._clear
+
+        # Histeresis: el estado es el del ultimo evento (trip o clear) hasta cada muestra
+        idx = np.arange(n)
+        last = np.maximum.accumulate(np.where(trip | clear, idx, -1), axis=1)
+        hyst = np.where(last >= 0, np.take_along_axis(trip, np.maximum(last, 0), axis=1), self._hyst[:, None])
+
+        # Debounce: tiempo transcurrido desde que empezo la condicion actual
+        prev = np.concatenate([self._hyst[:, None], hyst[:, :-1]], axis=1)
+        start = np.maximum.accumulate(np.where(hyst & ~prev, idx, -1), axis=1)
+        since = np.where(start >= 0, ts[np.maximum(start, 0)], self._since[:, None])
+        with np.errstate(invalid="ignore"):
+            active = hyst & (ts - since >= self._min_duration)
+
+        self._hyst = hyst[:, -1].copy()
+        self._since = np.where(self._hyst, since[:, -1], np.nan)
+        self.active = active[:, -1].copy()
+        return active
+
+    def update(self, snapshot):
+        """Evalua un snapshot en vivo; devuelve [(regla, activa)] de las alarmas que cambiaron."""
+        if hasattr(snapshot, "as_dict"):
+            snapshot = snapshot.as_dict()
+        previous = self.active
+        self.evaluate([snapshot["timestamp"]], {name: [_num(snapshot.get(name))] for name in self.signals})
+        return [(self.rules[i], bool(self.active[i])) for i in np.flatnonzero(previous != self.active)]
+
+    def episodes(self, ts, active, previous=None, open_since=None):
+        """
+        Convierte la matriz de alarmas en episodios {rule, severity, start, end}.
+
+        previous / open_since (dict regla -> inicio) permiten unir lotes
+        consecutivos; los episodios abiertos al final quedan en open_since.
+        """
+        return episodes(self.rules, ts, active, previous, open_since)
+
+
+def episodes(rules, ts, active, previous=None, open_since=None):
+    """Episodios {rule, severity, start, end} de una matriz (reglas x n); ver AlarmEngine.episodes."""
+    if previous is None:
+        previous = np.zeros(len(rules), dtype=bool)
+    if open_since is None:
+        open_since = {}
+    ts = np.asarray(ts, dtype=np.float64)
+    edges = np.diff(active.astype(np.int8), axis=1, prepend=previous.astype(np.int8)[:, None])
+    result = []
+    for i, rule in enumerate(rules):
+        starts = ts[edges[i] == 1].tolist()
+        ends = ts[edges[i] == -1].tolist()
+        if rule.name in open_since:
+            starts.insert(0, open_since.pop(rule.name))
+        for start, end in zip(starts, ends):
+            result.append({"rule": rule.name, "severity": rule.severity, "start": start, "end": end})
+        if len(starts) > len(ends):
+            open_since[rule.name] = starts[-1]
+    return result
+
+
+def evaluate_history(t0, t1, rules=None, root=cfg.SEGMENTS_DIR, chunk_s=7 * 86400):
+    """
+    Recalcula la linea de tiempo de alarmas entre t0 y t1 (epoch s) desde los segmentos.
+
+    Lee por trozos de chunk_s solo las senales que usan las reglas. Devuelve
+    la lista de episodios ordenada por inicio; los que siguen activos en t1
+    tienen end=None.
+    """
+    from modules.industrial.segments import read_range
+
+    engine = AlarmEngine(rules)
+    result = []
+    open_since = {}
+    t = t0
+    while t < t1:
+        t_next = min(t + chunk_s, t1)
+        ts_ms, columns = read_range(t, t_next, signals=engine.signals, root=root)
+        if len(ts_ms):
+            previous = engine.active
+            active = engine.evaluate(ts_ms / 1000.0, columns)
+            result.extend(engine.episodes(ts_ms / 1000.0, active, previous, open_since))
+        t = t_next
+    for rule in engine.rules:
+        if rule.name in open_since:
+            result.append({"rule": rule.name, "severity": rule.severity, "start": open_since[rule.name], "end": None})
+    result.sort(key=lambda e: e["start"])
+    return result
+
+
+def alarm_listener(engine, event_logger, source=None):
+    """Callback de adquisicion: registra en el event log cada alarma que se activa o se borra."""
+    prefix = f"[{source}] " if source else ""
+
+    def on_snapshot(snapshot):
+        for rule, active in engine.update(snapshot):
+            if active:
+                event_logger.log_event("ALARM", rule.severity, prefix + rule.description)
+            else:
+                event_logger.log_event("ALARM", "INFO", f"{prefix}{rule.description}: normalizada")
+    return on_snapshot
+
+
+def _num(value):
+    return np.nan if value is None else float(value)
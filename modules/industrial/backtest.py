@@ -0,0 +1,243 @@
+"""
+Replay / backtest del algoritmo de control N2/H2 sobre el historico de segmentos.
+
+Reproduce velocidad, pureza, marcha y % H2 a traves de una version
+registrada del algoritmo (ALGORITHMS, la vigente es ALGORITHM_VERSION) y
+estima por dia:
+
+    aperturas recomendadas N2/H2 (%) en cada ciclo de control
+    consumo N2/H2 (m³) con esas aperturas vs el medido (flujo_n2, fg_flujo_h2)
+    costo USD: N2 a COSTO_PSA_USD_M3 (y su equivalente LIN a COSTO_LIN_USD_M3),
+    H2 a COSTO_H2_USD_M3; impacto = costo medido - costo recomendado
+
+El historico se muestrea en la grilla de CONTROL_CYCLE_S (ultimo valor
+conocido; sin datos por mas de HEARTBEAT_TIMEOUT_S se toma failsafe y no
+se integra consumo). El objetivo de cada version, el consumo y los costos
+son vectoriales; la rampa es secuencial, pero se resuelve por tramos de
+objetivo constante en forma cerrada y da lo mismo que ValveController.decide.
+
+Los dias se reparten entre procesos. Cada dia se reproduce desde WARMUP_S
+antes de su inicio, para que la rampa llegue en el mismo estado que en un
+replay continuo.
+
+    python -m modules.industrial.backtest --desde 2025-01-01 --hasta 2025-02-01 --versiones 1.0 1.1
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import config as cfg
+from modules.industrial.valve_control import ramp
+
+DAY = 86400
+WARMUP_S = 3600
+
+REPLAY_SIGNALS = ("velocidad_real", "pureza_n2", "linea_en_marcha", "fg_percent_h2", "flujo_n2", "fg_flujo_h2")
+
+# Caracteristica lineal de las valvulas: caudal nominal a APERTURA_NOMINAL
+N2_M3H_POR_PCT = cfg.FLUJO_N2_NOMINAL / cfg.APERTURA_NOMINAL
+H2_M3H_POR_PCT = cfg.FORMING_GAS_H2_FLUJO / cfg.APERTURA_NOMINAL
+
+ALGORITHMS = {}
+
+
+def algorithm(version):
+    """Registra fn(columns) -> (apertura objetivo N2 %, corte de H2 bool, failsafe bool) por ciclo."""
+    def register(fn):
+        ALGORITHMS[version] = fn
+        return fn
+    return register
+
+
+def _detenida(columns):
+    return (columns["linea_en_marcha"] < 0.5) | (columns["velocidad_real"] < cfg.VEL_MIN_PRODUCCION)
+
+
+def _corte_h2(columns):
+    return columns["fg_percent_h2"] > cfg.FORMING_GAS_H2_MAX
+
+
+def _failsafe(columns):
+    return columns["pureza_n2"] < cfg.PUREZA_CRITICA
+
+
+@algorithm("1.0")
+def objetivo_v1_0(columns):
+    """Logica de valve_control.target_apertura: escalones por estado de la linea."""
+    pureza = columns["pureza_n2"]
+    vel = columns["velocidad_real"]
+    failsafe = _failsafe(columns)
+    target = np.select(
+        [failsafe, _detenida(columns),
+         (vel < cfg.VEL_MIN_N2_REDUCIDO) | (pureza < cfg.PUREZA_MIN_OPERATIVA)],
+        [cfg.APERTURA_FAILSAFE, cfg.APERTURA_LINEA_DETENIDA, cfg.APERTURA_VELOCIDAD_BAJA],
+        default=min(cfg.APERTURA_NOMINAL, cfg.APERTURA_MAXIMA),
+    )
+    return target, _corte_h2(columns), failsafe
+
+
+@algorithm("1.1")
+def objetivo_v1_1(columns):
+    """Propuesta: entre VEL_MIN_N2_REDUCIDO y VEL_MAX la apertura sigue a la velocidad (pasos de 5%)."""
+    target, corte, failsafe = objetivo_v1_0(columns)
+    vel = columns["velocidad_real"]
+    frac = np.clip((vel - cfg.VEL_MIN_N2_REDUCIDO) / (cfg.VEL_MAX - cfg.VEL_MIN_N2_REDUCIDO), 0.0, 1.0)
+    prop = cfg.APERTURA_VELOCIDAD_BAJA + frac * (cfg.APERTURA_NOMINAL - cfg.APERTURA_VELOCIDAD_BAJA)
+    prop = np.round(prop / 5.0) * 5.0
+    nominal = target == min(cfg.APERTURA_NOMINAL, cfg.APERTURA_MAXIMA)
+    return np.where(nominal, prop, target), corte, failsafe
+
+
+# REPLAY
+
+def ramp_openings(target, corte_h2, failsafe, apertura=cfg.APERTURA_LINEA_DETENIDA,
+                  apertura_h2=cfg.APERTURA_LINEA_DETENIDA, step=cfg.MAX_CAMBIO_PCT_POR_CICLO):
+    """
+    Aperturas N2/H2 ciclo a ciclo (mismas reglas que ValveController.decide).
+
+    En un tramo de objetivo constante la N2 es monotona hacia el objetivo
+    (primer paso con ramp(), inmediato si failsafe, luego +-step por ciclo) y la H2 es
+    min(N2, h2_inicial + step * k). Devuelve (n2, h2, (apertura, apertura_h2) final).
+    """
+    n = len(target)
+    n2 = np.empty(n)
+    h2 = np.empty(n)
+    change = np.flatnonzero((target[1:] != target[:-1]) | (corte_h2[1:] != corte_h2[:-1])
+                            | (failsafe[1:] != failsafe[:-1])) + 1
+    bounds = np.concatenate(([0], change, [n]))
+    k_all = np.arange(n) * step
+    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        t = float(target[lo])
+        first = ramp(apertura, t, bool(failsafe[lo]))
+        k = k_all[:hi - lo]
+        if first < t:
+            seg = np.minimum(first + k, t)
+        else:
+            seg = np.maximum(first - k, t)
+        n2[lo:hi] = seg
+        if corte_h2[lo]:
+            h2[lo:hi] = 0.0
+        else:
+            h0 = first if first < apertura_h2 else ramp(apertura_h2, first)
+            np.minimum(seg, h0 + k, out=h2[lo:hi])
+        apertura, apertura_h2 = float(n2[hi - 1]), float(h2[hi - 1])
+    return n2, h2, (apertura, apertura_h2)
+
+
+def on_grid(ts, columns, t0, t1, dt=cfg.CONTROL_CYCLE_S, max_age=cfg.HEARTBEAT_TIMEOUT_S):
+    """Muestrea el historico en t0, t0+dt, ... < t1 (ultimo valor); valid=False sin datos recientes."""
+    grid = np.arange(t0, t1, dt, dtype=np.float64)
+    idx = np.searchsorted(ts, grid, side="right") - 1
+    valid = idx >= 0
+    valid[valid] &= grid[valid] - ts[idx[valid]] <= max_age
+    idx = np.maximum(idx, 0)
+    sampled = {name: col[idx].astype(np.float64) if len(col) else np.full(len(grid), np.nan)
+               for name, col in columns.items()}
+    return grid, sampled, valid
+
+
+def replay(ts, columns, t0, t1, version=cfg.ALGORITHM_VERSION, state=None, dt=cfg.CONTROL_CYCLE_S):
+    """
+    Replay de [t0, t1) sobre muestras (ts epoch s, {senal: array}).
+
+    Devuelve dict de arrays por ciclo (ts, valid, n2, h2, objetivo, corte_h2,
+    flujo_n2, flujo_h2) y "estado" final para encadenar tramos.
+    """
+    grid, sampled, valid = on_grid(ts, columns, t0, t1, dt)
+    target, corte, failsafe = ALGORITHMS[version](sampled)
+    target = np.where(valid, target, cfg.APERTURA_FAILSAFE)
+    corte = np.where(valid, corte, False)
+    failsafe = np.where(valid, failsafe, True)
+    n2, h2, final = ramp_openings(target, corte, failsafe, *(state or ()))
+    return {
+        "ts": grid, "valid": valid, "n2": n2, "h2": h2, "objetivo": target, "corte_h2": corte,
+        "flujo_n2": sampled["flujo_n2"], "flujo_h2": sampled["fg_flujo_h2"], "estado": final,
+    }
+
+
+def summarize(result, dt=cfg.CONTROL_CYCLE_S):
+    """Consumos (m³) y costos (USD) de un replay."""
+    valid = result["valid"]
+    hours = dt / 3600.0
+    n2 = float(np.sum(result["n2"][valid])) * N2_M3H_POR_PCT * hours
+    h2 = float(np.sum(result["h2"][valid])) * H2_M3H_POR_PCT * hours
+    n2_real = float(np.nansum(result["flujo_n2"][valid])) * hours
+    h2_real = float(np.nansum(result["flujo_h2"][valid])) * hours
+    costo = n2 * cfg.COSTO_PSA_USD_M3 + h2 * cfg.COSTO_H2_USD_M3
+    costo_real = n2_real * cfg.COSTO_PSA_USD_M3 + h2_real * cfg.COSTO_H2_USD_M3
+    return {
+        "ciclos": int(valid.sum()),
+        "apertura_n2_media": float(result["n2"][valid].mean()) if valid.any() else 0.0,
+        "n2_m3": n2,
+        "h2_m3": h2,
+        "n2_real_m3": n2_real,
+        "h2_real_m3": h2_real,
+        "costo_usd": costo,
+        "costo_lin_usd": n2 * cfg.COSTO_LIN_USD_M3 + h2 * cfg.COSTO_H2_USD_M3,
+        "costo_real_usd": costo_real,
+        "impacto_usd": costo_real - costo,
+    }
+
+
+def replay_day(version, day_start, root=cfg.SEGMENTS_DIR, warmup_s=WARMUP_S):
+    """Resumen de un dia; lee sus segmentos (mas el calentamiento) en el proceso que lo calcula."""
+    from modules.industrial.segments import read_range
+
+    t0 = day_start - warmup_s
+    ts_ms, columns = read_range(t0, day_start + DAY, signals=REPLAY_SIGNALS, root=root)
+    result = replay(ts_ms / 1000.0, columns, t0, day_start + DAY, version)
+    skip = int(round(warmup_s / cfg.CONTROL_CYCLE_S))
+    day = {key: value[skip:] for key, value in result.items() if key != "estado"}
+    return {"version": version, "dia": day_start, **summarize(day)}
+
+
+def backtest(versions, t0, t1, root=cfg.SEGMENTS_DIR, workers=None, warmup_s=WARMUP_S):
+    """{version: [resumen por dia]} para los dias en [t0, t1); workers=1 corre en este proceso."""
+    jobs = [(version, day, root, warmup_s) for version in versions for day in np.arange(t0, t1, DAY).tolist()]
+    if workers == 1:
+        rows = [replay_day(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            rows = list(pool.map(replay_day, *zip(*jobs)))
+    result = {version: [] for version in versions}
+    for row in rows:
+        result[row["version"]].append(row)
+    return result
+
+
+def totals(days):
+    """Suma de los resumenes diarios."""
+    keys = [k for k in days[0] if k not in ("version", "dia", "apertura_n2_media")] if days else []
+    return {key: sum(d[key] for d in days) for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest del algoritmo de control N2/H2 sobre el historico")
+    parser.add_argument("--desde", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--hasta", required=True, help="YYYY-MM-DD (excluido)")
+    parser.add_argument("--versiones", nargs="+", default=[cfg.ALGORITHM_VERSION], choices=sorted(ALGORITHMS))
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--root", default=cfg.SEGMENTS_DIR)
+    args = parser.parse_args()
+
+    t0 = datetime.fromisoformat(args.desde).timestamp()
+    t1 = datetime.fromisoformat(args.hasta).timestamp()
+    start = time.perf_counter()
+    result = backtest(args.versiones, t0, t1, args.root, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{'version':<8} {'N2 m3':>10} {'H2 m3':>9} {'N2 real':>10} {'H2 real':>9} "
+          f"{'costo USD':>11} {'real USD':>11} {'impacto USD':>12}")
+    for version, days in result.items():
+        t = totals(days)
+        print(f"{version:<8} {t['n2_m3']:>10.0f} {t['h2_m3']:>9.0f} {t['n2_real_m3']:>10.0f} {t['h2_real_m3']:>9.0f} "
+              f"{t['costo_usd']:>11.2f} {t['costo_real_usd']:>11.2f} {t['impacto_usd']:>12.2f}")
+    print(f"✅ {len(result) * len(np.arange(t0, t1, DAY))} dias-version en {elapsed:.1f} s "
+          f"({(t1 - t0) * len(result) / elapsed:,.0f}x tiempo real)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Exportacion a la nube (Ubidots / ThingsBoard) con store-and-forward.
+
+Cada snapshot se encola en una cola SQLite local (CLOUD_QUEUE_PATH); el
+envio corre aparte cada CLOUD_EXPORT_INTERVAL en lotes comprimidos con
+muchos timestamps por peticion, sobre conexiones HTTP keep-alive. Si el
+enlace cae, la cola crece en disco y se vacia al volver, con hasta
+CLOUD_MAX_CONCURRENCY peticiones en paralelo. Encolar nunca hace red:
+la adquisicion no se bloquea por la nube. Con enqueue_record la cola guarda
+el registro crudo de 53 bytes en lugar del JSON; se escala y serializa
+por lote recien al enviar.
+"""
+import asyncio
+import gzip
+import http.client
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import config as cfg
+from modules.industrial.historian import SIGNALS
+from modules.industrial.metrics import timed
+from modules.industrial.packed import PackedSamples, record_ts
+
+log = logging.getLogger(__name__)
+
+# Resultado de _send_batch: los dos primeros se borran de la cola, solo SENT cuenta como enviado
+SENT, REJECTED, FAILED = "sent", "rejected", "failed"
+
+
+class CloudRejected(Exception):
+    """El servidor rechazo el lote (4xx distinto de 401/403/408/429): no se reintenta."""
+
+
+def build_request(platform, rows, signals=SIGNALS):
+    """
+    Arma (path, body) para un lote de filas [(ts_ms, {senal: valor}), ...].
+
+    Ubidots: un POST por dispositivo con todas las variables y sus valores
+    con timestamp. ThingsBoard: lista de {"ts", "values"}.
+    """
+    if platform == "ubidots":
+        payload = {name: [] for name in signals}
+        for ts_ms, values in rows:
+            for name in signals:
+                v = values.get(name)
+                if v is not None:
+                    payload[name].append({"value": v, "timestamp": ts_ms})
+        payload = {k: v for k, v in payload.items() if v}
+        return f"/api/v1.6/devices/{cfg.UBIDOTS_DEVICE}/", payload
+    if platform == "thingsboard":
+        payload = [{"ts": ts_ms, "values": {k: v for k, v in values.items() if k in signals}}
+                   for ts_ms, values in rows]
+        return f"/api/v1/{cfg.THINGSBOARD_TOKEN}/telemetry", payload
+    raise ValueError(f"Plataforma cloud desconocida: {platform}")
+
+
+class CloudExporter:
+    """Cola persistente + envio por lotes con conexiones keep-alive."""
+
+    def __init__(
+        self,
+        platform=cfg.CLOUD_PLATFORM,
+        base_url=None,
+        queue_path=cfg.CLOUD_QUEUE_PATH,
+        batch_size=cfg.CLOUD_BATCH_SIZE,
+        max_concurrency=cfg.CLOUD_MAX_CONCURRENCY,
+        max_queue_rows=cfg.CLOUD_QUEUE_MAX_ROWS,
+        timeout=10.0,
+        compress=True,
+    ):
+        self.platform = platform
+        if base_url is None:
+            base_url = cfg.UBIDOTS_URL if platform == "ubidots" else cfg.THINGSBOARD_URL
+        url = urlsplit(base_url)
+        self.scheme, self.host, self.port = url.scheme, url.hostname, url.port
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_queue_rows = max_queue_rows
+        self.timeout = timeout
+        self.compress = compress
+
+        if queue_path != ":memory:":
+            os.makedirs(os.path.dirname(queue_path) or ".", exist_ok=True)
+        self._db_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._stats_lock = threading.Lock()   # contadores: _send_batch corre en los hilos del pool
+        self.conn = sqlite3.connect(queue_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS cola (id INTEGER PRIMARY KEY, ts INTEGER NOT NULL, valores TEXT NOT NULL)")
+            if "crudo" not in {row[1] for row in self.conn.execute("PRAGMA table_info(cola)")}:
+                self.conn.execute("ALTER TABLE cola ADD COLUMN crudo BLOB")
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="cloud")
+
+        self.sent_samples = 0
+        self.failed_requests = 0
+        self.dropped_samples = 0
+        self.last_error = None
+
+    # COLA
+
+    def enqueue(self, snapshot):
+        """Encola un snapshot (dict o PlantSnapshot). Solo escribe en disco local."""
+        if hasattr(snapshot, "as_dict"):
+            snapshot = snapshot.as_dict()
+        values = {k: (float(v) if isinstance(v, (bool, int, float)) else v)
+                  for k, v in snapshot.items() if k != "timestamp"}
+        with self._db_lock, self.conn:
+            self.conn.execute("INSERT INTO cola (ts, valores) VALUES (?, ?)",
+                              (int(snapshot["timestamp"] * 1000), json.dumps(values)))
+
+    def enqueue_record(self, record):
+        """Encola un registro crudo RECORD (BlockPoller.pack). Solo escribe en disco local."""
+        with self._db_lock, self.conn:
+            self.conn.execute("INSERT INTO cola (ts, valores, crudo) VALUES (?, '', ?)", (record_ts(record), record))
+
+    def backlog(self):
+        with self._db_lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cola").fetchone()[0]
+
+    def _trim(self):
+        """Descarta lo mas viejo si la cola supera max_queue_rows (cortes muy largos)."""
+        with self._db_lock, self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM cola WHERE id <= (SELECT MAX(id) FROM cola) - ?", (self.max_queue_rows,)
+            )
+            if cur.rowcount > 0:
+                with self._stats_lock:
+                    self.dropped_samples += cur.rowcount
+                log.warning("Cola cloud llena: %s muestras antiguas descartadas", cur.rowcount)
+
+    def _take(self, limit, after_id):
+        with self._db_lock:
+            return self.conn.execute(
+                "SELECT id, ts, valores, crudo FROM cola WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+            ).fetchall()
+
+    def _ack(self, ids):
+        with self._db_lock, self.conn:
+            self.conn.executemany("DELETE FROM cola WHERE id = ?", [(i,) for i in ids])
+
+    # ENVIO
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = cls(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _reset_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    @staticmethod
+    def _values(rows):
+        """(ts_ms, {senal: valor}) de cada fila de la cola; los registros crudos se escalan juntos."""
+        raw = [r[3] for r in rows if r[3] is not None]
+        decoded = iter(PackedSamples.from_bytes(b"".join(raw)).rows(SIGNALS) if raw else ())
+        return [(ts, next(decoded) if crudo is not None else json.loads(v)) for _, ts, v, crudo in rows]
+
+    @timed("cloud_post")
+    def _post(self, rows):
+        path, payload = build_request(self.platform, self._values(rows))
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        if self.platform == "ubidots":
+            headers["X-Auth-Token"] = cfg.UBIDOTS_TOKEN
+        if self.compress:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        conn = self._connection()
+        try:
+            conn.request("POST", path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self._reset_connection()
+            raise
+        # 401/403 (token vencido o rotado) y 429 no son culpa del lote: queda en cola
+        if response.status >= 500 or response.status in (401, 403, 408, 429):
+            raise ConnectionError(f"HTTP {response.status}")
+        if response.status >= 400:
+            raise CloudRejected(f"HTTP {response.status}")
+        if response.getheader("Connection", "").lower() == "close":
+            self._reset_connection()
+
+    def _send_batch(self, rows):
+        """Envia un lote; SENT, REJECTED (descartado) o FAILED (queda en cola)."""
+        try:
+            self._post(rows)
+            return SENT
+        except CloudRejected as exc:
+            with self._stats_lock:
+                self.last_error = str(exc)
+                self.dropped_samples += len(rows)
+            log.error("Lote cloud rechazado (%s): %s muestras descartadas", exc, len(rows))
+            return REJECTED
+        except (OSError, http.client.HTTPException) as exc:
+            with self._stats_lock:
+                self.failed_requests += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+            return FAILED
+
+    @timed("cloud_export")
+    def drain(self, max_seconds=None):
+        """
+        Vacia la cola. Con backlog usa hasta max_concurrency lotes en paralelo;
+        se detiene al primer lote fallido (se reintenta en el proximo ciclo).
+        """
+        if not self._drain_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._trim()
+            deadline = None if max_seconds is None else time.monotonic() + max_seconds
+            sent = 0
+            last_id = 0
+            while deadline is None or time.monotonic() < deadline:
+                rows = self._take(self.batch_size * self.max_concurrency, last_id)
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+                if len(batches) == 1:
+                    results = [self._send_batch(batches[0])]
+                else:
+                    results = list(self._pool.map(self._send_batch, batches))
+                for batch, result in zip(batches, results):
+                    if result != FAILED:
+                        self._ack([r[0] for r in batch])
+                    if result == SENT:
+                        sent += len(batch)
+                if FAILED in results:
+                    break
+            with self._stats_lock:
+                self.sent_samples += sent
+            return sent
+        finally:
+            self._drain_lock.release()
+
+    async def export(self):
+        """Punto de entrada de AcquisitionService.export_loop (no bloquea el loop)."""
+        return await asyncio.to_thread(self.drain, cfg.CLOUD_EXPORT_INTERVAL)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self._reset_connection()
+        self.conn.close()
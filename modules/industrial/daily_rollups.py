@@ -0,0 +1,304 @@
+"""
+Agregados de zinc y produccion para las paginas Zinc y Resumen Ejecutivo.
+
+Tablas materializadas en la base diaria (consumo_n2_diario.db):
+
+    produccion_periodo  - (nivel, periodo): semana (lunes), mes (YYYY-MM) y
+                          anio (YYYY, el del anio en curso es el acumulado
+                          del anio). Sumas de consumo_diario y zinc_diario.
+    zinc_por_producto   - (anio, tipo_producto): zinc, dross y produccion de
+                          los dias con ambas cargas -> kg/TM por producto.
+    zinc_tendencia      - (fecha): medias moviles de 7 y 30 dias calendario
+                          de kg/TM, % dross, zinc diario y temperatura.
+
+DailyTracker llama a refresh() en la misma transaccion de cada escritura
+(add_daily_*, bulk_add_*, el integrador de caudales): como los rollups del
+historian, se recalculan solo los periodos tocados por el lote (idempotente,
+tolera cargas tardias). Las medias moviles se calculan vectorizadas sobre la
+serie completa desde el primer dia tocado. Sin triggers: estos agregados
+cruzan las dos tablas y ventanas de dias.
+
+Las paginas leen con resumen(), periodos(), tendencia() y por_producto():
+lecturas por clave primaria, sin recorrer las filas diarias.
+
+    python -m modules.industrial.daily_rollups     # reconstruye todo e imprime el resumen
+"""
+import argparse
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+SIN_TIPO = "(sin tipo)"
+VENTANAS = (7, 30)
+
+SCHEMA = (
+    """
+        CREATE TABLE IF NOT EXISTS produccion_periodo (
+            nivel TEXT NOT NULL,
+            periodo TEXT NOT NULL,
+            produccion_tm REAL NOT NULL DEFAULT 0,
+            metros_producidos REAL NOT NULL DEFAULT 0,
+            n2_consumido_m3 REAL NOT NULL DEFAULT 0,
+            dias_produccion INTEGER NOT NULL DEFAULT 0,
+            zinc_consumido_kg REAL NOT NULL DEFAULT 0,
+            dross_generado_kg REAL NOT NULL DEFAULT 0,
+            temp_zinc_suma REAL NOT NULL DEFAULT 0,
+            temp_zinc_dias INTEGER NOT NULL DEFAULT 0,
+            dias_zinc INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (nivel, periodo)
+        ) WITHOUT ROWID
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS zinc_por_producto (
+            anio TEXT NOT NULL,
+            tipo_producto TEXT NOT NULL,
+            produccion_tm REAL NOT NULL,
+            zinc_consumido_kg REAL NOT NULL,
+            dross_generado_kg REAL NOT NULL,
+            dias INTEGER NOT NULL,
+            PRIMARY KEY (anio, tipo_producto)
+        ) WITHOUT ROWID
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS zinc_tendencia (
+            fecha TEXT PRIMARY KEY,
+            kg_tm_7d REAL, kg_tm_30d REAL,
+            dross_pct_7d REAL, dross_pct_30d REAL,
+            zinc_kg_7d REAL, zinc_kg_30d REAL,
+            temp_zinc_7d REAL, temp_zinc_30d REAL
+        ) WITHOUT ROWID
+    """,
+)
+
+# nivel -> (clave del periodo en SQL, clave en Python, inicio del periodo siguiente)
+NIVELES = {
+    "semana": ("date(fecha, 'weekday 0', '-6 days')",
+               lambda d: d - timedelta(days=d.weekday()),
+               lambda d: d - timedelta(days=d.weekday()) + timedelta(days=7)),
+    "mes": ("substr(fecha, 1, 7)",
+            lambda d: d.replace(day=1),
+            lambda d: date(d.year + d.month // 12, d.month % 12 + 1, 1)),
+    "anio": ("substr(fecha, 1, 4)",
+             lambda d: d.replace(month=1, day=1),
+             lambda d: date(d.year + 1, 1, 1)),
+}
+_CLAVE = {"semana": lambda d: d.isoformat(), "mes": lambda d: d.isoformat()[:7], "anio": lambda d: d.isoformat()[:4]}
+
+
+def create_schema(conn):
+    """Crea las tablas; True si no existian (hay que llamar a rebuild)."""
+    existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'zinc_tendencia'").fetchone() is not None
+    for ddl in SCHEMA:
+        conn.execute(ddl)
+    return not existed
+
+
+def _as_date(fecha):
+    return fecha if isinstance(fecha, date) else datetime.strptime(str(fecha)[:10], "%Y-%m-%d").date()
+
+
+# RECALCULO
+
+def refresh(conn, fechas):
+    """Recalcula los periodos que contienen las fechas dadas (llamar dentro de la transaccion de escritura)."""
+    dias = sorted({_as_date(f) for f in fechas if f})
+    if not dias:
+        return
+    for nivel in NIVELES:
+        _refresh_periodos(conn, nivel, dias[0], dias[-1])
+    for anio in sorted({d.year for d in dias}):
+        _refresh_producto(conn, anio)
+    _refresh_tendencia(conn, dias[0])
+
+
+def rebuild(conn):
+    """Recalcula todas las tablas desde consumo_diario y zinc_diario."""
+    primero, ultimo = conn.execute("""
+        SELECT MIN(fecha), MAX(fecha) FROM (SELECT fecha FROM consumo_diario UNION ALL SELECT fecha FROM zinc_diario)
+    """).fetchone()
+    for table in ("produccion_periodo", "zinc_por_producto", "zinc_tendencia"):
+        conn.execute(f"DELETE FROM {table}")
+    if primero is not None:
+        refresh(conn, (primero, ultimo))
+
+
+def _refresh_periodos(conn, nivel, primero, ultimo):
+    expr, inicio, siguiente = NIVELES[nivel]
+    d0, d1 = inicio(primero), siguiente(ultimo)
+    clave = _CLAVE[nivel]
+    conn.execute("DELETE FROM produccion_periodo WHERE nivel = ? AND periodo >= ? AND periodo < ?",
+                 (nivel, clave(d0), clave(d1)))
+    rango = (d0.isoformat(), d1.isoformat())
+    conn.execute(f"""
+        INSERT INTO produccion_periodo
+        (nivel, periodo, produccion_tm, metros_producidos, n2_consumido_m3, dias_produccion,
+         zinc_consumido_kg, dross_generado_kg, temp_zinc_suma, temp_zinc_dias, dias_zinc)
+        SELECT ?, periodo, SUM(tm), SUM(metros), SUM(n2), SUM(dp), SUM(zk), SUM(dk), SUM(ts), SUM(tn), SUM(dz)
+        FROM (
+            SELECT {expr} AS periodo, produccion_tm AS tm, metros_producidos AS metros, n2_consumido_m3 AS n2,
+                   1 AS dp, 0 AS zk, 0 AS dk, 0 AS ts, 0 AS tn, 0 AS dz
+            FROM consumo_diario WHERE fecha >= ? AND fecha < ?
+            UNION ALL
+            SELECT {expr}, 0, 0, 0, 0, zinc_consumido_kg, COALESCE(dross_generado_kg, 0),
+                   COALESCE(temp_zinc_promedio, 0), temp_zinc_promedio IS NOT NULL, 1
+            FROM zinc_diario WHERE fecha >= ? AND fecha < ?
+        ) GROUP BY periodo
+    """, (nivel, *rango, *rango))
+
+
+def _refresh_producto(conn, anio):
+    conn.execute("DELETE FROM zinc_por_producto WHERE anio = ?", (str(anio),))
+    conn.execute("""
+        INSERT INTO zinc_por_producto (anio, tipo_producto, produccion_tm, zinc_consumido_kg, dross_generado_kg, dias)
+        SELECT ?, COALESCE(c.tipo_producto, ?), SUM(c.produccion_tm), SUM(z.zinc_consumido_kg),
+               SUM(COALESCE(z.dross_generado_kg, 0)), COUNT(*)
+        FROM consumo_diario c JOIN zinc_diario z ON z.fecha = c.fecha
+        WHERE c.fecha >= ? AND c.fecha < ?
+        GROUP BY 2
+    """, (str(anio), SIN_TIPO, f"{anio}-01-01", f"{anio + 1}-01-01"))
+
+
+def _daily_arrays(conn, desde):
+    """Serie diaria densa (dias calendario) desde `desde`: NaN donde no hay carga."""
+    zinc = conn.execute("""
+        SELECT fecha, zinc_consumido_kg, dross_generado_kg, temp_zinc_promedio FROM zinc_diario
+        WHERE fecha >= ? ORDER BY fecha
+    """, (desde.isoformat(),)).fetchall()
+    prod = conn.execute("SELECT fecha, produccion_tm FROM consumo_diario WHERE fecha >= ? ORDER BY fecha",
+                        (desde.isoformat(),)).fetchall()
+    if not zinc:
+        return None
+    ultimo = max(_as_date(zinc[-1][0]), _as_date(prod[-1][0]) if prod else desde)
+    n = (ultimo - desde).days + 1
+    cols = {k: np.full(n, np.nan) for k in ("zinc", "dross", "temp", "tm")}
+    idx = np.array([(_as_date(f) - desde).days for f, *_ in zinc])
+    for k, j in (("zinc", 1), ("dross", 2), ("temp", 3)):
+        cols[k][idx] = np.array([np.nan if r[j] is None else r[j] for r in zinc], dtype=float)
+    if prod:
+        cols["tm"][np.array([(_as_date(f) - desde).days for f, _ in prod])] = [tm for _, tm in prod]
+    return cols
+
+
+def _window_sum(values, w):
+    """Suma movil de w dias (incluye el dia) con NaN como 0: cumsum vectorizado."""
+    c = np.concatenate(([0.0], np.cumsum(np.nan_to_num(values))))
+    lo = np.maximum(np.arange(1, len(values) + 1) - w, 0)
+    return c[1:] - c[lo]
+
+
+def rolling(cols):
+    """Medias moviles por ventana de VENTANAS dias: ratios de sumas, no medias de ratios."""
+    zinc, dross, temp, tm = cols["zinc"], cols["dross"], cols["temp"], cols["tm"]
+    hay_zinc = ~np.isnan(zinc)
+    ambos = hay_zinc & ~np.isnan(tm) & (np.nan_to_num(tm) > 0)
+    out = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for w in VENTANAS:
+            n_zinc = _window_sum(hay_zinc, w)
+            zinc_w = _window_sum(zinc, w)
+            out[f"kg_tm_{w}d"] = _window_sum(np.where(ambos, zinc, 0), w) / _window_sum(np.where(ambos, tm, 0), w)
+            out[f"dross_pct_{w}d"] = _window_sum(np.where(~np.isnan(dross), dross, 0), w) \
+                / _window_sum(np.where(~np.isnan(dross), zinc, 0), w) * 100
+            out[f"zinc_kg_{w}d"] = zinc_w / n_zinc
+            out[f"temp_zinc_{w}d"] = _window_sum(temp, w) / _window_sum(~np.isnan(temp), w)
+    return out
+
+
+def _refresh_tendencia(conn, primero):
+    # Las ventanas que terminan en `primero` o despues miran hasta max(VENTANAS) - 1 dias atras
+    desde = primero - timedelta(days=max(VENTANAS) - 1)
+    cols = _daily_arrays(conn, desde)
+    conn.execute("DELETE FROM zinc_tendencia WHERE fecha >= ?", (primero.isoformat(),))
+    if cols is None:
+        return
+    stats = rolling(cols)
+    keep = np.flatnonzero(~np.isnan(cols["zinc"]))
+    keep = keep[keep >= (primero - desde).days]
+    names = [f"{k}_{w}d" for k in ("kg_tm", "dross_pct", "zinc_kg", "temp_zinc") for w in VENTANAS]
+    rows = [((desde + timedelta(days=int(i))).isoformat(),
+             *(None if np.isnan(stats[k][i]) else float(stats[k][i]) for k in names)) for i in keep]
+    conn.executemany(f"INSERT INTO zinc_tendencia (fecha, {', '.join(names)}) VALUES ({', '.join('?' * (len(names) + 1))})",
+                     rows)
+
+
+# CONSULTA
+
+def _derivados(row):
+    """Fila de produccion_periodo como dict con kg/TM, % dross y temperatura media."""
+    (nivel, periodo, tm, metros, n2, dias_prod, zinc, dross, temp_suma, temp_dias, dias_zinc) = row
+    return {
+        "nivel": nivel, "periodo": periodo, "produccion_tm": tm, "metros_producidos": metros,
+        "n2_consumido_m3": n2, "dias_produccion": dias_prod, "zinc_consumido_kg": zinc,
+        "dross_generado_kg": dross, "dias_zinc": dias_zinc,
+        "kg_tm": zinc / tm if tm > 0 and dias_zinc else None,
+        "dross_pct": dross / zinc * 100 if zinc > 0 else None,
+        "temp_zinc_promedio": temp_suma / temp_dias if temp_dias else None,
+    }
+
+
+_PERIODO_COLS = ("nivel, periodo, produccion_tm, metros_producidos, n2_consumido_m3, dias_produccion, "
+                 "zinc_consumido_kg, dross_generado_kg, temp_zinc_suma, temp_zinc_dias, dias_zinc")
+
+
+def resumen(conn, hoy=None):
+    """{"semana", "mes", "anio"} del periodo en curso (anio = acumulado del anio); None si no hay datos."""
+    hoy = _as_date(hoy or date.today())
+    claves = {nivel: _CLAVE[nivel](NIVELES[nivel][1](hoy)) for nivel in NIVELES}
+    result = dict.fromkeys(NIVELES)
+    for nivel, periodo in claves.items():
+        row = conn.execute(f"SELECT {_PERIODO_COLS} FROM produccion_periodo WHERE nivel = ? AND periodo = ?",
+                           (nivel, periodo)).fetchone()
+        result[nivel] = _derivados(row) if row else None
+    return result
+
+
+def periodos(conn, nivel, desde=None, hasta=None):
+    """Periodos de un nivel (semana, mes, anio) en orden, con derivados."""
+    if nivel not in NIVELES:
+        raise ValueError(f"Nivel desconocido: {nivel} ({', '.join(NIVELES)})")
+    return [_derivados(row) for row in conn.execute(f"""
+        SELECT {_PERIODO_COLS} FROM produccion_periodo
+        WHERE nivel = ? AND periodo >= ? AND periodo < ? ORDER BY periodo
+    """, (nivel, desde or "", hasta or "~"))]
+
+
+def tendencia(conn, desde=None, hasta=None):
+    """Medias moviles diarias (zinc_tendencia) entre desde y hasta (YYYY-MM-DD)."""
+    cursor = conn.execute("SELECT * FROM zinc_tendencia WHERE fecha >= ? AND fecha < ? ORDER BY fecha",
+                          (desde or "", hasta or "~"))
+    names = [c[0] for c in cursor.description]
+    return [dict(zip(names, row)) for row in cursor]
+
+
+def por_producto(conn, anio=None):
+    """kg/TM y % dross por tipo_producto en un anio (por defecto el actual)."""
+    anio = str(anio or date.today().year)
+    return [
+        {"tipo_producto": tipo, "produccion_tm": tm, "zinc_consumido_kg": zinc, "dross_generado_kg": dross,
+         "dias": dias, "kg_tm": zinc / tm if tm > 0 else None, "dross_pct": dross / zinc * 100 if zinc > 0 else None}
+        for tipo, tm, zinc, dross, dias in conn.execute("""
+            SELECT tipo_producto, produccion_tm, zinc_consumido_kg, dross_generado_kg, dias
+            FROM zinc_por_producto WHERE anio = ? ORDER BY zinc_consumido_kg DESC
+        """, (anio,))
+    ]
+
+
+def main():
+    from daily_update import DailyTracker
+
+    parser = argparse.ArgumentParser(description="Reconstruye los agregados de zinc y produccion")
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+    with DailyTracker(args.db) as tracker:
+        with tracker.conn:
+            rebuild(tracker.conn)
+        for nivel, row in resumen(tracker.conn).items():
+            if row:
+                kg_tm = f"{row['kg_tm']:.2f} kg/TM" if row["kg_tm"] is not None else "sin kg/TM"
+                print(f"  {nivel:<7} {row['periodo']}: {row['produccion_tm']:,.1f} TM, "
+                      f"{row['zinc_consumido_kg']:,.0f} kg zinc, {kg_tm}")
+    print("✅ Agregados de zinc y produccion reconstruidos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Pipeline de datos del dashboard (lado lectura).
+
+Una sola instancia por proceso de Streamlit (get_pipeline), compartida por
+todas las sesiones: lee el DataStore que publica el servicio de adquisicion
+y mantiene un unico historial en memoria para los graficos, como registros
+crudos empaquetados (PackedRingBuffer). No abre conexiones al PLC.
+"""
+import threading
+import time
+
+import config as cfg
+from modules.industrial.data_store import get_data_store
+from modules.industrial.ring_buffer import PackedRingBuffer
+
+
+class DataPipeline:
+    """Ultimo snapshot + historial en vivo, seguro para lectura concurrente."""
+
+    def __init__(self, store=None, capacity=cfg.MAX_HISTORY_POINTS):
+        self.store = store or get_data_store()
+        self.history = PackedRingBuffer(capacity)
+        self._last_ts = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Incorpora el snapshot publicado si es nuevo. Devuelve el ultimo snapshot."""
+        snapshot = self.store.read_latest()
+        if snapshot is not None:
+            with self._lock:
+                if snapshot["timestamp"] != self._last_ts:
+                    self.history.append_snapshot(snapshot)
+                    self._last_ts = snapshot["timestamp"]
+        return snapshot
+
+    def latest(self):
+        return self.refresh()
+
+    def status(self):
+        return self.store.read_status()
+
+    def published_age(self):
+        """Segundos desde la ultima publicacion del servicio, o None si nunca publico."""
+        payload = self.store.read()
+        return None if payload is None else time.time() - payload["published_at"]
+
+    def window(self, n=None, signals=None):
+        """Copia de las ultimas n muestras (ver PackedRingBuffer.window)."""
+        self.refresh()
+        return self.history.window(n, signals, copy=True)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """Instancia unica por proceso, compartida por todas las sesiones."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = DataPipeline()
+    return _pipeline
@@ -0,0 +1,73 @@
+"""
+Almacen compartido del ultimo snapshot de planta.
+
+El servicio de adquisicion es el unico escritor; el dashboard solo lee.
+El snapshot se publica como JSON con reemplazo atomico (os.replace), asi
+que un lector nunca ve un archivo a medio escribir, y la lectura se cachea
+por mtime: N sesiones de Streamlit no generan N lecturas al PLC ni al disco.
+"""
+import json
+import os
+import threading
+import time
+
+import config as cfg
+
+
+class DataStore:
+    """Publica (escritor) y lee (dashboard) el ultimo estado de adquisicion."""
+
+    def __init__(self, path=cfg.SNAPSHOT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cached_mtime = None
+        self._cached = None
+
+    def publish(self, snapshot, status):
+        """Escribe el snapshot (dict o None) y el estado del servicio."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        payload = {"published_at": time.time(), "snapshot": snapshot, "status": status}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.path)
+
+    def read(self):
+        """Devuelve el ultimo payload publicado, o None si el servicio nunca publico."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if mtime != self._cached_mtime:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._cached = json.load(f)
+                    self._cached_mtime = mtime
+                except (OSError, ValueError):
+                    pass
+            return self._cached
+
+    def read_latest(self):
+        """Ultimo snapshot de planta (dict) o None."""
+        payload = self.read()
+        return payload["snapshot"] if payload else None
+
+    def read_status(self):
+        """Estado del servicio de adquisicion (dict) o None."""
+        payload = self.read()
+        return payload["status"] if payload else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_data_store():
+    """Lector unico por proceso (comparte la cache por mtime entre sesiones)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DataStore()
+    return _store
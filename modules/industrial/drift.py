@@ -0,0 +1,300 @@
+"""
+Alerta temprana de deriva en PSA y mezclador de forming gas.
+
+Los limites fijos de alarms.py avisan cuando la pureza ya cruzo
+PUREZA_CRITICA o el H2 ya paso FORMING_GAS_H2_MAX. Aca cada senal lleva,
+en memoria constante:
+
+    ewma     media exponencial (linea base, DERIVA_EWMA_ALPHA) y varianza
+             de los desvios contra ella (DERIVA_VAR_ALPHA, mas lenta)
+    cusum    suma acumulada de desvios contra la linea base, en sigmas,
+             con holgura DERIVA_CUSUM_K: detecta corrimientos lentos
+    tasa     derivada suavizada (unidades/min, DERIVA_TASA_ALPHA)
+
+Una regla alerta cuando el CUSUM en la direccion peligrosa pasa
+DERIVA_CUSUM_H o la tasa pasa max_rate, y se borra cuando ambos vuelven
+bajo la mitad. Un NaN repite el ultimo valor valido.
+
+update() es la forma escalar de un ciclo de lectura (microsegundos);
+evaluate() aplica las mismas recurrencias vectorizadas a un lote, con el
+estado arrastrado entre lotes: recalcular el historico por trozos o muestra
+a muestra da lo mismo. Para ajustar la sensibilidad:
+
+    python -m modules.industrial.drift --desde 2025-01-01 --hasta 2025-02-01 --h 25 50 100
+"""
+import argparse
+import math
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+import config as cfg
+from modules.industrial.alarms import episodes
+
+
+@dataclass(frozen=True)
+class DriftRule:
+    name: str
+    signal: str
+    direction: int          # +1 deriva al alza, -1 a la baja, 0 ambas
+    min_sigma: float        # piso de sigma (resolucion del sensor), en unidades de la senal
+    max_rate: float         # unidades/min en la direccion peligrosa
+    severity: str
+    description: str
+
+
+def compile_rules(config=cfg):
+    """Reglas de deriva para las senales que anteceden a las alarmas de PSA y forming gas."""
+    return (
+        DriftRule("pureza_n2_deriva", "pureza_n2", -1, 0.02, 0.8, "WARNING", "Pureza N2 en descenso"),
+        DriftRule("dew_point_n2_deriva", "dew_point_n2", +1, 0.2, 8.0, "WARNING", "Punto de rocio N2 en ascenso"),
+        DriftRule("presion_n2_deriva", "presion_n2", -1, 0.02, 0.8, "WARNING", "Presion N2 en descenso"),
+        DriftRule("fg_h2_deriva", "fg_percent_h2", +1, 0.02, 0.3, "WARNING", "H2 en forming gas en ascenso"),
+        DriftRule("fg_temp_deriva", "fg_temp_mezclador", +1, 0.2, 3.0, "WARNING", "Temperatura del mezclador en ascenso"),
+    )
+
+
+def _ewma(x, alpha, y0):
+    """y_i = (1 - alpha) y_{i-1} + alpha x_i por fila, en forma cerrada por bloques."""
+    b = 1.0 - alpha
+    block = max(1, int(300.0 / -math.log(b)))   # b ** -block < 1e130
+    out = np.empty_like(x)
+    y = y0
+    for lo in range(0, x.shape[1], block):
+        chunk = x[:, lo:lo + block]
+        pw = b ** np.arange(1, chunk.shape[1] + 1)
+        out[:, lo:lo + chunk.shape[1]] = pw * (y[:, None] + np.cumsum(alpha * chunk / pw, axis=1))
+        y = out[:, lo + chunk.shape[1] - 1]
+    return out
+
+
+def _cusum(y, s0):
+    """s_i = max(0, s_{i-1} + y_i) por fila: C_i - min(-s0, min_j<=i C_j)."""
+    c = np.cumsum(y, axis=1)
+    return c - np.minimum(-s0[:, None], np.minimum.accumulate(c, axis=1))
+
+
+def _shift(x, first):
+    return np.concatenate([first[:, None], x[:, :-1]], axis=1)
+
+
+class DriftEngine:
+    """EWMA + CUSUM + tasa de cambio por senal, con estado O(1) arrastrado entre lotes."""
+
+    def __init__(self, rules=None, alpha=cfg.DERIVA_EWMA_ALPHA, var_alpha=cfg.DERIVA_VAR_ALPHA,
+                 rate_alpha=cfg.DERIVA_TASA_ALPHA, k=cfg.DERIVA_CUSUM_K, h=cfg.DERIVA_CUSUM_H,
+                 warmup=cfg.DERIVA_WARMUP):
+        self.rules = tuple(rules if rules is not None else compile_rules())
+        for rule in self.rules:
+            if rule.direction not in (-1, 0, 1):
+                raise ValueError(f"Direccion no soportada en {rule.name}: {rule.direction}")
+        self.alpha, self.var_alpha, self.rate_alpha = alpha, var_alpha, rate_alpha
+        self.k, self.h, self.warmup = k, h, warmup
+        self.signals = tuple(rule.signal for rule in self.rules)
+        self._direction = np.array([rule.direction for rule in self.rules])[:, None]
+        self._min_var = np.array([rule.min_sigma for rule in self.rules]) ** 2
+        self._max_rate = np.array([rule.max_rate for rule in self.rules])[:, None]
+        self.reset()
+
+    def reset(self):
+        n = len(self.rules)
+        self.mean = np.full(n, np.nan)          # NaN = senal sin muestras todavia
+        self.var = np.zeros(n)                  # EWMA de e**2 sin corregir (arranca en 0)
+        self.steps = np.zeros(n, dtype=np.int64)  # muestras procesadas desde el inicio
+        self.last = np.full(n, np.nan)          # ultimo valor valido
+        self.up = np.zeros(n)                   # CUSUM al alza / a la baja (sigmas)
+        self.down = np.zeros(n)
+        self.rate = np.zeros(n)                 # unidades/min
+        self.seen = np.zeros(n, dtype=np.int64)
+        self.active = np.zeros(n, dtype=bool)
+        self.t_prev = math.nan
+
+    # LOTE
+
+    def evaluate(self, ts, columns):
+        """
+        Evalua un lote ordenado en el tiempo.
+
+        ts: epoch s (n,); columns: {senal: array (n,)}. Devuelve un dict de
+        matrices (reglas x n): ewma, sigma, cusum (direccion peligrosa),
+        rate y active (alerta con histeresis).
+        """
+        ts = np.asarray(ts, dtype=np.float64)
+        n = len(ts)
+        if n == 0:
+            empty = np.zeros((len(self.rules), 0))
+            return {"ewma": empty, "sigma": empty, "cusum": empty, "rate": empty, "active": empty.astype(bool)}
+        values = np.stack([np.asarray(columns[name], dtype=np.float64) for name in self.signals])
+        valid = np.isfinite(values)
+        idx = np.arange(n)
+        last_idx = np.maximum.accumulate(np.where(valid, idx, -1), axis=1)
+        new = np.isnan(self.mean)
+        started = (last_idx >= 0) | ~new[:, None]
+
+        # Senales que arrancan en este lote: la primera muestra valida inicia el estado
+        first = values[np.arange(len(self.rules)), np.argmax(valid, axis=1)]
+        mean0 = np.where(new, first, self.mean)
+        last0 = np.where(new, first, self.last)
+        held = np.where(last_idx >= 0, np.take_along_axis(values, np.maximum(last_idx, 0), axis=1), last0[:, None])
+        x = np.where(started, held, mean0[:, None])
+        steps = self.steps[:, None] + np.cumsum(started, axis=1)
+
+        mean = _ewma(x, self.alpha, mean0)
+        e = x - _shift(mean, mean0)
+        var = _ewma(np.where(started, e * e, self.var[:, None]), self.var_alpha, self.var)
+        z = e / self._sigma(_shift(var, self.var), steps - started)
+        up = _cusum(np.where(started, z - self.k, -self.k), self.up)
+        down = _cusum(np.where(started, -z - self.k, -self.k), self.down)
+
+        dt = np.diff(ts, prepend=self.t_prev)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            q = np.where(started & (dt > 0), (x - _shift(x, last0)) / dt * 60.0, 0.0)
+        rate = _ewma(q, self.rate_alpha, self.rate)
+
+        score = np.where(self._direction > 0, up, np.where(self._direction < 0, down, np.maximum(up, down)))
+        signed = np.where(self._direction == 0, np.abs(rate), self._direction * rate)
+        seen = self.seen[:, None] + np.cumsum(valid, axis=1)
+        trip = (seen >= self.warmup) & ((score > self.h) | (signed > self._max_rate))
+        clear = (score <= self.h / 2) & (signed <= self._max_rate / 2)
+        last_event = np.maximum.accumulate(np.where(trip | clear, idx, -1), axis=1)
+        active = np.where(last_event >= 0, np.take_along_axis(trip, np.maximum(last_event, 0), axis=1),
+                          self.active[:, None])
+
+        self.mean, self.var, self.last = mean[:, -1].copy(), var[:, -1].copy(), held[:, -1].copy()
+        self.steps, self.seen = steps[:, -1].copy(), seen[:, -1].copy()
+        self.up, self.down, self.rate = up[:, -1].copy(), down[:, -1].copy(), rate[:, -1].copy()
+        self.active = active[:, -1].copy()
+        self.t_prev = float(ts[-1])
+        return {"ewma": mean, "sigma": self._sigma(var, steps), "cusum": score, "rate": rate, "active": active}
+
+    def _sigma(self, var, steps):
+        """Desvio de la EWMA de e**2 corregida por arranque en 0 (como el promedio de lo visto)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = np.where(steps > 0, var / (1.0 - (1.0 - self.var_alpha) ** steps), 0.0)
+        return np.sqrt(np.maximum(var, self._min_var[:, None]))
+
+    # EN VIVO
+
+    def update(self, snapshot):
+        """
+        Un ciclo de lectura con las mismas recurrencias que evaluate(), en escalar.
+
+        Devuelve [(regla, activa, detalle)] de las alertas que cambiaron.
+        """
+        if hasattr(snapshot, "as_dict"):
+            snapshot = snapshot.as_dict()
+        t = snapshot["timestamp"]
+        dt = t - self.t_prev
+        a, b = self.alpha, 1.0 - self.alpha
+        av, bv = self.var_alpha, 1.0 - self.var_alpha
+        ar, br = self.rate_alpha, 1.0 - self.rate_alpha
+        k, h = self.k, self.h
+        # Estado como listas de float: la aritmetica escalar de NumPy es ~10x mas lenta
+        mean, var, last = self.mean.tolist(), self.var.tolist(), self.last.tolist()
+        up, down, rate = self.up.tolist(), self.down.tolist(), self.rate.tolist()
+        steps, seen, active = self.steps.tolist(), self.seen.tolist(), self.active.tolist()
+        changes = []
+        for i, rule in enumerate(self.rules):
+            x = snapshot.get(rule.signal)
+            valid = x is not None and math.isfinite(x)
+            if mean[i] != mean[i]:
+                if not valid:
+                    continue
+                mean[i] = last[i] = x
+            if valid:
+                seen[i] += 1
+            else:
+                x = last[i]
+            e = x - mean[i]
+            v = var[i] / (1.0 - bv ** steps[i]) if steps[i] else 0.0
+            z = e / math.sqrt(max(v, self._min_var[i]))
+            mean[i] = b * mean[i] + a * x
+            var[i] = bv * var[i] + av * e * e
+            steps[i] += 1
+            u = up[i] = max(0.0, up[i] + z - k)
+            d = down[i] = max(0.0, down[i] - z - k)
+            r = rate[i] = br * rate[i] + ar * ((x - last[i]) / dt * 60.0 if dt > 0 else 0.0)
+            last[i] = x
+
+            score = u if rule.direction > 0 else d if rule.direction < 0 else max(u, d)
+            signed = abs(r) if rule.direction == 0 else rule.direction * r
+            if seen[i] >= self.warmup and (score > h or signed > rule.max_rate):
+                now = True
+            elif score <= h / 2 and signed <= rule.max_rate / 2:
+                now = False
+            else:
+                continue
+            if now != active[i]:
+                active[i] = now
+                changes.append((rule, now, f"EWMA {mean[i]:.2f}, CUSUM {score:.1f} sigma, tasa {r:+.3f}/min"))
+        self.mean[:], self.var[:], self.last[:] = mean, var, last
+        self.up[:], self.down[:], self.rate[:] = up, down, rate
+        self.steps[:], self.seen[:], self.active[:] = steps, seen, active
+        self.t_prev = t
+        return changes
+
+
+def score_history(t0, t1, rules=None, root=cfg.SEGMENTS_DIR, chunk_s=7 * 86400, **params):
+    """
+    Recalcula las alertas de deriva entre t0 y t1 (epoch s) desde los segmentos.
+
+    `params` (alpha, var_alpha, rate_alpha, k, h, warmup) reemplazan los de config.py.
+    Devuelve los episodios ordenados por inicio; los abiertos en t1 tienen end=None.
+    """
+    from modules.industrial.segments import read_range
+
+    engine = DriftEngine(rules, **params)
+    result = []
+    open_since = {}
+    t = t0
+    while t < t1:
+        t_next = min(t + chunk_s, t1)
+        ts_ms, columns = read_range(t, t_next, signals=engine.signals, root=root)
+        if len(ts_ms):
+            previous = engine.active
+            scores = engine.evaluate(ts_ms / 1000.0, columns)
+            result.extend(episodes(engine.rules, ts_ms / 1000.0, scores["active"], previous, open_since))
+        t = t_next
+    for rule in engine.rules:
+        if rule.name in open_since:
+            result.append({"rule": rule.name, "severity": rule.severity, "start": open_since[rule.name], "end": None})
+    result.sort(key=lambda e: e["start"])
+    return result
+
+
+def drift_listener(engine, event_logger, source=None):
+    """Callback de adquisicion: registra en el event log cada alerta de deriva que se activa o se borra."""
+    prefix = f"[{source}] " if source else ""
+
+    def on_snapshot(snapshot):
+        for rule, active, detail in engine.update(snapshot):
+            if active:
+                event_logger.log_event("DRIFT", rule.severity, f"{prefix}{rule.description} ({detail})")
+            else:
+                event_logger.log_event("DRIFT", "INFO", f"{prefix}{rule.description}: normalizada")
+    return on_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alertas de deriva sobre el historico de segmentos")
+    parser.add_argument("--desde", required=True, help="YYYY-MM-DD[THH:MM]")
+    parser.add_argument("--hasta", required=True, help="YYYY-MM-DD[THH:MM]")
+    parser.add_argument("--h", type=float, nargs="*", default=[cfg.DERIVA_CUSUM_H], help="umbrales CUSUM a comparar")
+    parser.add_argument("--k", type=float, default=cfg.DERIVA_CUSUM_K)
+    parser.add_argument("--alpha", type=float, default=cfg.DERIVA_EWMA_ALPHA)
+    parser.add_argument("--root", default=cfg.SEGMENTS_DIR)
+    args = parser.parse_args()
+
+    t0 = datetime.fromisoformat(args.desde).timestamp()
+    t1 = datetime.fromisoformat(args.hasta).timestamp()
+    names = [rule.name for rule in compile_rules()]
+    print(f"{'h':>6}  " + "  ".join(f"{name:>20}" for name in names))
+    for h in args.h:
+        found = score_history(t0, t1, root=args.root, h=h, k=args.k, alpha=args.alpha)
+        counts = {name: sum(1 for e in found if e["rule"] == name) for name in names}
+        print(f"{h:>6g}  " + "  ".join(f"{counts[name]:>20}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Registro de eventos / auditoria en SQLite (EVENTS_DB_PATH).
+
+Una instancia por proceso (get_event_logger) compartida por todas las
+sesiones del dashboard.
+
+    log_event          - solo memoria: agrega a la cola de escritura y a la cola
+                         de recientes; un hilo de fondo escribe en lotes cada
+                         EVENTS_FLUSH_INTERVAL_S (demora maxima de escritura)
+    get_recent_events  - sirve desde los ultimos EVENTS_TAIL_SIZE eventos en
+                         memoria, sin I/O. El mismo hilo trae los eventos que
+                         escriben otros procesos (p. ej. alarmas de adquisicion)
+    query_events       - consultas de auditoria filtradas; usan los indices
+                         (timestamp), (severity, timestamp), (event_type, timestamp)
+"""
+import atexit
+import os
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+
+import config as cfg
+
+COLUMNS = ("timestamp", "event_type", "severity", "description", "user")
+
+
+class EventLogger:
+    """Registro de eventos del sistema (tipo, severidad, descripcion, usuario)."""
+
+    def __init__(self, path=cfg.EVENTS_DB_PATH, flush_interval_s=cfg.EVENTS_FLUSH_INTERVAL_S,
+                 tail_size=cfg.EVENTS_TAIL_SIZE):
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()        # conexion
+        self._mem_lock = threading.Lock()    # cola de escritura y recientes
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS eventos (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    event_type TEXT NOT NULL,
+                    severity TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    user TEXT
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_eventos_timestamp ON eventos (timestamp)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_eventos_severity ON eventos (severity, timestamp)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_eventos_tipo ON eventos (event_type, timestamp)")
+
+        self._pending = []
+        self._tail = deque(maxlen=tail_size)
+        self._own_ids = set()     # ids escritos por este proceso (ya estan en la cola de recientes)
+        rows = self.conn.execute(f"""
+            SELECT id, {', '.join(COLUMNS)} FROM eventos ORDER BY id DESC LIMIT ?
+        """, (tail_size,)).fetchall()
+        self._last_id = rows[0][0] if rows else 0
+        self._tail.extend(dict(zip(COLUMNS, row[1:])) for row in reversed(rows))
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # ESCRITURA
+
+    def log_event(self, event_type, severity, description, user=None):
+        event = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "event_type": event_type,
+            "severity": severity,
+            "description": description,
+            "user": user or "sistema",
+        }
+        with self._mem_lock:
+            self._pending.append(event)
+            self._tail.append(event)
+
+    def flush(self):
+        """Escribe los eventos pendientes en una transaccion y trae los de otros procesos."""
+        with self._lock:
+            with self._mem_lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                ids = []
+                try:
+                    with self.conn:
+                        cur = self.conn.cursor()
+                        for event in pending:
+                            cur.execute(
+                                "INSERT INTO eventos (timestamp, event_type, severity, description, user) "
+                                "VALUES (?, ?, ?, ?, ?)",
+                                tuple(event[c] for c in COLUMNS),
+                            )
+                            ids.append(cur.lastrowid)
+                except sqlite3.Error:
+                    with self._mem_lock:
+                        self._pending[:0] = pending
+                    raise
+                # Solo ids confirmados: tras un rollback otro proceso puede reusarlos
+                self._own_ids.update(ids)
+            rows = self.conn.execute(f"""
+                SELECT id, {', '.join(COLUMNS)} FROM eventos WHERE id > ? ORDER BY id
+            """, (self._last_id,)).fetchall()
+            if not rows:
+                return
+            self._last_id = rows[-1][0]
+            foreign = [dict(zip(COLUMNS, row[1:])) for row in rows if row[0] not in self._own_ids]
+            self._own_ids.clear()
+            if foreign:
+                with self._mem_lock:
+                    merged = sorted(list(self._tail) + foreign, key=lambda e: e["timestamp"])
+                    self._tail.clear()
+                    self._tail.extend(merged)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval_s):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # los pendientes vuelven a la cola y se reintentan en el proximo ciclo
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        self.conn.close()
+
+    # CONSULTA
+
+    def get_recent_events(self, limit=10):
+        """Ultimos eventos, mas reciente primero, como lista de dicts (desde memoria)."""
+        with self._mem_lock:
+            tail = list(self._tail)[-limit:]
+        return [dict(event) for event in reversed(tail)]
+
+    def query_events(self, desde=None, hasta=None, severity=None, event_type=None, limit=500):
+        """
+        Consulta de auditoria, mas reciente primero. desde/hasta son 'YYYY-MM-DD[ HH:MM:SS]'.
+
+        Con severity o event_type usa el indice compuesto correspondiente;
+        solo con fechas, el de timestamp.
+        """
+        clauses, params = [], []
+        if severity is not None:
+            clauses.append("severity = ?")
+            params.append(severity)
+        if event_type is not None:
+            clauses.append("event_type = ?")
+            params.append(event_type)
+        if desde is not None:
+            clauses.append("timestamp >= ?")
+            params.append(str(desde))
+        if hasta is not None:
+            clauses.append("timestamp < ?")
+            params.append(str(hasta))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        self.flush()
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT {', '.join(COLUMNS)} FROM eventos {where}
+                ORDER BY timestamp DESC LIMIT ?
+            """, (*params, limit)).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_event_logger():
+    """Instancia unica por proceso, compartida por todas las sesiones."""
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = EventLogger()
+    return _logger
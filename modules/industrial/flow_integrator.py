@@ -0,0 +1,417 @@
+"""
+Integrador de caudales en linea: llena consumo_diario desde las mediciones.
+
+Listener de adquisicion (FlowIntegrator.add) que integra por trapecios, con
+memoria O(1) por senal (ultima muestra + acumuladores del dia):
+
+    flujo_n2, fg_flujo_n2, fg_flujo_h2, flujo_jet_wipe   (Nm³/h -> m³)
+    totalizador_metros   - contador de 16 bits: diferencia modulo 65536;
+                           saltos imposibles a VEL_MAX (reset) no se cuentan
+    velocidad_real       - horas_operacion (>= VEL_MIN_PRODUCCION) y
+                           velocidad promedio en operacion
+
+Huecos: entre dos muestras separadas hasta INTEGRADOR_MAX_GAP_S (una
+reconexion) se interpola; mas largos no se integran y se registran como
+huecos_h. Un intervalo que cruza medianoche se corta en la medianoche
+(valor interpolado).
+
+Al cerrar cada dia escribe consumo_diario (n2_consumido_m3 = flujo_n2,
+metros, velocidad_promedio, horas_operacion) y el detalle en
+consumo_medido. produccion_tm no se mide: queda en 0 en filas nuevas y no
+se toca si ya fue cargada a mano. Al detenerse guarda el dia en curso como
+parcial y lo retoma al arrancar.
+
+recompute_days rehace cualquier rango de dias desde los segmentos, en
+bloque y vectorizado, con las mismas reglas:
+
+    python -m modules.industrial.flow_integrator --desde 2025-01-01 --hasta 2025-02-01
+"""
+import argparse
+import copy
+import logging
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import config as cfg
+from modules.industrial import daily_rollups
+
+log = logging.getLogger(__name__)
+
+FLOWS = (
+    ("n2_m3", "flujo_n2"),
+    ("fg_n2_m3", "fg_flujo_n2"),
+    ("fg_h2_m3", "fg_flujo_h2"),
+    ("jet_wipe_m3", "flujo_jet_wipe"),
+)
+SIGNALS = tuple(signal for _, signal in FLOWS) + ("velocidad_real", "totalizador_metros", "tipo_producto")
+COUNTER_WRAP = 65536.0
+
+MEDIDO_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS consumo_medido (
+        fecha TEXT PRIMARY KEY,
+        n2_m3 REAL NOT NULL,
+        fg_n2_m3 REAL NOT NULL,
+        fg_h2_m3 REAL NOT NULL,
+        jet_wipe_m3 REAL NOT NULL,
+        metros REAL NOT NULL,
+        horas_operacion REAL NOT NULL,
+        velocidad_promedio REAL,
+        cobertura_h REAL NOT NULL,
+        huecos_h REAL NOT NULL,
+        parcial INTEGER NOT NULL DEFAULT 0,
+        actualizado TEXT NOT NULL
+    )
+"""
+
+
+def _day_start(ts):
+    return datetime.combine(datetime.fromtimestamp(ts).date(), datetime.min.time()).timestamp()
+
+
+def _next_midnight(ts):
+    return datetime.combine(datetime.fromtimestamp(ts).date() + timedelta(days=1), datetime.min.time()).timestamp()
+
+
+def _fecha(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+
+def _metros_delta(a, b, dt):
+    """Metros entre dos lecturas del totalizador (con vuelta del contador)."""
+    delta = (b - a) % COUNTER_WRAP
+    return delta if delta <= dt * cfg.VEL_MAX / 60.0 * 1.1 + 1.0 else 0.0
+
+
+def _empty_day():
+    day = {key: 0.0 for key, _ in FLOWS}
+    day.update(metros=0.0, op_s=0.0, vel_op=0.0, cobertura_s=0.0, huecos_s=0.0, productos={})
+    return day
+
+
+# ESCRITURA
+
+def write_days(tracker, days, parcial=False):
+    """
+    Escribe [(fecha, acumuladores)] en consumo_medido y consumo_diario en una transaccion.
+
+    consumo_diario: UPDATE de las columnas medidas si la fila existe (el
+    trigger AFTER UPDATE mantiene consumo_mensual / roi_resumen), INSERT si no.
+    Los agregados de daily_rollups se recalculan en la misma transaccion.
+    Los dias sin ninguna muestra integrada se omiten.
+    """
+    conn = tracker.conn
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    written = 0
+    with conn:
+        conn.execute(MEDIDO_SCHEMA)
+        for fecha, day in days:
+            if day["cobertura_s"] <= 0:
+                continue
+            horas = day["op_s"] / 3600.0
+            velocidad = day["vel_op"] / day["op_s"] if day["op_s"] > 0 else None
+            producto = max(day["productos"], key=day["productos"].get) if day["productos"] else None
+            producto = None if producto is None else str(int(producto))
+            conn.execute("""
+                INSERT OR REPLACE INTO consumo_medido
+                (fecha, n2_m3, fg_n2_m3, fg_h2_m3, jet_wipe_m3, metros, horas_operacion, velocidad_promedio,
+                 cobertura_h, huecos_h, parcial, actualizado)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (fecha, day["n2_m3"], day["fg_n2_m3"], day["fg_h2_m3"], day["jet_wipe_m3"], day["metros"], horas,
+                  velocidad, day["cobertura_s"] / 3600.0, day["huecos_s"] / 3600.0, int(parcial), now))
+            if conn.execute("SELECT 1 FROM consumo_diario WHERE fecha = ?", (fecha,)).fetchone():
+                conn.execute("""
+                    UPDATE consumo_diario SET metros_producidos = ?, n2_consumido_m3 = ?, velocidad_promedio = ?,
+                        horas_operacion = ?, tipo_producto = COALESCE(tipo_producto, ?)
+                    WHERE fecha = ?
+                """, (day["metros"], day["n2_m3"], velocidad, horas, producto, fecha))
+            else:
+                conn.execute("""
+                    INSERT INTO consumo_diario
+                    (fecha, produccion_tm, metros_producidos, n2_consumido_m3, velocidad_promedio,
+                     horas_operacion, tipo_producto, observaciones)
+                    VALUES (?, 0, ?, ?, ?, ?, ?, ?)
+                """, (fecha, day["metros"], day["n2_m3"], velocidad, horas, producto,
+                      "Integrador automatico (parcial)" if parcial else "Integrador automatico"))
+            written += 1
+        daily_rollups.refresh(conn, [fecha for fecha, day in days if day["cobertura_s"] > 0])
+    return written
+
+
+def _load_partial(tracker, fecha):
+    """Acumuladores del dia guardados como parciales en una corrida anterior, o None."""
+    conn = tracker.conn
+    with conn:
+        conn.execute(MEDIDO_SCHEMA)
+    row = conn.execute("""
+        SELECT n2_m3, fg_n2_m3, fg_h2_m3, jet_wipe_m3, metros, horas_operacion, velocidad_promedio,
+               cobertura_h, huecos_h
+        FROM consumo_medido WHERE fecha = ? AND parcial = 1
+    """, (fecha,)).fetchone()
+    if row is None:
+        return None
+    day = _empty_day()
+    for (key, _), value in zip(FLOWS, row[:4]):
+        day[key] = value
+    day["metros"] = row[4]
+    day["op_s"] = row[5] * 3600.0
+    day["vel_op"] = (row[6] or 0.0) * day["op_s"]
+    day["cobertura_s"] = row[7] * 3600.0
+    day["huecos_s"] = row[8] * 3600.0
+    return day
+
+
+# EN LINEA
+
+class FlowIntegrator:
+    """Integra muestras en vivo y escribe consumo_diario al cambiar el dia."""
+
+    def __init__(self, tracker=None, max_gap_s=cfg.INTEGRADOR_MAX_GAP_S):
+        if tracker is None:
+            from daily_update import DailyTracker
+
+            tracker = DailyTracker()
+        self.tracker = tracker
+        self.max_gap_s = max_gap_s
+        self._prev = None       # (ts, {senal: valor})
+        self._day = None
+        self._fecha = None
+        self._day_end = None
+
+    def add(self, snapshot):
+        """Callback de adquisicion: snapshot (PlantSnapshot o dict con timestamp)."""
+        if hasattr(snapshot, "as_dict"):
+            snapshot = snapshot.as_dict()
+        t = float(snapshot["timestamp"])
+        values = {name: float(snapshot[name]) for name in SIGNALS}
+        if self._prev is None:
+            self._start_day(t)
+            self._prev = (t, values)
+            return
+        t0, v0 = self._prev
+        if t <= t0:
+            return
+        # Si falla la escritura al cerrar el dia el estado queda como antes de
+        # esta muestra: la siguiente reintegra el intervalo sin contarlo dos veces
+        saved = (copy.deepcopy(self._day), self._fecha, self._day_end) if t > self._day_end else None
+        try:
+            self._advance(t0, v0, t, values)
+        except Exception:
+            if saved is not None:
+                self._day, self._fecha, self._day_end = saved
+            raise
+        self._prev = (t, values)
+
+    def _advance(self, t0, v0, t, values):
+        gap = t - t0 > self.max_gap_s
+        if gap:
+            self._day["metros"] += _metros_delta(v0["totalizador_metros"], values["totalizador_metros"], t - t0)
+        while t > self._day_end:
+            b = self._day_end
+            if gap:
+                self._day["huecos_s"] += b - t0
+                t0 = b
+            else:
+                f = (b - t0) / (t - t0)
+                vb = {name: v0[name] + f * (values[name] - v0[name]) for name in SIGNALS}
+                vb["totalizador_metros"] = (v0["totalizador_metros"] + f * ((values["totalizador_metros"]
+                                            - v0["totalizador_metros"]) % COUNTER_WRAP)) % COUNTER_WRAP
+                vb["tipo_producto"] = v0["tipo_producto"]
+                self._interval(t0, v0, b, vb)
+                t0, v0 = b, vb
+            self.close_day()
+            self._start_day(b)
+        if gap:
+            self._day["huecos_s"] += t - t0
+        else:
+            self._interval(t0, v0, t, values)
+
+    def _interval(self, t0, v0, t1, v1):
+        day = self._day
+        dt = t1 - t0
+        hours = dt / 3600.0
+        for key, signal in FLOWS:
+            day[key] += (v0[signal] + v1[signal]) * 0.5 * hours
+        day["metros"] += _metros_delta(v0["totalizador_metros"], v1["totalizador_metros"], dt)
+        day["cobertura_s"] += dt
+        if v0["velocidad_real"] >= cfg.VEL_MIN_PRODUCCION:
+            day["op_s"] += dt
+            day["vel_op"] += (v0["velocidad_real"] + v1["velocidad_real"]) * 0.5 * dt
+            producto = v0["tipo_producto"]
+            day["productos"][producto] = day["productos"].get(producto, 0.0) + dt
+
+    def _start_day(self, t):
+        self._fecha = _fecha(t)
+        self._day_end = _next_midnight(t)
+        self._day = _load_partial(self.tracker, self._fecha) or _empty_day()
+
+    def close_day(self):
+        """Escribe el dia en curso como completo."""
+        if self._day is not None:
+            write_days(self.tracker, [(self._fecha, self._day)])
+            log.info("consumo_diario %s: %.1f m³ N2, %.0f m", self._fecha, self._day["n2_m3"], self._day["metros"])
+
+    def close(self):
+        """Guarda el dia en curso como parcial (se retoma al arrancar)."""
+        if self._day is not None:
+            write_days(self.tracker, [(self._fecha, self._day)], parcial=True)
+        self.tracker.close()
+
+
+# RECALCULO EN BLOQUE
+
+def integrate_arrays(ts, columns, max_gap_s=cfg.INTEGRADOR_MAX_GAP_S):
+    """
+    {fecha: acumuladores} de los intervalos entre muestras consecutivas (ts epoch s).
+
+    Mismas reglas que FlowIntegrator.add, vectorizado: se insertan muestras
+    interpoladas en las medianoches que caen dentro de intervalos cortos y
+    cada intervalo se asigna al dia de su extremo izquierdo.
+    """
+    ts = np.asarray(ts, dtype=np.float64)
+    cols = {name: np.asarray(columns[name], dtype=np.float64) for name in SIGNALS}
+    if len(ts) < 2:
+        return {}
+    midnights = [_day_start(ts[0])]
+    while midnights[-1] <= ts[-1]:
+        midnights.append(_next_midnight(midnights[-1] + 1))
+    midnights = np.array(midnights)
+
+    # Muestras interpoladas en medianoches dentro de intervalos cortos
+    inner = midnights[(midnights > ts[0]) & (midnights < ts[-1])]
+    i = np.searchsorted(ts, inner)
+    cut = (ts[i] != inner) & (ts[i] - ts[i - 1] <= max_gap_s)
+    inner, i = inner[cut], i[cut]
+    if len(inner):
+        f = (inner - ts[i - 1]) / (ts[i] - ts[i - 1])
+        new = {}
+        for name in SIGNALS:
+            a, b = cols[name][i - 1], cols[name][i]
+            if name == "totalizador_metros":
+                new[name] = (a + f * ((b - a) % COUNTER_WRAP)) % COUNTER_WRAP
+            elif name == "tipo_producto":
+                new[name] = a
+            else:
+                new[name] = a + f * (b - a)
+        ts = np.insert(ts, i, inner)
+        cols = {name: np.insert(cols[name], i, new[name]) for name in SIGNALS}
+
+    dt = np.diff(ts)
+    ok = dt <= max_gap_s
+    day_idx = np.searchsorted(midnights, ts[:-1], side="right") - 1
+    ndays = len(midnights)
+
+    def per_day(weights):
+        return np.bincount(day_idx, weights=weights, minlength=ndays)
+
+    sums = {}
+    for key, signal in FLOWS:
+        y = cols[signal]
+        sums[key] = per_day(np.where(ok, (y[:-1] + y[1:]) * 0.5 * dt / 3600.0, 0.0))
+    m = cols["totalizador_metros"]
+    delta = (m[1:] - m[:-1]) % COUNTER_WRAP
+    sums["metros"] = per_day(np.where(delta <= dt * cfg.VEL_MAX / 60.0 * 1.1 + 1.0, delta, 0.0))
+    sums["cobertura_s"] = per_day(np.where(ok, dt, 0.0))
+    v = cols["velocidad_real"]
+    op = ok & (v[:-1] >= cfg.VEL_MIN_PRODUCCION)
+    sums["op_s"] = per_day(np.where(op, dt, 0.0))
+    sums["vel_op"] = per_day(np.where(op, (v[:-1] + v[1:]) * 0.5 * dt, 0.0))
+
+    # Huecos: repartidos por tiempo entre los dias que atraviesan
+    huecos = np.zeros(ndays)
+    for k in np.flatnonzero(~ok):
+        t0, t1 = ts[k], ts[k + 1]
+        d = day_idx[k]
+        while d + 1 < ndays and midnights[d + 1] < t1:
+            huecos[d] += midnights[d + 1] - t0
+            t0 = midnights[d + 1]
+            d += 1
+        huecos[d] += t1 - t0
+    sums["huecos_s"] = huecos
+
+    codes = cols["tipo_producto"][:-1]
+    result = {}
+    for d in range(ndays):
+        if not (sums["cobertura_s"][d] or huecos[d] or sums["metros"][d]):
+            continue
+        day = {key: float(values[d]) for key, values in sums.items()}
+        mask = op & (day_idx == d)
+        uniq, inv = np.unique(codes[mask], return_inverse=True)
+        day["productos"] = dict(zip(uniq.tolist(), np.bincount(inv, weights=dt[mask]).tolist()))
+        result[_fecha(midnights[d])] = day
+    return result
+
+
+def _merge(into, other):
+    for key, value in other.items():
+        if key == "productos":
+            for code, seconds in value.items():
+                into["productos"][code] = into["productos"].get(code, 0.0) + seconds
+        else:
+            into[key] += value
+
+
+def recompute_days(tracker, desde, hasta, root=cfg.SEGMENTS_DIR, max_gap_s=cfg.INTEGRADOR_MAX_GAP_S, chunk_days=7):
+    """
+    Rehace consumo_diario/consumo_medido para los dias [desde, hasta) desde los segmentos.
+
+    Lee por trozos de chunk_days (arrastrando la ultima muestra de cada
+    trozo) y escribe todo en una transaccion. Devuelve {fecha: acumuladores}.
+    """
+    from modules.industrial.segments import read_range
+
+    desde = date.fromisoformat(str(desde))
+    hasta = date.fromisoformat(str(hasta))
+    t_first = datetime.combine(desde, datetime.min.time()).timestamp()
+    t_end = datetime.combine(hasta, datetime.min.time()).timestamp()
+    days = {}
+    carry = None
+    t = t_first - max_gap_s
+    while t < t_end:
+        t_next = min(_day_start(t + chunk_days * 86400.0), t_end)
+        ts_ms, columns = read_range(t, t_next, signals=SIGNALS, root=root)
+        ts = ts_ms / 1000.0
+        if carry is not None:
+            ts = np.concatenate(([carry[0]], ts))
+            columns = {name: np.concatenate(([carry[1][name]], columns[name])) for name in SIGNALS}
+        if len(ts):
+            carry = (ts[-1], {name: columns[name][-1] for name in SIGNALS})
+            for fecha, day in integrate_arrays(ts, columns, max_gap_s).items():
+                if fecha in days:
+                    _merge(days[fecha], day)
+                else:
+                    days[fecha] = day
+        t = t_next
+    # El ultimo intervalo del rango llega hasta la primera muestra de `hasta`
+    ts_ms, columns = read_range(t_end, t_end + max_gap_s + 1, signals=SIGNALS, root=root)
+    if carry is not None and len(ts_ms):
+        tail = integrate_arrays(np.r_[carry[0], ts_ms[0] / 1000.0],
+                                {name: np.r_[carry[1][name], columns[name][0]] for name in SIGNALS}, max_gap_s)
+        for fecha, day in tail.items():
+            if fecha in days:
+                _merge(days[fecha], day)
+            else:
+                days[fecha] = day
+    first, last = desde.isoformat(), hasta.isoformat()
+    days = {fecha: day for fecha, day in sorted(days.items()) if first <= fecha < last}
+    write_days(tracker, days.items())
+    return days
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula consumo_diario desde los segmentos historicos")
+    parser.add_argument("--desde", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--hasta", required=True, help="YYYY-MM-DD (excluido)")
+    parser.add_argument("--root", default=cfg.SEGMENTS_DIR)
+    args = parser.parse_args()
+
+    from daily_update import DailyTracker
+
+    with DailyTracker() as tracker:
+        days = recompute_days(tracker, args.desde, args.hasta, args.root)
+    total = sum(day["n2_m3"] for day in days.values())
+    print(f"✅ {len(days)} dias recalculados: {total:,.1f} m³ N2")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Historizacion de datos de proceso en SQLite (SQLITE_PATH) con rollups.
+
+Tres niveles:
+    raw_samples  - una fila ancha por lectura (ts en ms, una columna por senal)
+    rollup_1m    - min/max/suma/cantidad por senal y minuto
+    rollup_1h    - min/max/suma/cantidad por senal y hora
+
+Los rollups se recalculan solo para los minutos/horas tocados por cada
+lote ingerido (idempotente, tolera datos tardios). La adquisicion entrega
+registros crudos (write_record): se acumulan empaquetados y se escalan por
+columna al escribir el lote. Las consultas eligen el
+nivel mas grueso que conserva la resolucion del grafico (ver choose_tier).
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import fields
+
+import config as cfg
+from modules.industrial.metrics import timed
+from modules.industrial.packed import PackedSamples
+from modules.industrial.poller import RECORD, PlantSnapshot
+
+SIGNALS = tuple(f.name for f in fields(PlantSnapshot) if f.name != "timestamp")
+
+# (tabla, tamano del bucket en segundos); None = datos crudos
+TIERS = (
+    ("rollup_1h", 3600),
+    ("rollup_1m", 60),
+    ("raw_samples", None),
+)
+
+
+class Historian:
+    """Escritor/lector del historico de proceso."""
+
+    def __init__(self, path=cfg.SQLITE_PATH, signals=SIGNALS, batch_size=12, flush_interval_s=60.0):
+        self.path = path
+        self.signals = tuple(signals)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._pending = []
+        self._pending_raw = bytearray()
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        cols = ", ".join(f"{name} REAL" for name in self.signals)
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS raw_samples (ts INTEGER PRIMARY KEY, {cols})")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS signals (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)")
+            for table, _ in TIERS[:-1]:
+                self.conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        signal_id INTEGER NOT NULL,
+                        bucket INTEGER NOT NULL,
+                        vmin REAL, vmax REAL, vsum REAL, count INTEGER NOT NULL,
+                        PRIMARY KEY (signal_id, bucket)
+                    ) WITHOUT ROWID
+                """)
+            self.conn.executemany("INSERT OR IGNORE INTO signals (name) VALUES (?)", [(s,) for s in self.signals])
+        self.signal_ids = dict(self.conn.execute("SELECT name, id FROM signals"))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # ESCRITURA
+
+    def write_snapshot(self, snapshot):
+        """Agrega un snapshot (dict o PlantSnapshot); escribe en lotes."""
+        if isinstance(snapshot, PlantSnapshot):
+            snapshot = snapshot.as_dict()
+        with self._lock:
+            self._pending.append(snapshot)
+            if (len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval_s):
+                self.flush()
+
+    def write_record(self, record):
+        """Agrega un registro crudo RECORD (BlockPoller.pack); escribe en lotes."""
+        with self._lock:
+            self._pending_raw += record
+            if (len(self._pending_raw) >= self.batch_size * RECORD.size
+                    or time.monotonic() - self._last_flush >= self.flush_interval_s):
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            raw, self._pending_raw = self._pending_raw, bytearray()
+            self._last_flush = time.monotonic()
+            if pending:
+                self.write_batch(pending)
+            if raw:
+                self.write_records(bytes(raw))
+
+    @timed("historian_write")
+    def write_batch(self, rows):
+        """Escribe muestras crudas y actualiza los rollups en una transaccion."""
+        params = [
+            (int(row["timestamp"] * 1000), *(_num(row.get(name)) for name in self.signals))
+            for row in rows
+        ]
+        if not params:
+            return 0
+        return self._insert(params, min(p[0] for p in params) // 1000, max(p[0] for p in params) // 1000)
+
+    @timed("historian_write")
+    def write_records(self, data):
+        """Escribe registros crudos (bytes, array RAW_DTYPE o PackedSamples); escala por columna."""
+        samples = PackedSamples.of(data)
+        if not len(samples):
+            return 0
+        ts = samples.ts
+        # NaN (registro ausente) se guarda como NULL
+        columns = [samples.column(name).tolist() for name in self.signals]
+        params = list(zip(ts.tolist(), *columns))
+        return self._insert(params, int(ts.min()) // 1000, int(ts.max()) // 1000)
+
+    def _insert(self, params, t0, t1):
+        placeholders = ", ".join("?" * (len(self.signals) + 1))
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO raw_samples (ts, {', '.join(self.signals)}) VALUES ({placeholders})",
+                params,
+            )
+            self._refresh_rollups(t0, t1)
+        return len(params)
+
+    def _refresh_rollups(self, t0, t1):
+        m0, m1 = t0 // 60 * 60, t1 // 60 * 60 + 60
+        for name in self.signals:
+            self.conn.execute(f"""
+                INSERT OR REPLACE INTO rollup_1m (signal_id, bucket, vmin, vmax, vsum, count)
+                SELECT ?, ts / 60000 * 60, MIN({name}), MAX({name}), SUM({name}), COUNT({name})
+                FROM raw_samples WHERE ts >= ? AND ts < ? AND {name} IS NOT NULL
+                GROUP BY ts / 60000
+            """, (self.signal_ids[name], m0 * 1000, m1 * 1000))
+        # Por senal: el filtro usa la PK (signal_id, bucket) en vez de recorrer rollup_1m
+        h0, h1 = t0 // 3600 * 3600, t1 // 3600 * 3600 + 3600
+        for name in self.signals:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO rollup_1h (signal_id, bucket, vmin, vmax, vsum, count)
+                SELECT signal_id, bucket / 3600 * 3600, MIN(vmin), MAX(vmax), SUM(vsum), SUM(count)
+                FROM rollup_1m WHERE signal_id = ? AND bucket >= ? AND bucket < ?
+                GROUP BY bucket / 3600
+            """, (self.signal_ids[name], h0, h1))
+
+    # CONSULTA
+
+    @staticmethod
+    def choose_tier(t0, t1, width_px):
+        """
+        Nivel mas grueso que aun da al menos width_px / 2 puntos.
+
+        Con min/max por bucket la envolvente se conserva, y media resolucion
+        de pixel no se distingue en pantalla (un mes en 1200 px -> rollup_1h).
+        """
+        seconds_per_px = (t1 - t0) / max(1, width_px)
+        for table, bucket_s in TIERS[:-1]:
+            if bucket_s <= 2 * seconds_per_px:
+                return table, bucket_s
+        return TIERS[-1]
+
+    @timed("historian_query")
+    def query(self, signals, t0, t1, width_px=1000):
+        """
+        Serie de cada senal entre t0 y t1 (epoch s), con ~width_px puntos como maximo.
+
+        Devuelve {"tier": tabla, "data": {senal: {"ts", "min", "max", "mean", "count"}}},
+        con ts en epoch segundos (inicio de cada bucket).
+        """
+        with self._lock:
+            return read_series(self.conn, self.signal_ids, signals, t0, t1, width_px)
+
+
+def read_series(conn, signal_ids, signals, t0, t1, width_px=1000):
+    """Cuerpo de Historian.query sobre una conexion cualquiera (p. ej. de solo lectura)."""
+    table, bucket_s = Historian.choose_tier(t0, t1, width_px)
+    step = max(bucket_s or 1, int((t1 - t0) / max(1, width_px)))
+    data = {}
+    for name in signals:
+        if table == "raw_samples":
+            rows = conn.execute(f"""
+                SELECT ts / 1000 / ? * ?, MIN({name}), MAX({name}), AVG({name}), COUNT({name})
+                FROM raw_samples WHERE ts >= ? AND ts < ? AND {name} IS NOT NULL
+                GROUP BY ts / 1000 / ? ORDER BY 1
+            """, (step, step, int(t0 * 1000), int(t1 * 1000), step)).fetchall()
+        else:
+            # t0 alineado al bucket: el primero, cubierto en parte, no se pierde
+            rows = conn.execute(f"""
+                SELECT bucket / ? * ?, MIN(vmin), MAX(vmax), SUM(vsum) / SUM(count), SUM(count)
+                FROM {table} WHERE signal_id = ? AND bucket >= ? AND bucket < ?
+                GROUP BY bucket / ? ORDER BY 1
+            """, (step, step, signal_ids[name], int(t0) // bucket_s * bucket_s, int(t1), step)).fetchall()
+        ts, vmin, vmax, mean, count = zip(*rows) if rows else ((), (), (), (), ())
+        data[name] = {"ts": list(ts), "min": list(vmin), "max": list(vmax),
+                      "mean": list(mean), "count": list(count)}
+    return {"tier": table, "data": data}
+
+
+def _num(value):
+    if value is None:
+        return None
+    return float(value)
@@ -0,0 +1,279 @@
+"""
+API HTTP local de solo lectura sobre el historico (SQLITE_PATH).
+
+Para el Resumen Ejecutivo, los reportes Excel y los notebooks de calidad,
+que de otro modo abririan la base directamente y competirian con el escritor:
+
+    GET /signals
+    GET /history?signals=temp_zinc,flujo_n2&t0=1735689600&t1=1735776000&points=1000[&format=arrow]
+
+    python -m modules.industrial.history_api [--port 9109] [--db data/datos_kinnox.db]
+
+Cada consulta es la de Historian.query (read_series): el nivel (crudo, 1 min,
+1 h) sale de la ventana y de points, y recorre un rango de la clave primaria
+(ts en raw_samples, (signal_id, bucket) en los rollups). Se atiende con un
+pool de conexiones de solo lectura (en WAL no bloquean al escritor) y la
+respuesta ya codificada queda en una cache LRU con TTL corto. Cuando el
+escritor confirma una transaccion cambia PRAGMA data_version y las entradas
+anteriores dejan de servirse.
+
+format=arrow devuelve un stream Arrow IPC en formato largo (signal, ts, min,
+max, mean, count) con el nivel en los metadatos del schema.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from urllib.request import pathname2url
+
+import config as cfg
+from modules.industrial.historian import read_series
+from modules.industrial.metrics import get_registry, set_process_name, timed, timer
+
+log = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class TTLCache:
+    """LRU con vencimiento por entrada, seguro entre hilos."""
+
+    def __init__(self, maxsize=cfg.HISTORY_CACHE_SIZE, ttl_s=cfg.HISTORY_CACHE_TTL_S):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        if self.maxsize <= 0 or self.ttl_s <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl_s, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+def _connect_ro(path):
+    uri = f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+class ReadPool:
+    """Conexiones de solo lectura; cada consulta toma una y la devuelve."""
+
+    def __init__(self, path=cfg.SQLITE_PATH, size=cfg.HISTORY_API_POOL):
+        self.path = path
+        self._free = queue.LifoQueue()
+        self._all = [_connect_ro(path) for _ in range(size)]
+        for conn in self._all:
+            self._free.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._free.get()
+        try:
+            yield conn
+        finally:
+            self._free.put(conn)
+
+    def close(self):
+        for conn in self._all:
+            conn.close()
+
+
+class HistoryService:
+    """Consultas validadas + cache; lo que atiende el servidor HTTP."""
+
+    def __init__(self, path=cfg.SQLITE_PATH, pool_size=cfg.HISTORY_API_POOL,
+                 cache_size=cfg.HISTORY_CACHE_SIZE, ttl_s=cfg.HISTORY_CACHE_TTL_S):
+        self.pool = ReadPool(path, pool_size)
+        self.cache = TTLCache(cache_size, ttl_s)
+        with self.pool.connection() as conn:
+            self.signal_ids = dict(conn.execute("SELECT name, id FROM signals"))
+        self._watch = _connect_ro(path)
+        self._watch_lock = threading.Lock()
+        self._version = None
+
+    def close(self):
+        self.pool.close()
+        self._watch.close()
+
+    def data_version(self):
+        """Cambia cada vez que otra conexion (el escritor) confirma una transaccion."""
+        with self._watch_lock:
+            version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._version:
+                self._version = version
+                self.cache.clear()
+            return version
+
+    def signals(self):
+        return sorted(self.signal_ids)
+
+    def response(self, signals, t0, t1, points=1000, fmt="json"):
+        """(content_type, cuerpo) de una consulta, desde la cache si los datos no cambiaron."""
+        signals = tuple(dict.fromkeys(signals))
+        unknown = [s for s in signals if s not in self.signal_ids]
+        if unknown or not signals:
+            raise ValueError(f"Senales desconocidas: {unknown}" if unknown else "Falta signals")
+        if not (math.isfinite(t0) and math.isfinite(t1)):
+            raise ValueError("t0 y t1 deben ser numeros finitos")
+        if t1 <= t0:
+            raise ValueError("t1 debe ser mayor que t0")
+        if points < 1:
+            raise ValueError("points debe ser >= 1")
+        if fmt not in CONTENT_TYPES:
+            raise ValueError(f"Formato desconocido: {fmt} (json, arrow)")
+        key = (tuple(sorted(signals)), t0, t1, points, fmt)
+        version = self.data_version()
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == version:
+            return CONTENT_TYPES[fmt], cached[1]
+        body = self._query(signals, t0, t1, points, fmt)
+        self.cache.put(key, (version, body))
+        return CONTENT_TYPES[fmt], body
+
+    @timed("history_api_query")
+    def _query(self, signals, t0, t1, points, fmt):
+        with self.pool.connection() as conn:
+            result = read_series(conn, self.signal_ids, signals, t0, t1, points)
+        if fmt == "arrow":
+            return to_arrow(result)
+        return json.dumps(result).encode()
+
+
+def to_arrow(result):
+    """Stream Arrow IPC en formato largo: una fila por (senal, bucket)."""
+    import pyarrow as pa
+
+    names, ts, vmin, vmax, mean, count = [], [], [], [], [], []
+    for name, serie in result["data"].items():
+        names += [name] * len(serie["ts"])
+        ts += serie["ts"]
+        vmin += serie["min"]
+        vmax += serie["max"]
+        mean += serie["mean"]
+        count += serie["count"]
+    table = pa.table({
+        "signal": pa.array(names, pa.string()).dictionary_encode(),
+        "ts": pa.array(ts, pa.int64()),
+        "min": pa.array(vmin, pa.float64()),
+        "max": pa.array(vmax, pa.float64()),
+        "mean": pa.array(mean, pa.float64()),
+        "count": pa.array(count, pa.int64()),
+    }).replace_schema_metadata({"tier": result["tier"]})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class _HistoryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        service = self.server.service
+        with timer("history_api_request"):
+            try:
+                if url.path == "/history":
+                    content_type, body = service.response(
+                        params.get("signals", "").split(","),
+                        float(params["t0"]), float(params["t1"]),
+                        int(params.get("points", 1000)), params.get("format", "json"))
+                elif url.path == "/signals":
+                    content_type, body = CONTENT_TYPES["json"], json.dumps(service.signals()).encode()
+                else:
+                    self._send(404, CONTENT_TYPES["json"], b'{"error": "no encontrado"}')
+                    return
+            except (KeyError, ValueError) as e:
+                message = f"Falta el parametro {e}" if isinstance(e, KeyError) else str(e)
+                self._send(400, CONTENT_TYPES["json"], json.dumps({"error": message}).encode())
+                return
+            except sqlite3.Error as e:
+                # Base bloqueada, ausente o sin esquema todavia: respuesta en vez de cortar la conexion
+                log.warning("Consulta de historico fallida: %s", e)
+                self._send(500, CONTENT_TYPES["json"],
+                           json.dumps({"error": f"{type(e).__name__}: {e}"}).encode())
+                return
+        self._send(200, content_type, body)
+        get_registry().publish_if_due()
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(service, port=cfg.HISTORY_API_PORT, host="127.0.0.1"):
+    """Sirve la API en un hilo de fondo; devuelve el servidor (shutdown() para parar)."""
+    server = ThreadingHTTPServer((host, port), _HistoryHandler)
+    server.daemon_threads = True
+    server.service = service
+    threading.Thread(target=server.serve_forever, name="api_historico", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API de solo lectura del historico (JSON / Arrow IPC)")
+    parser.add_argument("--port", type=int, default=cfg.HISTORY_API_PORT)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--db", default=cfg.SQLITE_PATH)
+    args = parser.parse_args()
+    set_process_name("api_historico")
+    service = HistoryService(args.db)
+    server = serve(service, args.port, args.host)
+    print(f"✅ Historico en http://{args.host}:{server.server_address[1]}/history "
+          f"({len(service.signal_ids)} senales, {cfg.HISTORY_API_POOL} conexiones de solo lectura)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
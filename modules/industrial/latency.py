@@ -0,0 +1,66 @@
+"""
+Histogramas de latencia de buckets fijos (sin asignaciones por muestra).
+
+Pensados para lazos temporizados: registrar cuesta un bisect y un
+incremento, y los percentiles salen de los buckets.
+"""
+import bisect
+import threading
+
+# Limites superiores de los buckets, en ms (el ultimo bucket es "> 5000")
+BOUNDS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """Conteo por buckets + min/max/suma; percentiles aproximados al limite del bucket."""
+
+    def __init__(self, bounds_ms=BOUNDS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds_ms) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.min_ms = None
+            self.max_ms = None
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            if self.max_ms is None or ms > self.max_ms:
+                self.max_ms = ms
+            if self.min_ms is None or ms < self.min_ms:
+                self.min_ms = ms
+
+    def percentile(self, p):
+        """Limite superior del bucket que contiene el percentil p (0-100), en ms."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = p / 100.0 * self.count
+            seen = 0
+            for i, c in enumerate(self.counts):
+                seen += c
+                if seen >= rank and c:
+                    return min(self.bounds_ms[i], self.max_ms) if i < len(self.bounds_ms) else self.max_ms
+            return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+    def buckets(self):
+        """[(limite_ms, conteo)]; el ultimo limite es inf."""
+        with self._lock:
+            return list(zip(self.bounds_ms + (float("inf"),), self.counts))
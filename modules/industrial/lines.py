@@ -0,0 +1,103 @@
+"""
+Registro de lineas (galvanizado / unidades PSA): endpoint y mapa de registros por linea.
+
+Se arma desde LINEAS en config.py. Cada linea tiene su propio cliente
+Modbus (una conexion por PLC) y su BlockPoller. Sus datos se particionan
+por id (partition): snapshot, historian, segmentos, base diaria y bloque de
+estado propios, asi que consultar una linea no recorre los datos de otra.
+La linea principal (la primera) conserva las rutas de siempre.
+"""
+import functools
+import os
+from dataclasses import dataclass
+
+import config as cfg
+from modules.industrial.modbus_tcp import AsyncModbusClient
+from modules.industrial.poller import COIL_MAP, HOLDING_MAP, BlockPoller
+
+
+def register_map(direcciones=None, omitir=()):
+    """(holding_map, coil_map) con direcciones reemplazadas por campo y campos omitidos."""
+    direcciones = direcciones or {}
+    unknown = set(direcciones) - {name for name, *_ in HOLDING_MAP} - {name for name, _ in COIL_MAP}
+    if unknown:
+        raise ValueError(f"Campos desconocidos en direcciones: {sorted(unknown)}")
+    holding = tuple((name, direcciones.get(name, addr), escala, signed)
+                    for name, addr, escala, signed in HOLDING_MAP if name not in omitir)
+    coils = tuple((name, direcciones.get(name, addr)) for name, addr in COIL_MAP if name not in omitir)
+    return holding, coils
+
+
+def partition(path, line_id):
+    """Ruta propia de la linea: directorio/<id> o archivo_<id>.ext."""
+    root, ext = os.path.splitext(path)
+    if not ext:
+        return os.path.join(path, line_id)
+    return f"{root}_{line_id}{ext}"
+
+
+@dataclass(frozen=True)
+class Line:
+    id: str
+    ip: str
+    port: int = 502
+    slave_id: int = 1
+    holding_map: tuple = HOLDING_MAP
+    coil_map: tuple = COIL_MAP
+    principal: bool = False
+
+    def path(self, base):
+        return base if self.principal else partition(base, self.id)
+
+    @property
+    def shm_name(self):
+        return cfg.STATUS_SHM_NAME if self.principal else f"{cfg.STATUS_SHM_NAME}_{self.id}"
+
+    def has(self, *fields):
+        mapped = {name for name, *_ in self.holding_map} | {name for name, _ in self.coil_map}
+        return all(field in mapped for field in fields)
+
+    def client(self, timeout=3.0):
+        return AsyncModbusClient(self.ip, self.port, self.slave_id, timeout=timeout)
+
+    def poller(self):
+        return BlockPoller(self.holding_map, self.coil_map)
+
+
+def load_lines(lineas=None):
+    """Lineas definidas en LINEAS (la primera es la principal).
+
+    Las de config.py se arman una sola vez por proceso; un dict explicito
+    se arma en cada llamada.
+    """
+    if lineas is None:
+        return _configured_lines()
+    return _build_lines(lineas)
+
+
+@functools.lru_cache(maxsize=None)
+def _configured_lines():
+    return _build_lines(cfg.LINEAS)
+
+
+def _build_lines(lineas):
+    result = []
+    for i, (line_id, spec) in enumerate(lineas.items()):
+        holding, coils = register_map(spec.get("direcciones"), spec.get("omitir", ()))
+        result.append(Line(
+            id=line_id,
+            ip=spec["ip"],
+            port=spec.get("port", 502),
+            slave_id=spec.get("slave_id", 1),
+            holding_map=holding,
+            coil_map=coils,
+            principal=i == 0,
+        ))
+    return tuple(result)
+
+
+def get_line(line_id, lineas=None):
+    for line in load_lines(lineas):
+        if line.id == line_id:
+            return line
+    raise KeyError(f"Linea desconocida: {line_id}")
@@ -0,0 +1,282 @@
+"""
+Tiempos de las rutas calientes: hooks livianos, percentiles moviles y endpoint Prometheus.
+
+    with timer("modbus_read"): ...          # contexto
+    @timed("historian_write")               # decorador
+
+Con METRICS_ENABLED = False (o set_enabled(False)) timer() devuelve un
+contexto nulo compartido y timed() llama directo a la funcion: el costo es
+un if.
+
+Cada proceso (adquisicion, dashboard) guarda sus ultimas METRICS_WINDOW
+mediciones por operacion y publica un resumen en METRICS_DIR/<proceso>.json
+(reemplazo atomico, como el DataStore); un proceso sin set_process_name
+(benchmarks, scripts) mide pero no publica. El endpoint y el panel de
+diagnostico del sidebar leen todos los archivos:
+
+    python -m modules.industrial.metrics            # sirve /metrics en METRICS_PORT
+"""
+import argparse
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config as cfg
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+_enabled = cfg.METRICS_ENABLED
+
+
+def _quantile(ordered, q):
+    """Percentil con interpolacion lineal (igual a np.quantile) sobre valores ordenados."""
+    pos = q * (len(ordered) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+class Timing:
+    """Ventana circular de duraciones (s) + contador y suma acumulados.
+
+    Sin numpy: el dashboard importa este modulo antes del primer render y una
+    ventana de METRICS_WINDOW valores se ordena en microsegundos.
+    """
+
+    def __init__(self, window=cfg.METRICS_WINDOW):
+        self._values = array("d", bytes(8 * window))
+        self._next = 0
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._values[self._next] = seconds
+            self._next = (self._next + 1) % len(self._values)
+            self.count += 1
+            self.total += seconds
+
+    def summary(self):
+        with self._lock:
+            n = min(self.count, len(self._values))
+            window = sorted(self._values[:n])
+            count, total = self.count, self.total
+        result = {"count": count, "sum": total}
+        if n:
+            for q in QUANTILES:
+                result[f"p{int(q * 100)}"] = _quantile(window, q)
+            result["max"] = window[-1]
+        return result
+
+
+class MetricsRegistry:
+    """Tiempos de un proceso, por nombre de operacion."""
+
+    def __init__(self, process=None, directory=cfg.METRICS_DIR, window=cfg.METRICS_WINDOW):
+        self.process = process
+        self.directory = directory
+        self.window = window
+        self.timings = {}
+        self._lock = threading.Lock()
+        self._last_publish = 0.0
+
+    def timing(self, name):
+        timing = self.timings.get(name)
+        if timing is None:
+            with self._lock:
+                timing = self.timings.setdefault(name, Timing(self.window))
+        return timing
+
+    def observe(self, name, seconds):
+        self.timing(name).record(seconds)
+
+    def snapshot(self):
+        return {name: timing.summary() for name, timing in sorted(self.timings.items())}
+
+    def publish(self):
+        """Escribe el resumen del proceso en METRICS_DIR/<proceso>.json (nada si no tiene nombre)."""
+        if self.process is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.process}.json")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # varios hilos pueden publicar a la vez
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"process": self.process, "pid": os.getpid(), "published_at": time.time(),
+                       "timings": self.snapshot()}, f)
+        os.replace(tmp, path)
+        self._last_publish = time.monotonic()
+
+    def publish_if_due(self, interval_s=5.0):
+        if _enabled and time.monotonic() - self._last_publish >= interval_s:
+            self.publish()
+
+
+class _Timer:
+    __slots__ = ("timing", "start")
+
+    def __init__(self, timing):
+        self.timing = timing
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timing.record(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Registro unico por proceso."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
+
+
+def set_process_name(name):
+    """Nombre con el que este proceso publica sus metricas (adquisicion, dashboard, ...)."""
+    get_registry().process = name
+
+
+def timer(name):
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(get_registry().timing(name))
+
+
+def observe(name, seconds):
+    if _enabled:
+        get_registry().observe(name, seconds)
+
+
+def timed(name):
+    """Decorador: mide cada llamada a la funcion bajo `name`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                get_registry().observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+# LECTURA / EXPOSICION
+
+def read_all(directory=cfg.METRICS_DIR, max_age_s=300.0):
+    """{proceso: payload} de los procesos que publicaron en los ultimos max_age_s."""
+    result = {}
+    now = time.time()
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - payload.get("published_at", 0) <= max_age_s:
+            result[payload["process"]] = payload
+    return result
+
+
+def prometheus_text(payloads):
+    """Formato de exposicion de texto de Prometheus (tipo summary, en segundos)."""
+    lines = [
+        "# HELP sgi_duration_seconds Duracion de operaciones de las rutas calientes.",
+        "# TYPE sgi_duration_seconds summary",
+    ]
+    for process, payload in sorted(payloads.items()):
+        for op, s in payload["timings"].items():
+            labels = f'process="{process}",op="{op}"'
+            for q in QUANTILES:
+                key = f"p{int(q * 100)}"
+                if key in s:
+                    lines.append(f'sgi_duration_seconds{{{labels},quantile="{q}"}} {s[key]:.9g}')
+            lines.append(f"sgi_duration_seconds_sum{{{labels}}} {s['sum']:.9g}")
+            lines.append(f"sgi_duration_seconds_count{{{labels}}} {s['count']}")
+    lines.append("# TYPE sgi_metrics_published_timestamp gauge")
+    for process, payload in sorted(payloads.items()):
+        lines.append(f'sgi_metrics_published_timestamp{{process="{process}"}} {payload["published_at"]:.3f}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        registry = get_registry()
+        if _enabled and registry.timings:
+            registry.publish()
+        body = prometheus_text(read_all(registry.directory)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port=cfg.METRICS_PORT, host=cfg.METRICS_HOST):
+    """Sirve /metrics en un hilo de fondo; devuelve el servidor (shutdown() para parar)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metricas", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint de metricas (formato Prometheus)")
+    parser.add_argument("--port", type=int, default=cfg.METRICS_PORT)
+    parser.add_argument("--host", default=cfg.METRICS_HOST)
+    args = parser.parse_args()
+    set_process_name("endpoint")
+    server = serve(args.port, args.host)
+    print(f"✅ Metricas en http://{args.host}:{server.server_address[1]}/metrics")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
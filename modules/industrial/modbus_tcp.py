@@ -0,0 +1,338 @@
+"""
+Cliente Modbus TCP minimo y servidor sustituto (stand-in) para pruebas locales.
+
+Solo implementa las funciones que usa Cerebro SGI:
+    FC1  - Read Coils
+    FC3  - Read Holding Registers
+    FC6  - Write Single Register
+    FC16 - Write Multiple Registers
+"""
+import asyncio
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+FC_READ_COILS = 1
+FC_READ_HOLDING = 3
+FC_WRITE_REGISTER = 6
+FC_WRITE_REGISTERS = 16
+
+MAX_REGISTERS_PER_READ = 125   # limite del protocolo para FC3
+MAX_COILS_PER_READ = 2000      # limite del protocolo para FC1
+
+_MBAP = struct.Struct(">HHHB")  # transaction id, protocol id, length, unit id
+
+
+class ModbusError(Exception):
+    """Respuesta de excepcion Modbus o trama invalida."""
+
+
+def _recv_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Conexion Modbus cerrada por el equipo remoto")
+        buf += chunk
+    return buf
+
+
+def encode_request(transaction_id, unit_id, pdu):
+    """Antepone la cabecera MBAP a una PDU."""
+    return _MBAP.pack(transaction_id, 0, len(pdu) + 1, unit_id) + pdu
+
+
+def _check_pdu(pdu, function, min_len):
+    """Valida codigo de funcion, excepcion y largo minimo de una PDU de respuesta."""
+    if not pdu:
+        raise ModbusError(f"Respuesta FC{function} vacia")
+    if pdu[0] & 0x80:
+        code = pdu[1] if len(pdu) > 1 else None
+        raise ModbusError(f"Excepcion Modbus FC{pdu[0] & 0x7F}: codigo {code}")
+    if pdu[0] != function:
+        raise ModbusError(f"Respuesta FC{pdu[0]} a una peticion FC{function}")
+    if len(pdu) < min_len:
+        raise ModbusError(f"Respuesta FC{function} truncada: {len(pdu)} bytes, minimo {min_len}")
+
+
+def decode_registers(pdu, count):
+    """Extrae `count` registros uint16 de una respuesta FC3."""
+    _check_pdu(pdu, FC_READ_HOLDING, 2 + 2 * count)
+    if pdu[1] != 2 * count:
+        raise ModbusError(f"Respuesta FC3 con {pdu[1]} bytes, esperados {2 * count}")
+    return list(struct.unpack(f">{count}H", pdu[2:2 + 2 * count]))
+
+
+def decode_coils(pdu, count):
+    """Extrae `count` bits de una respuesta FC1 (LSB primero)."""
+    n_bytes = (count + 7) // 8
+    _check_pdu(pdu, FC_READ_COILS, 2 + n_bytes)
+    if pdu[1] != n_bytes:
+        raise ModbusError(f"Respuesta FC1 con {pdu[1]} bytes, esperados {n_bytes}")
+    data = pdu[2:2 + n_bytes]
+    return [bool(data[i // 8] >> (i % 8) & 1) for i in range(count)]
+
+
+def check_write_response(pdu, function=FC_WRITE_REGISTERS):
+    _check_pdu(pdu, function, 5)
+
+
+class ModbusTcpClient:
+    """Cliente Modbus TCP sincrono con una sola conexion persistente."""
+
+    def __init__(self, host, port=502, unit_id=1, timeout=3.0):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self.request_count = 0
+        self._sock = None
+        self._tid = 0
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def connect(self):
+        if self._sock is None:
+            self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, pdu):
+        self.connect()
+        self._tid = (self._tid + 1) & 0xFFFF
+        self.request_count += 1
+        try:
+            self._sock.sendall(encode_request(self._tid, self.unit_id, pdu))
+            tid, _, length, _ = _MBAP.unpack(_recv_exact(self._sock, _MBAP.size))
+            body = _recv_exact(self._sock, length - 1) if length else None
+        except OSError:
+            self.close()
+            raise
+        if body is None:
+            self.close()
+            raise ModbusError("Cabecera MBAP con largo 0")
+        if tid != self._tid:
+            self.close()
+            raise ModbusError(f"Transaction id inesperado: {tid} != {self._tid}")
+        return body
+
+    def read_holding_registers(self, address, count):
+        pdu = self._request(struct.pack(">BHH", FC_READ_HOLDING, address, count))
+        return decode_registers(pdu, count)
+
+    def read_coils(self, address, count):
+        pdu = self._request(struct.pack(">BHH", FC_READ_COILS, address, count))
+        return decode_coils(pdu, count)
+
+    def write_register(self, address, value):
+        check_write_response(self._request(struct.pack(">BHH", FC_WRITE_REGISTER, address, value & 0xFFFF)),
+                             FC_WRITE_REGISTER)
+
+    def write_registers(self, address, values):
+        payload = struct.pack(f">{len(values)}H", *(v & 0xFFFF for v in values))
+        pdu = struct.pack(">BHHB", FC_WRITE_REGISTERS, address, len(values), len(payload)) + payload
+        check_write_response(self._request(pdu))
+
+
+class AsyncModbusClient:
+    """Variante asyncio de ModbusTcpClient (una conexion, peticiones serializadas)."""
+
+    def __init__(self, host, port=502, unit_id=1, timeout=3.0):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self.request_count = 0
+        self._reader = None
+        self._writer = None
+        self._tid = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    async def connect(self):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+            sock = self._writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self
+
+    async def close(self):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _exchange(self, pdu):
+        self._writer.write(encode_request(self._tid, self.unit_id, pdu))
+        await self._writer.drain()
+        tid, _, length, _ = _MBAP.unpack(await self._reader.readexactly(_MBAP.size))
+        if not length:
+            raise ModbusError("Cabecera MBAP con largo 0")
+        body = await self._reader.readexactly(length - 1)
+        if tid != self._tid:
+            raise ModbusError(f"Transaction id inesperado: {tid} != {self._tid}")
+        return body
+
+    async def _request(self, pdu):
+        async with self._lock:
+            await self.connect()
+            self._tid = (self._tid + 1) & 0xFFFF
+            self.request_count += 1
+            try:
+                return await asyncio.wait_for(self._exchange(pdu), self.timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ModbusError):
+                await self.close()
+                raise
+
+    async def read_holding_registers(self, address, count):
+        pdu = await self._request(struct.pack(">BHH", FC_READ_HOLDING, address, count))
+        return decode_registers(pdu, count)
+
+    async def read_coils(self, address, count):
+        pdu = await self._request(struct.pack(">BHH", FC_READ_COILS, address, count))
+        return decode_coils(pdu, count)
+
+    async def write_register(self, address, value):
+        check_write_response(await self._request(struct.pack(">BHH", FC_WRITE_REGISTER, address, value & 0xFFFF)),
+                             FC_WRITE_REGISTER)
+
+    async def write_registers(self, address, values):
+        payload = struct.pack(f">{len(values)}H", *(v & 0xFFFF for v in values))
+        pdu = struct.pack(">BHHB", FC_WRITE_REGISTERS, address, len(values), len(payload)) + payload
+        check_write_response(await self._request(pdu))
+
+
+# SERVIDOR SUSTITUTO (PLC simulado en localhost)
+
+class _StandInHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server.standin
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with server._lock:
+            server.active_connections += 1
+            server.total_connections += 1
+        try:
+            self._serve(server, sock)
+        finally:
+            with server._lock:
+                server.active_connections -= 1
+
+    def _serve(self, server, sock):
+        while True:
+            try:
+                tid, _, length, unit = _MBAP.unpack(_recv_exact(sock, _MBAP.size))
+                pdu = _recv_exact(sock, length - 1)
+            except (ConnectionError, OSError):
+                return
+            reply = server.handle_pdu(pdu)
+            if server.latency_s:
+                time.sleep(server.latency_s)
+            try:
+                sock.sendall(encode_request(tid, unit, reply))
+            except OSError:
+                return
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ModbusStandInServer:
+    """
+    PLC Modbus TCP simulado para pruebas y benchmarks.
+
+    Las direcciones son offsets de protocolo (0 = 40001 / coil 1).
+    `latency_s` simula el tiempo de respuesta de un PLC cargado.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency_s=0.0):
+        self.holding = [0] * 65536
+        self.coils = [False] * 65536
+        self.latency_s = latency_s
+        self.request_count = 0
+        self.active_connections = 0
+        self.total_connections = 0
+        self.writes = []
+        self._lock = threading.Lock()
+        self._server = _ThreadingServer((host, port), _StandInHandler)
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle_pdu(self, pdu):
+        fc = pdu[0]
+        with self._lock:
+            self.request_count += 1
+            if fc == FC_READ_HOLDING:
+                address, count = struct.unpack(">HH", pdu[1:5])
+                if not 1 <= count <= MAX_REGISTERS_PER_READ or address + count > 65536:
+                    return bytes([fc | 0x80, 3])
+                values = self.holding[address:address + count]
+                return struct.pack(f">BB{count}H", fc, 2 * count, *values)
+            if fc == FC_READ_COILS:
+                address, count = struct.unpack(">HH", pdu[1:5])
+                if not 1 <= count <= MAX_COILS_PER_READ or address + count > 65536:
+                    return bytes([fc | 0x80, 3])
+                packed = bytearray((count + 7) // 8)
+                for i, bit in enumerate(self.coils[address:address + count]):
+                    if bit:
+                        packed[i // 8] |= 1 << (i % 8)
+                return bytes([fc, len(packed)]) + bytes(packed)
+            if fc == FC_WRITE_REGISTER:
+                address, value = struct.unpack(">HH", pdu[1:5])
+                self.holding[address] = value
+                self.writes.append((address, value))
+                return pdu[:5]
+            if fc == FC_WRITE_REGISTERS:
+                address, count = struct.unpack(">HH", pdu[1:5])
+                values = struct.unpack(f">{count}H", pdu[6:6 + 2 * count])
+                self.holding[address:address + count] = values
+                self.writes.extend(zip(range(address, address + count), values))
+                return pdu[:5]
+            return bytes([fc | 0x80, 1])
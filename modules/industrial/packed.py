@@ -0,0 +1,147 @@
+"""
+Muestras crudas empaquetadas: registros de 16 bits + coils como bits.
+
+Cada lectura del PLC ocupa un registro RECORD de 53 bytes (poller.py):
+
+    ts     int64      epoch en ms
+    mask   uint32     bit i = registro i presente (mapas parciales, p. ej. PSA)
+    regs   uint16[20] registros crudos en el orden de HOLDING_MAP
+    coils  uint8      bit j = coil j en el orden de COIL_MAP
+
+Un lote es un array NumPy estructurado con el mismo layout (RAW_DTYPE), asi
+que bytes concatenados se leen sin copia con np.frombuffer. Los factores
+ESCALA_* se aplican recien al leer una columna, vectorizados sobre todo el
+lote; los registros que faltan salen como NaN.
+"""
+import numpy as np
+
+from modules.industrial.poller import COIL_BITS, COIL_MAP, HOLDING_MAP, RECORD, REGISTER_SLOTS
+
+RAW_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("mask", "<u4"),
+    ("regs", "<u2", (len(HOLDING_MAP),)),
+    ("coils", "u1"),
+])
+assert RAW_DTYPE.itemsize == RECORD.size
+
+FIELDS = tuple(name for name, *_ in HOLDING_MAP) + tuple(name for name, _ in COIL_MAP)
+FULL_MASK = (1 << len(HOLDING_MAP)) - 1
+_SCALES = {name: (escala, signed) for name, _, escala, signed in HOLDING_MAP}
+
+
+class PackedSamples:
+    """Lote de muestras crudas; columnas en unidades de ingenieria al leerlas."""
+
+    def __init__(self, records):
+        self.records = records
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Vista sin copia sobre registros RECORD concatenados (bytes, bytearray, memoryview)."""
+        return cls(np.frombuffer(data, dtype=RAW_DTYPE))
+
+    @classmethod
+    def of(cls, data):
+        """Acepta PackedSamples, un array RAW_DTYPE o bytes."""
+        if isinstance(data, cls):
+            return data
+        if isinstance(data, np.ndarray):
+            return cls(data)
+        return cls.from_bytes(data)
+
+    @classmethod
+    def empty(cls, n=0):
+        return cls(np.zeros(n, dtype=RAW_DTYPE))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return PackedSamples(self.records[index])
+
+    @property
+    def nbytes(self):
+        return self.records.nbytes
+
+    @property
+    def ts(self):
+        """Timestamps en epoch ms (int64, vista)."""
+        return self.records["ts"]
+
+    def column(self, name, dtype=np.float64):
+        """
+        Una senal escalada. Se calcula en float64 (igual que BlockPoller.decode)
+        y despues se convierte a `dtype`.
+        """
+        if name in COIL_BITS:
+            return ((self.records["coils"] >> COIL_BITS[name]) & 1).astype(dtype)
+        slot = REGISTER_SLOTS[name]
+        escala, signed = _SCALES[name]
+        raw = self.records["regs"][:, slot]
+        if signed:
+            raw = raw.view(np.int16)
+        values = raw * escala
+        mask = self.records["mask"]
+        if len(mask) and not (mask[0] == FULL_MASK and (mask == FULL_MASK).all()):
+            values[(mask & (1 << slot)) == 0] = np.nan
+        return values.astype(dtype, copy=False)
+
+    def columns(self, names=FIELDS, dtype=np.float64):
+        return {name: self.column(name, dtype) for name in names}
+
+    def rows(self, names=FIELDS):
+        """Dicts {"timestamp", senal: valor} para los exportadores JSON (NaN -> None)."""
+        cols = [(name, self.column(name).tolist()) for name in names]
+        ts = (self.ts / 1000.0).tolist()
+        return [
+            {"timestamp": t, **{name: (None if c[i] != c[i] else c[i]) for name, c in cols}}
+            for i, t in enumerate(ts)
+        ]
+
+
+def pack_columns(ts, values):
+    """
+    Inverso vectorizado de PackedSamples.column: ts (epoch s) y {campo: array}
+    en unidades de ingenieria -> array RAW_DTYPE. Faltantes o NaN -> fuera de la mascara.
+    """
+    ts = np.asarray(ts, dtype=np.float64)
+    records = np.zeros(len(ts), dtype=RAW_DTYPE)
+    records["ts"] = (ts * 1000).astype(np.int64)
+    mask = np.zeros(len(ts), dtype=np.uint32)
+    for name, _, escala, signed in HOLDING_MAP:
+        if name not in values:
+            continue
+        v = np.asarray(values[name], dtype=np.float64)
+        present = np.isfinite(v)
+        raw = np.rint(np.where(present, v, 0.0) / escala)
+        if signed:
+            raw = np.clip(raw, -0x8000, 0x7FFF).astype(np.int16).view(np.uint16)
+        else:
+            raw = np.clip(raw, 0, 0xFFFF).astype(np.uint16)
+        records["regs"][:, REGISTER_SLOTS[name]] = raw
+        mask |= present.astype(np.uint32) << REGISTER_SLOTS[name]
+    records["mask"] = mask
+    coils = np.zeros(len(ts), dtype=np.uint8)
+    for name, bit in COIL_BITS.items():
+        if name in values:
+            coils |= (np.asarray(values[name]) == 1).astype(np.uint8) << bit
+    records["coils"] = coils
+    return records
+
+
+def pack_snapshot(snapshot):
+    """Un snapshot (dict o PlantSnapshot) como registro RECORD (bytes)."""
+    if hasattr(snapshot, "as_dict"):
+        snapshot = snapshot.as_dict()
+    return pack_columns([snapshot["timestamp"]],
+                        {name: [_num(snapshot.get(name))] for name in FIELDS}).tobytes()
+
+
+def record_ts(record):
+    """Timestamp (epoch ms) de un registro RECORD sin desempaquetarlo."""
+    return int.from_bytes(record[:8], "little", signed=True)
+
+
+def _num(value):
+    return np.nan if value is None else float(value)
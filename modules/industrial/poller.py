@@ -0,0 +1,216 @@
+"""
+Lectura por bloques del mapa Modbus del PLC Druids.
+
+Agrupa las direcciones ADDR_* de config.py en el menor numero de peticiones
+FC3 (holding registers) y FC1 (coils), y decodifica todo en una sola pasada
+aplicando los factores ESCALA_*.
+
+Para historizar y exportar, pack() guarda la misma lectura sin escalar en
+un registro RECORD de 53 bytes (ver modules/industrial/packed.py).
+"""
+import struct
+import time
+from dataclasses import dataclass, asdict
+
+import config as cfg
+from modules.industrial.metrics import timer
+from modules.industrial.modbus_tcp import MAX_COILS_PER_READ, MAX_REGISTERS_PER_READ
+
+HOLDING_BASE = 40001
+COIL_BASE = 1
+
+# MAPA DE LECTURA: (campo, direccion, escala, con_signo)
+HOLDING_MAP = (
+    ("velocidad_real", cfg.ADDR_VELOCIDAD_REAL, cfg.ESCALA_VELOCIDAD, False),
+    ("velocidad_setpoint", cfg.ADDR_VELOCIDAD_SETPOINT, cfg.ESCALA_VELOCIDAD, False),
+    ("temp_zinc", cfg.ADDR_TEMP_ZINC, cfg.ESCALA_TEMP, False),
+    ("temp_horno", cfg.ADDR_TEMP_HORNO, cfg.ESCALA_TEMP, False),
+    ("presion_jet_wipe", cfg.ADDR_PRESION_JET_WIPE, cfg.ESCALA_PRESION, False),
+    ("flujo_jet_wipe", cfg.ADDR_FLUJO_JET_WIPE, cfg.ESCALA_FLUJO, False),
+    ("nivel_zinc", cfg.ADDR_NIVEL_ZINC, cfg.ESCALA_PERCENT, False),
+    ("totalizador_metros", cfg.ADDR_TOTALIZADOR_METROS, 1.0, False),
+    ("tipo_producto", cfg.ADDR_TIPO_PRODUCTO, 1.0, False),
+    ("flujo_n2", cfg.ADDR_FLUJO_N2, cfg.ESCALA_FLUJO, False),
+    ("presion_n2", cfg.ADDR_PRESION_N2, cfg.ESCALA_PRESION, False),
+    ("pureza_n2", cfg.ADDR_PUREZA_N2, cfg.ESCALA_PUREZA, False),
+    ("dew_point_n2", cfg.ADDR_DEW_POINT_N2, cfg.ESCALA_TEMP, True),
+    ("fg_flujo_total", cfg.ADDR_FG_FLUJO_TOTAL, cfg.ESCALA_FLUJO, False),
+    ("fg_percent_n2", cfg.ADDR_FG_PERCENT_N2, cfg.ESCALA_PERCENT, False),
+    ("fg_percent_h2", cfg.ADDR_FG_PERCENT_H2, cfg.ESCALA_PERCENT, False),
+    ("fg_presion", cfg.ADDR_FG_PRESION, cfg.ESCALA_PRESION, False),
+    ("fg_temp_mezclador", cfg.ADDR_FG_TEMP_MEZCLADOR, cfg.ESCALA_TEMP, False),
+    ("fg_flujo_n2", cfg.ADDR_FG_FLUJO_N2, cfg.ESCALA_FLUJO, False),
+    ("fg_flujo_h2", cfg.ADDR_FG_FLUJO_H2, cfg.ESCALA_FLUJO, False),
+)
+
+COIL_MAP = (
+    ("linea_en_marcha", cfg.ADDR_ESTADO_LINEA),
+    ("alarma_horno", cfg.ADDR_ALARMA_HORNO),
+    ("alarma_zinc", cfg.ADDR_ALARMA_ZINC),
+    ("alarma_psa", cfg.ADDR_ALARMA_PSA),
+    ("alarma_fg_h2_high", cfg.ADDR_ALARMA_FG_H2_HIGH),
+    ("alarma_fg_h2_low", cfg.ADDR_ALARMA_FG_H2_LOW),
+    ("alarma_fg_presion", cfg.ADDR_ALARMA_FG_PRESION),
+)
+
+
+@dataclass(frozen=True)
+class PlantSnapshot:
+    """Lectura completa del PLC en un ciclo, en unidades de ingenieria."""
+    timestamp: float
+    velocidad_real: float
+    velocidad_setpoint: float
+    temp_zinc: float
+    temp_horno: float
+    presion_jet_wipe: float
+    flujo_jet_wipe: float
+    nivel_zinc: float
+    totalizador_metros: float
+    tipo_producto: float
+    flujo_n2: float
+    presion_n2: float
+    pureza_n2: float
+    dew_point_n2: float
+    fg_flujo_total: float
+    fg_percent_n2: float
+    fg_percent_h2: float
+    fg_presion: float
+    fg_temp_mezclador: float
+    fg_flujo_n2: float
+    fg_flujo_h2: float
+    linea_en_marcha: bool
+    alarma_horno: bool
+    alarma_zinc: bool
+    alarma_psa: bool
+    alarma_fg_h2_high: bool
+    alarma_fg_h2_low: bool
+    alarma_fg_presion: bool
+
+    def as_dict(self):
+        return asdict(self)
+
+
+_COIL_FIELDS = {name for name, _ in COIL_MAP}
+
+# REGISTRO EMPAQUETADO: ts (ms), mascara de registros presentes, registros crudos
+# en el orden de HOLDING_MAP y coils como bits en el orden de COIL_MAP
+RECORD = struct.Struct(f"<qI{len(HOLDING_MAP)}HB")
+REGISTER_SLOTS = {name: i for i, (name, *_) in enumerate(HOLDING_MAP)}
+COIL_BITS = {name: i for i, (name, _) in enumerate(COIL_MAP)}
+
+
+def plan_blocks(offsets, max_count, max_gap=0):
+    """
+    Agrupa offsets en bloques contiguos (inicio, cantidad).
+
+    Direcciones separadas por hasta `max_gap` huecos se leen en el mismo bloque
+    (los huecos se descartan al decodificar); ningun bloque supera `max_count`.
+    """
+    blocks = []
+    for offset in sorted(set(offsets)):
+        if blocks:
+            start, count = blocks[-1]
+            end = start + count
+            if offset - end <= max_gap and offset - start < max_count:
+                blocks[-1] = (start, offset - start + 1)
+                continue
+        blocks.append((offset, 1))
+    return blocks
+
+
+class BlockPoller:
+    """Lee el mapa completo del PLC con el minimo de peticiones Modbus."""
+
+    def __init__(self, holding_map=HOLDING_MAP, coil_map=COIL_MAP, max_gap=0):
+        self.holding_map = holding_map
+        self.coil_map = coil_map
+        self.holding_blocks = plan_blocks(
+            [addr - HOLDING_BASE for _, addr, _, _ in holding_map], MAX_REGISTERS_PER_READ, max_gap
+        )
+        self.coil_blocks = plan_blocks(
+            [addr - COIL_BASE for _, addr in coil_map], MAX_COILS_PER_READ, max_gap
+        )
+        # Decodificacion precalculada: (campo, bloque, indice, escala, con_signo)
+        self._holding_plan = [
+            (name, *self._locate(addr - HOLDING_BASE, self.holding_blocks), escala, signed)
+            for name, addr, escala, signed in holding_map
+        ]
+        self._coil_plan = [
+            (name, *self._locate(addr - COIL_BASE, self.coil_blocks))
+            for name, addr in coil_map
+        ]
+        # Empaquetado: (posicion en RECORD, bloque, indice) / (bit, bloque, indice)
+        self._raw_plan = [
+            (REGISTER_SLOTS[name], *self._locate(addr - HOLDING_BASE, self.holding_blocks))
+            for name, addr, _, _ in holding_map
+        ]
+        self._bit_plan = [
+            (1 << COIL_BITS[name], *self._locate(addr - COIL_BASE, self.coil_blocks))
+            for name, addr in coil_map
+        ]
+        self._mask = sum(1 << slot for slot, _, _ in self._raw_plan)
+        # Campos que este PLC no tiene (mapa parcial, p. ej. unidad PSA): NaN / False
+        mapped = {name for name, *_ in holding_map} | {name for name, _ in coil_map}
+        self._missing = {name: (False if name in _COIL_FIELDS else float("nan"))
+                         for name in PlantSnapshot.__dataclass_fields__ if name != "timestamp" and name not in mapped}
+
+    @staticmethod
+    def _locate(offset, blocks):
+        for i, (start, count) in enumerate(blocks):
+            if start <= offset < start + count:
+                return i, offset - start
+        raise ValueError(f"Offset {offset} fuera de los bloques planificados")
+
+    @property
+    def requests_per_cycle(self):
+        return len(self.holding_blocks) + len(self.coil_blocks)
+
+    def decode(self, register_blocks, coil_blocks, timestamp=None):
+        """Convierte los bloques crudos en un PlantSnapshot."""
+        values = dict(self._missing)
+        for name, block, index, escala, signed in self._holding_plan:
+            raw = register_blocks[block][index]
+            if signed and raw >= 0x8000:
+                raw -= 0x10000
+            values[name] = raw * escala
+        for name, block, index in self._coil_plan:
+            values[name] = bool(coil_blocks[block][index])
+        return PlantSnapshot(timestamp=time.time() if timestamp is None else timestamp, **values)
+
+    def pack(self, register_blocks, coil_blocks, timestamp=None):
+        """Los bloques crudos como un registro RECORD (bytes), sin aplicar escalas."""
+        regs = [0] * len(REGISTER_SLOTS)
+        for slot, block, index in self._raw_plan:
+            regs[slot] = register_blocks[block][index]
+        bits = 0
+        for bit, block, index in self._bit_plan:
+            if coil_blocks[block][index]:
+                bits |= bit
+        ts = time.time() if timestamp is None else timestamp
+        return RECORD.pack(int(ts * 1000), self._mask, *regs, bits)
+
+    def read(self, client):
+        """Bloques crudos (registros, coils) con un cliente sincrono (ModbusTcpClient)."""
+        with timer("modbus_read"):
+            registers = [client.read_holding_registers(start, count) for start, count in self.holding_blocks]
+            coils = [client.read_coils(start, count) for start, count in self.coil_blocks]
+        return registers, coils
+
+    async def read_async(self, client):
+        """Bloques crudos (registros, coils) con un cliente asyncio (AsyncModbusClient)."""
+        with timer("modbus_read"):
+            registers = [await client.read_holding_registers(start, count) for start, count in self.holding_blocks]
+            coils = [await client.read_coils(start, count) for start, count in self.coil_blocks]
+        return registers, coils
+
+    def poll(self, client):
+        """Un ciclo de lectura con un cliente sincrono (ModbusTcpClient)."""
+        registers, coils = self.read(client)
+        with timer("decode"):
+            return self.decode(registers, coils)
+
+    async def poll_async(self, client):
+        """Un ciclo de lectura con un cliente asyncio (AsyncModbusClient)."""
+        registers, coils = await self.read_async(client)
+        with timer("decode"):
+            return self.decode(registers, coils)
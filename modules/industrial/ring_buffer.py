@@ -0,0 +1,177 @@
+"""
+Historial en memoria para los graficos en vivo.
+
+Buffer circular columnar: un array float32 preasignado por senal y un
+array int64 compartido de timestamps (epoch en ms). Cada muestra se
+escribe dos veces (posicion i e i + capacidad), de modo que cualquier
+ventana de las ultimas N muestras es un slice contiguo (vista sin copia).
+
+El dashboard usa PackedRingBuffer (data_pipeline.py): guarda los registros
+crudos (RAW_DTYPE, 53 bytes por muestra en lugar de 4 por senal) y escala
+solo las columnas que se leen, asi que cada ventana es una copia nueva.
+RingBuffer ya no tiene uso en produccion; se conserva como referencia para
+benchmarks/bench_ring_buffer.py y bench_packed.py.
+"""
+import threading
+
+import numpy as np
+
+import config as cfg
+from modules.industrial.packed import FIELDS, RAW_DTYPE, PackedSamples, pack_snapshot
+
+
+class RingBuffer:
+    """Buffer circular de capacidad fija; append O(1), ventanas sin copia."""
+
+    def __init__(self, signals, capacity=cfg.MAX_HISTORY_POINTS):
+        if capacity <= 0:
+            raise ValueError("capacity debe ser > 0")
+        self.signals = tuple(signals)
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, dtype=np.int64)
+        self._data = {name: np.full(2 * capacity, np.nan, dtype=np.float32) for name in self.signals}
+        self._count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def nbytes(self):
+        return self._ts.nbytes + sum(a.nbytes for a in self._data.values())
+
+    def append(self, timestamp, values):
+        """Agrega una muestra. `values` es un dict senal -> valor (faltantes = NaN)."""
+        i = self._count % self.capacity
+        j = i + self.capacity
+        ts = int(timestamp * 1000)
+        with self.lock:
+            self._ts[i] = self._ts[j] = ts
+            for name, column in self._data.items():
+                v = values.get(name, np.nan)
+                column[i] = column[j] = v
+            self._count += 1
+
+    def append_snapshot(self, snapshot):
+        """Agrega un snapshot de planta (dict con 'timestamp')."""
+        self.append(snapshot["timestamp"], snapshot)
+
+    def _bounds(self, n):
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self._count % self.capacity + self.capacity
+        return end - n, end
+
+    def window(self, n=None, signals=None, copy=False):
+        """
+        Ultimas `n` muestras como (timestamps datetime64[ms], {senal: float32}).
+
+        Sin `copy` son vistas de solo lectura sobre el buffer: validas hasta la
+        siguiente vuelta completa del buffer. Usar copy=True si otro hilo
+        sigue agregando mientras se consumen.
+        """
+        with self.lock:
+            start, end = self._bounds(n)
+            ts = self._ts[start:end].view("datetime64[ms]")
+            cols = {name: self._data[name][start:end] for name in (signals or self.signals)}
+            if copy:
+                return ts.copy(), {name: c.copy() for name, c in cols.items()}
+        ts.flags.writeable = False
+        for c in cols.values():
+            c.flags.writeable = False
+        return ts, cols
+
+    def since(self, timestamp, signals=None, copy=False):
+        """Muestras con timestamp >= `timestamp` (epoch en segundos)."""
+        with self.lock:
+            start, end = self._bounds(None)
+            offset = int(np.searchsorted(self._ts[start:end], int(timestamp * 1000), side="left"))
+        return self.window(end - start - offset, signals, copy)
+
+    def latest(self):
+        """Ultima muestra como dict, o None si esta vacio."""
+        if not self._count:
+            return None
+        with self.lock:
+            _, end = self._bounds(1)
+            row = {name: float(c[end - 1]) for name, c in self._data.items()}
+            row["timestamp"] = int(self._ts[end - 1]) / 1000.0
+        return row
+
+
+class PackedRingBuffer:
+    """Buffer circular de registros crudos; misma interfaz de lectura que RingBuffer."""
+
+    def __init__(self, capacity=cfg.MAX_HISTORY_POINTS):
+        if capacity <= 0:
+            raise ValueError("capacity debe ser > 0")
+        self.signals = FIELDS
+        self.capacity = capacity
+        self._records = np.zeros(2 * capacity, dtype=RAW_DTYPE)
+        self._count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def nbytes(self):
+        return self._records.nbytes
+
+    def append_records(self, data):
+        """Agrega registros RECORD (bytes, array RAW_DTYPE o PackedSamples) en orden."""
+        records = PackedSamples.of(data).records[-self.capacity:]
+        with self.lock:
+            i = self._count % self.capacity
+            first = min(len(records), self.capacity - i)
+            for lo, hi, at in ((0, first, i), (first, len(records), 0)):
+                if hi > lo:
+                    self._records[at:at + hi - lo] = records[lo:hi]
+                    self._records[at + self.capacity:at + self.capacity + hi - lo] = records[lo:hi]
+            self._count += len(records)
+
+    def append(self, timestamp, values):
+        self.append_snapshot({**values, "timestamp": timestamp})
+
+    def append_snapshot(self, snapshot):
+        """Agrega un snapshot de planta (dict con 'timestamp'); se empaqueta al guardarlo."""
+        self.append_records(pack_snapshot(snapshot))
+
+    def _bounds(self, n):
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self._count % self.capacity + self.capacity
+        return end - n, end
+
+    def samples(self, n=None):
+        """Copia de las ultimas `n` muestras como PackedSamples."""
+        with self.lock:
+            start, end = self._bounds(n)
+            return PackedSamples(self._records[start:end].copy())
+
+    def window(self, n=None, signals=None, copy=False):
+        """
+        Ultimas `n` muestras como (timestamps datetime64[ms], {senal: float32}).
+
+        Las columnas se escalan al pedirlas, asi que siempre son arrays nuevos;
+        `copy` se acepta por compatibilidad con RingBuffer.
+        """
+        with self.lock:
+            start, end = self._bounds(n)
+            samples = PackedSamples(self._records[start:end])
+            ts = samples.ts.copy().view("datetime64[ms]")
+            cols = samples.columns(signals or self.signals, np.float32)
+        return ts, cols
+
+    def since(self, timestamp, signals=None, copy=False):
+        """Muestras con timestamp >= `timestamp` (epoch en segundos)."""
+        with self.lock:
+            start, end = self._bounds(None)
+            offset = int(np.searchsorted(self._records["ts"][start:end], int(timestamp * 1000), side="left"))
+        return self.window(end - start - offset, signals, copy)
+
+    def latest(self):
+        """Ultima muestra como dict, o None si esta vacio."""
+        if not self._count:
+            return None
+        return self.samples(1).rows()[0]
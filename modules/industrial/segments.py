@@ -0,0 +1,257 @@
+"""
+Archivo historico columnar en segmentos Arrow IPC (reemplaza el CSV de CSV_PATH).
+
+Un segmento por hora (SEGMENT_ROTATE_S) en SEGMENTS_DIR:
+    seg_<inicio>.arrows  - segmento abierto, formato stream, se agrega por lotes
+    seg_<inicio>.arrow   - segmento cerrado, formato file; los metadatos del
+                           esquema (footer) guardan t_min/t_max y min/max por
+                           columna para descartar segmentos sin leerlos
+
+Las lecturas por rango abren los segmentos con memory map y solo tocan los
+que se solapan con el rango pedido.
+
+Exportar a CSV:
+    python -m modules.industrial.segments export-csv --desde 2025-01-01 --hasta 2025-02-01
+"""
+import argparse
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+
+import config as cfg
+from modules.industrial.historian import SIGNALS
+from modules.industrial.packed import PackedSamples, record_ts
+
+INDEX_KEY = b"sgi_index"
+
+
+def segment_schema(signals=SIGNALS, metadata=None):
+    fields = [pa.field("ts", pa.int64())] + [pa.field(name, pa.float32()) for name in signals]
+    return pa.schema(fields, metadata=metadata)
+
+
+def _segment_start(ts_ms, rotate_s):
+    return ts_ms // 1000 // rotate_s * rotate_s
+
+
+class SegmentWriter:
+    """Escribe snapshots en segmentos rotativos; agrega al disco en lotes."""
+
+    def __init__(self, root=cfg.SEGMENTS_DIR, signals=SIGNALS, rotate_s=cfg.SEGMENT_ROTATE_S, batch_size=12):
+        self.root = root
+        self.signals = tuple(signals)
+        self.rotate_s = rotate_s
+        self.batch_size = batch_size
+        self.schema = segment_schema(self.signals)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_raw = bytearray()
+        self._current = None   # (inicio, writer, sink)
+        os.makedirs(root, exist_ok=True)
+        for path in glob.glob(os.path.join(root, "seg_*.arrows")):
+            finalize_segment(path)
+
+    def write_snapshot(self, snapshot):
+        if hasattr(snapshot, "as_dict"):
+            snapshot = snapshot.as_dict()
+        with self._lock:
+            ts_ms = int(snapshot["timestamp"] * 1000)
+            start = _segment_start(ts_ms, self.rotate_s)
+            if self._current is not None and start != self._current[0]:
+                self._flush_pending()
+                self._close_current()
+            self._pending.append((ts_ms, snapshot))
+            if len(self._pending) >= self.batch_size:
+                self._flush_pending()
+
+    def write_record(self, record):
+        """Agrega un registro crudo RECORD (BlockPoller.pack); se escala al escribir el lote."""
+        with self._lock:
+            start = _segment_start(record_ts(record), self.rotate_s)
+            if self._current is not None and start != self._current[0]:
+                self._flush_pending()
+                self._close_current()
+            self._pending_raw += record
+            if len(self._pending_raw) >= self.batch_size * len(record):
+                self._flush_pending()
+
+    def write_records(self, data):
+        """Escritura masiva de registros crudos ordenados (bytes, array RAW_DTYPE o PackedSamples)."""
+        samples = PackedSamples.of(data)
+        self.write_rows(samples.ts, samples.columns(self.signals, np.float32))
+
+    def write_rows(self, ts_ms, columns):
+        """Escritura masiva: ts_ms (int64) ordenado y {senal: array}."""
+        with self._lock:
+            self._flush_pending()
+            self._append_rows(ts_ms, columns)
+
+    def flush(self):
+        with self._lock:
+            self._flush_pending()
+
+    def close(self):
+        with self._lock:
+            self._flush_pending()
+            self._close_current()
+
+    def _flush_pending(self):
+        if self._pending_raw:
+            samples = PackedSamples.from_bytes(bytes(self._pending_raw))
+            self._pending_raw = bytearray()
+            self._append_rows(samples.ts, samples.columns(self.signals, np.float32))
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        ts = np.array([t for t, _ in pending], dtype=np.int64)
+        columns = {
+            name: np.array([_num(row.get(name)) for _, row in pending], dtype=np.float32)
+            for name in self.signals
+        }
+        self._append_rows(ts, columns)
+
+    def _append_rows(self, ts_ms, columns):
+        """Agrega filas ordenadas cortando en los limites de hora (un lote pendiente puede cruzarlos)."""
+        ts_ms = np.asarray(ts_ms, dtype=np.int64)
+        starts = _segment_start(ts_ms, self.rotate_s)
+        cuts = np.flatnonzero(np.diff(starts)) + 1
+        for lo, hi in zip(np.r_[0, cuts], np.r_[cuts, len(ts_ms)]):
+            if self._current is not None and self._current[0] != starts[lo]:
+                self._close_current()
+            self._append_batch(int(starts[lo]), ts_ms[lo:hi],
+                               {name: np.asarray(columns[name][lo:hi], dtype=np.float32)
+                                for name in self.signals})
+
+    def _append_batch(self, start, ts, columns):
+        if self._current is None:
+            path = os.path.join(self.root, f"seg_{start}.arrows")
+            sink = pa.OSFile(path, "wb")
+            self._current = (start, pa.ipc.new_stream(sink, self.schema), sink)
+        batch = pa.record_batch([pa.array(ts)] + [pa.array(columns[name]) for name in self.signals],
+                                schema=self.schema)
+        self._current[1].write_batch(batch)
+        self._current[2].flush()
+
+    def _close_current(self):
+        if self._current is None:
+            return
+        start, writer, sink = self._current
+        self._current = None
+        writer.close()
+        sink.close()
+        finalize_segment(os.path.join(self.root, f"seg_{start}.arrows"))
+
+
+def finalize_segment(stream_path):
+    """Convierte un segmento stream a formato file con el indice en el footer."""
+    batches = []
+    with pa.OSFile(stream_path, "rb") as source:
+        try:
+            reader = pa.ipc.open_stream(source)
+            for batch in iter(reader.read_next_batch, None):
+                batches.append(batch)
+        except (pa.ArrowInvalid, StopIteration):
+            pass  # cola truncada por un corte: se conservan los lotes completos
+    final_path = stream_path[:-1]
+    if batches and os.path.exists(final_path):
+        # Reinicio a mitad de hora: se une con el segmento ya cerrado
+        with pa.memory_map(final_path, "r") as source:
+            previous = pa.ipc.open_file(source).read_all().replace_schema_metadata(None)
+        batches = previous.to_batches() + batches
+    if batches:
+        table = pa.Table.from_batches(batches).sort_by("ts")
+        index = {"t_min": int(table["ts"][0].as_py()), "t_max": int(table["ts"][-1].as_py()),
+                 "rows": table.num_rows, "columns": {}}
+        for name in table.column_names[1:]:
+            values = table[name].to_numpy()
+            finite = values[np.isfinite(values)]
+            index["columns"][name] = [float(finite.min()), float(finite.max())] if finite.size else [None, None]
+        table = table.replace_schema_metadata({INDEX_KEY: json.dumps(index).encode()})
+        tmp = final_path + ".tmp"
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, final_path)
+    os.remove(stream_path)
+
+
+def segment_index(path):
+    """Lee solo el footer de un segmento cerrado: dict con t_min, t_max, rows, columns."""
+    with pa.memory_map(path, "r") as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    return json.loads(metadata[INDEX_KEY]) if INDEX_KEY in metadata else None
+
+
+def read_range(t0, t1, signals=None, root=cfg.SEGMENTS_DIR):
+    """
+    Muestras con t0 <= ts < t1 (epoch s) desde los segmentos cerrados.
+
+    Devuelve (ts_ms int64, {senal: float32}). Solo abre los segmentos que se
+    solapan con el rango; el resto se descarta por el nombre del archivo.
+    """
+    t0_ms, t1_ms = int(t0 * 1000), int(t1 * 1000)
+    rotate_ms = cfg.SEGMENT_ROTATE_S * 1000
+    tables = []
+    for path in sorted(glob.glob(os.path.join(root, "seg_*.arrow")), key=_start_of):
+        start_ms = _start_of(path) * 1000
+        if start_ms >= t1_ms or start_ms + rotate_ms <= t0_ms:
+            continue
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            index = json.loads(reader.schema.metadata[INDEX_KEY])
+            if index["t_max"] < t0_ms or index["t_min"] >= t1_ms:
+                continue
+            table = reader.read_all()
+        ts = table["ts"].to_numpy()
+        lo, hi = np.searchsorted(ts, [t0_ms, t1_ms])
+        if hi > lo:
+            tables.append(table.slice(lo, hi - lo))
+    names = list(signals) if signals else list(SIGNALS)
+    if not tables:
+        return np.empty(0, dtype=np.int64), {name: np.empty(0, dtype=np.float32) for name in names}
+    table = pa.concat_tables(tables)
+    return table["ts"].to_numpy(), {name: table[name].to_numpy() for name in names}
+
+
+def _start_of(path):
+    return int(os.path.basename(path).split("_", 1)[1].split(".", 1)[0])
+
+
+def _num(value):
+    return np.nan if value is None else float(value)
+
+
+def export_csv(t0, t1, out_path=cfg.CSV_PATH, signals=None, root=cfg.SEGMENTS_DIR):
+    """Exporta un rango de los segmentos a CSV (timestamp ISO + una columna por senal)."""
+    import pyarrow.csv as pa_csv
+
+    ts, columns = read_range(t0, t1, signals, root)
+    table = pa.table({"timestamp": pa.array(ts, type=pa.timestamp("ms")), **columns})
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    pa_csv.write_csv(table, out_path)
+    return table.num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Herramientas de segmentos historicos")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export-csv", help="Exportar un rango a CSV")
+    exp.add_argument("--desde", required=True, help="YYYY-MM-DD[THH:MM]")
+    exp.add_argument("--hasta", required=True, help="YYYY-MM-DD[THH:MM]")
+    exp.add_argument("--out", default=cfg.CSV_PATH)
+    exp.add_argument("--senales", nargs="*")
+    args = parser.parse_args()
+
+    if args.command == "export-csv":
+        t0 = datetime.fromisoformat(args.desde).timestamp()
+        t1 = datetime.fromisoformat(args.hasta).timestamp()
+        n = export_csv(t0, t1, args.out, args.senales)
+        print(f"✅ {n} filas exportadas a {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Simulador determinista de la linea Kinnox para pruebas de carga y benchmarks.
+
+Genera todas las senales del mapa Modbus con correlaciones plausibles:
+
+    paradas     - cadena marcha/parada con duraciones exponenciales; bajo
+                  VEL_MIN_PRODUCCION la linea cuenta como detenida
+    velocidad   - sigue al setpoint del producto con retardo de primer orden
+    zinc/horno  - deriva lenta; la banda rapida enfria el zinc, el horno
+                  sube con la linea parada (menos carga)
+    PSA         - el consumo de N2 sigue a la linea; mas consumo baja la
+                  pureza y sube el punto de rocio
+    forming gas - mezcla N2/H2 alrededor de FORMING_GAS_*; el mezclador
+                  sigue el ciclo diario de temperatura ambiente
+
+Misma semilla -> misma serie, sin importar como se pida (generate(n) o
+snapshot a snapshot): internamente se genera por bloques fijos.
+
+Uso:
+    python -m modules.industrial.simulator --modbus --port 5020 --speedup 100
+    python -m modules.industrial.simulator --emit 100000
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+import config as cfg
+from modules.industrial.poller import COIL_BASE, COIL_MAP, HOLDING_BASE, HOLDING_MAP, PlantSnapshot
+
+BLOCK = 720   # muestras por bloque interno (1 h a 5 s)
+
+# Productos: (codigo, setpoint m/min)
+PRODUCTOS = ((1, 90.0), (2, 120.0), (3, 150.0), (4, 180.0))
+
+
+def _ar1(rng, n, phi, sigma, x0):
+    """Proceso AR(1) vectorizado (phi >= 0.99 para que phi**-n no pierda precision en un bloque)."""
+    k = np.arange(1, n + 1)
+    e = rng.normal(0.0, sigma, n)
+    return phi ** k * (x0 + np.cumsum(e * phi ** -k))
+
+
+def _lag(target, y0, alpha):
+    """Retardo de primer orden sobre un objetivo constante por tramos."""
+    y = np.empty_like(target)
+    cuts = np.flatnonzero(np.diff(target)) + 1
+    for lo, hi in zip(np.r_[0, cuts], np.r_[cuts, len(target)]):
+        decay = (1.0 - alpha) ** np.arange(1, hi - lo + 1)
+        y[lo:hi] = target[lo] + (y0 - target[lo]) * decay
+        y0 = y[hi - 1]
+    return y
+
+
+class PlantSimulator:
+    """Serie temporal sintetica de la planta, reproducible con `seed`."""
+
+    def __init__(self, seed=0, t0=None, dt=cfg.POLL_INTERVAL_S, mtbf_s=8 * 3600, mean_stop_s=20 * 60):
+        self.seed = seed
+        self.dt = float(dt)
+        self.t0 = float(time.time() // dt * dt if t0 is None else t0)
+        self.mtbf_s = mtbf_s
+        self.mean_stop_s = mean_stop_s
+        self.rng = np.random.default_rng(seed)
+        self.index = 0   # muestras entregadas
+        self._buffer = None
+        self._buffer_pos = 0
+        self._generated = 0
+        # Estado arrastrado entre bloques
+        self._running = True
+        self._state_left = self.rng.exponential(mtbf_s)
+        self._producto = 2
+        self._producto_left = self.rng.exponential(4 * 3600)
+        self._vel = PRODUCTOS[self._producto][1]
+        self._temp_zinc = 0.0
+        self._temp_horno = 0.0
+        self._pureza = 0.0
+        self._h2 = 0.0
+        self._paro_lag = 0.0
+        self._metros = 0.0
+        self._zinc_consumido = 0.0
+
+    # GENERACION
+
+    def _block(self):
+        n = BLOCK
+        rng = self.rng
+        dt = self.dt
+        ts = self.t0 + (self._generated + np.arange(n)) * dt
+
+        # Marcha / parada
+        running = np.empty(n, dtype=bool)
+        i = 0
+        while i < n:
+            take = min(n - i, max(1, int(np.ceil(self._state_left / dt))))
+            running[i:i + take] = self._running
+            i += take
+            self._state_left -= take * dt
+            if self._state_left <= 0:
+                self._running = not self._running
+                self._state_left = rng.exponential(self.mtbf_s if self._running else self.mean_stop_s)
+
+        # Producto / setpoint
+        producto = np.empty(n, dtype=np.int64)
+        i = 0
+        while i < n:
+            take = min(n - i, max(1, int(np.ceil(self._producto_left / dt))))
+            producto[i:i + take] = self._producto
+            i += take
+            self._producto_left -= take * dt
+            if self._producto_left <= 0:
+                self._producto = int(rng.integers(len(PRODUCTOS)))
+                self._producto_left = rng.exponential(4 * 3600)
+        setpoint = np.array([sp for _, sp in PRODUCTOS])[producto]
+
+        # Velocidad: retardo de ~60 s hacia el setpoint (0 en parada)
+        vel = _lag(np.where(running, setpoint, 0.0), self._vel, min(1.0, dt / 60.0))
+        vel = np.maximum(0.0, vel + rng.normal(0.0, 0.4, n) * (vel > 1.0))
+        self._vel = vel[-1]
+        marcha = running & (vel >= cfg.VEL_MIN_PRODUCCION)
+
+        # Carga termica: la linea parada se nota con retardo de ~15 min
+        paro = _lag((~marcha).astype(np.float64), self._paro_lag, min(1.0, dt / 900.0))
+        self._paro_lag = paro[-1]
+
+        dz = _ar1(rng, n, 0.999, 0.25, self._temp_zinc)
+        self._temp_zinc = dz[-1]
+        temp_zinc = 452.0 + dz - 0.04 * (vel - 130.0) + 4.0 * paro
+
+        dh = _ar1(rng, n, 0.999, 0.4, self._temp_horno)
+        self._temp_horno = dh[-1]
+        temp_horno = 690.0 + dh + 25.0 * paro + rng.normal(0.0, 0.8, n)
+
+        # Jet wipe
+        presion_jw = np.where(marcha, 0.25 + 0.0035 * vel, 0.05) + rng.normal(0.0, 0.01, n)
+        flujo_jw = np.where(marcha, cfg.JET_WIPE_FLUJO_NOMINAL * vel / 150.0, 2.0) + rng.normal(0.0, 0.3, n)
+
+        # Forming gas
+        dh2 = _ar1(rng, n, 0.998, 0.02, self._h2)
+        self._h2 = dh2[-1]
+        fg_total = np.where(marcha, cfg.FORMING_GAS_FLUJO_NOMINAL, 0.3 * cfg.FORMING_GAS_FLUJO_NOMINAL)
+        fg_total = fg_total + rng.normal(0.0, 0.8, n)
+        fg_h2 = cfg.FORMING_GAS_H2_PERCENT + dh2 + rng.normal(0.0, 0.03, n)
+        fg_n2 = 100.0 - fg_h2
+        fg_presion = 1.2 - 0.004 * (fg_total - cfg.FORMING_GAS_FLUJO_NOMINAL) + rng.normal(0.0, 0.02, n)
+        ambiente = 6.0 * np.sin(2 * np.pi * ((ts % 86400) / 86400.0 - 0.375))
+        fg_temp = 32.0 + ambiente + 0.05 * (fg_total - 60.0) + rng.normal(0.0, 0.3, n)
+
+        # PSA: mas consumo -> menos pureza y mas punto de rocio
+        flujo_n2 = fg_total * fg_n2 / 100.0 + flujo_jw + rng.normal(0.0, 0.5, n)
+        dp = _ar1(rng, n, 0.998, 0.03, self._pureza)
+        self._pureza = dp[-1]
+        pureza = np.minimum(99.99, 99.4 - 0.012 * (flujo_n2 - 60.0) + dp)
+        dew = -62.0 + 9.0 * (99.4 - pureza) + rng.normal(0.0, 0.5, n)
+        presion_n2 = 6.8 - 0.012 * flujo_n2 + rng.normal(0.0, 0.05, n)
+
+        # Totalizador (registro de 16 bits) y nivel de zinc en diente de sierra 60-90 %
+        metros = self._metros + np.cumsum(vel * dt / 60.0)
+        self._metros = metros[-1] % 65536.0
+        consumo = self._zinc_consumido + np.cumsum(vel) * dt * 2e-5
+        self._zinc_consumido = consumo[-1] % 30.0
+        nivel_zinc = 60.0 + (30.0 - consumo % 30.0)
+
+        values = {
+            "velocidad_real": vel,
+            "velocidad_setpoint": setpoint,
+            "temp_zinc": temp_zinc,
+            "temp_horno": temp_horno,
+            "presion_jet_wipe": presion_jw,
+            "flujo_jet_wipe": np.maximum(0.0, flujo_jw),
+            "nivel_zinc": nivel_zinc,
+            "totalizador_metros": np.floor(metros % 65536.0),
+            "tipo_producto": np.array([c for c, _ in PRODUCTOS], dtype=np.float64)[producto],
+            "flujo_n2": np.maximum(0.0, flujo_n2),
+            "presion_n2": presion_n2,
+            "pureza_n2": pureza,
+            "dew_point_n2": dew,
+            "fg_flujo_total": np.maximum(0.0, fg_total),
+            "fg_percent_n2": fg_n2,
+            "fg_percent_h2": fg_h2,
+            "fg_presion": fg_presion,
+            "fg_temp_mezclador": fg_temp,
+            "fg_flujo_n2": np.maximum(0.0, fg_total * fg_n2 / 100.0),
+            "fg_flujo_h2": np.maximum(0.0, fg_total * fg_h2 / 100.0),
+            "linea_en_marcha": marcha,
+            "alarma_horno": (temp_horno < cfg.TEMP_HORNO_REF_MIN) | (temp_horno > cfg.TEMP_HORNO_REF_MAX),
+            "alarma_zinc": (temp_zinc < cfg.TEMP_ZINC_MIN) | (temp_zinc > cfg.TEMP_ZINC_MAX),
+            "alarma_psa": pureza < cfg.PUREZA_MIN_OPERATIVA,
+            "alarma_fg_h2_high": fg_h2 > cfg.FORMING_GAS_H2_MAX,
+            "alarma_fg_h2_low": fg_h2 < cfg.FORMING_GAS_H2_MIN,
+            "alarma_fg_presion": (fg_presion < cfg.FORMING_GAS_PRESION_MIN) | (fg_presion > cfg.FORMING_GAS_PRESION_MAX),
+        }
+        self._generated += n
+        return ts, values
+
+    def generate(self, n):
+        """Las proximas n muestras: (ts epoch s, {campo: array})."""
+        parts = []
+        need = n
+        while need > 0:
+            if self._buffer is None or self._buffer_pos >= BLOCK:
+                self._buffer = self._block()
+                self._buffer_pos = 0
+            take = min(need, BLOCK - self._buffer_pos)
+            lo, hi = self._buffer_pos, self._buffer_pos + take
+            parts.append((self._buffer[0][lo:hi], {k: v[lo:hi] for k, v in self._buffer[1].items()}))
+            self._buffer_pos = hi
+            need -= take
+        self.index += n
+        if len(parts) == 1:
+            return parts[0]
+        ts = np.concatenate([p[0] for p in parts])
+        return ts, {k: np.concatenate([p[1][k] for p in parts]) for k in parts[0][1]}
+
+    def snapshots(self, n, chunk=BLOCK):
+        """Itera n PlantSnapshot (generados por bloques)."""
+        while n > 0:
+            take = min(n, chunk)
+            ts, values = self.generate(take)
+            columns = [(k, v.tolist()) for k, v in values.items()]
+            for i in range(take):
+                yield PlantSnapshot(timestamp=float(ts[i]), **{k: v[i] for k, v in columns})
+            n -= take
+
+    def step(self):
+        return next(self.snapshots(1))
+
+    # EMISION
+
+    def emit(self, callback, n, speedup=None):
+        """
+        Llama callback(snapshot) n veces; con speedup se respeta el ritmo
+        dt / speedup sobre reloj monotonico (speedup=None: tan rapido como se pueda).
+        """
+        period = None if speedup is None else self.dt / speedup
+        deadline = time.monotonic()
+        for snapshot in self.snapshots(n):
+            callback(snapshot)
+            if period is not None:
+                deadline += period
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+
+def encode_registers(snapshot):
+    """Inverso de BlockPoller.decode: {offset: raw} para holding y coils."""
+    if hasattr(snapshot, "as_dict"):
+        snapshot = snapshot.as_dict()
+    holding = {}
+    for name, addr, escala, signed in HOLDING_MAP:
+        raw = int(round(snapshot[name] / escala))
+        holding[addr - HOLDING_BASE] = max(-0x8000, min(0x7FFF, raw)) & 0xFFFF if signed else max(0, min(0xFFFF, raw))
+    coils = {addr - COIL_BASE: bool(snapshot[name]) for name, addr in COIL_MAP}
+    return holding, coils
+
+
+class SimulatedPLC:
+    """Publica el simulador en un ModbusStandInServer a dt / speedup por muestra."""
+
+    def __init__(self, simulator=None, server=None, speedup=1.0):
+        from modules.industrial.modbus_tcp import ModbusStandInServer
+
+        self.simulator = simulator or PlantSimulator()
+        self.server = server or ModbusStandInServer()
+        self.speedup = speedup
+        self.latest = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.server.address
+
+    def publish(self, snapshot):
+        holding, coils = encode_registers(snapshot)
+        with self.server._lock:
+            for offset, raw in holding.items():
+                self.server.holding[offset] = raw
+            for offset, bit in coils.items():
+                self.server.coils[offset] = bit
+        self.latest = snapshot
+
+    def _run(self):
+        period = self.simulator.dt / self.speedup
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            for snapshot in self.simulator.snapshots(BLOCK):
+                self.publish(snapshot)
+                deadline += period
+                if self._stop.wait(max(0.0, deadline - time.monotonic())):
+                    return
+
+    def start(self):
+        if self.server._thread is None:
+            self.server.start()
+        self.publish(self.simulator.step())
+        self._thread = threading.Thread(target=self._run, name="simulador", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.server.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de la linea Kinnox")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speedup", type=float, help="veces tiempo real (hasta 10000); sin valor: lo mas rapido")
+    parser.add_argument("--modbus", action="store_true", help="servir por Modbus TCP local")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--emit", type=int, help="emitir N snapshots y reportar la tasa")
+    args = parser.parse_args()
+
+    sim = PlantSimulator(seed=args.seed)
+    if args.modbus:
+        from modules.industrial.modbus_tcp import ModbusStandInServer
+
+        plc = SimulatedPLC(sim, ModbusStandInServer(port=args.port), args.speedup or 1.0).start()
+        print(f"✅ PLC simulado en {plc.address[0]}:{plc.address[1]} a {plc.speedup:g}x (Ctrl+C para salir)")
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            plc.stop()
+    elif args.emit:
+        count = [0]
+        t = time.perf_counter()
+        sim.emit(lambda s: count.__setitem__(0, count[0] + 1), args.emit, args.speedup)
+        elapsed = time.perf_counter() - t
+        rate = count[0] / elapsed
+        print(f"✅ {count[0]} snapshots en {elapsed:.2f} s ({rate:,.0f}/s = {rate * sim.dt:,.0f}x tiempo real)")
+
+
+if __name__ == "__main__":
+    main()
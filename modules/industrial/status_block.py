@@ -0,0 +1,150 @@
+"""
+Bloque de estado en memoria compartida (STATUS_SHM_NAME) con seqlock.
+
+Layout fijo, una seccion por escritor (cada una con su propio contador de
+secuencia, un solo escritor por seccion):
+
+    adquisicion - publicado, ultima lectura, ciclos, errores, conectado,
+                  failsafe y ultimo error (servicio de adquisicion)
+    control     - publicado, heartbeat, dry_run, aperturas N2/H2, ciclos,
+                  overruns (lazo de valvulas)
+
+Escritura: seq impar -> payload -> seq par. Lectura: desempaquetar el
+payload entre dos lecturas de seq iguales y pares; si no, reintentar. Los lectores
+(workers del dashboard) no toman locks ni hacen IPC: leer cuesta unos
+microsegundos.
+"""
+import math
+import struct
+import time
+from multiprocessing import shared_memory
+
+import config as cfg
+
+SEQ = struct.Struct("<Q")
+
+SECTIONS = {
+    "adquisicion": (
+        struct.Struct("<ddQQBB120s"),
+        ("published_at", "last_read", "cycles", "errors", "connected", "failsafe", "last_error"),
+    ),
+    "control": (
+        struct.Struct("<dIBddQQ"),
+        ("published_at", "heartbeat", "dry_run", "apertura_n2", "apertura_h2", "cycles", "overruns"),
+    ),
+}
+
+
+def _layout():
+    offsets, offset = {}, 0
+    for name, (fmt, _) in SECTIONS.items():
+        offsets[name] = offset
+        offset += (SEQ.size + fmt.size + 7) // 8 * 8
+    return offsets, offset
+
+
+OFFSETS, SIZE = _layout()
+
+
+def _attach(name, create):
+    """Abre (o crea) el segmento sin que el resource_tracker lo borre al salir este proceso."""
+    try:
+        shm = shared_memory.SharedMemory(name=name, create=create, size=SIZE if create else 0, track=False)
+    except TypeError:   # Python < 3.13: no existe track=
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name=name, create=create, size=SIZE if create else 0)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        shm._untracked = True
+    return shm
+
+
+class StatusBlock:
+    """Acceso a las secciones del bloque compartido."""
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.buf = shm.buf
+
+    @classmethod
+    def create(cls, name=cfg.STATUS_SHM_NAME):
+        """Lado escritor: crea el segmento o se une al existente."""
+        try:
+            shm = _attach(name, create=True)
+            shm.buf[:SIZE] = bytes(SIZE)
+        except FileExistsError:
+            shm = _attach(name, create=False)
+        return cls(shm)
+
+    @classmethod
+    def open(cls, name=cfg.STATUS_SHM_NAME):
+        """Lado lector: None si ningun proceso creo el bloque todavia."""
+        try:
+            return cls(_attach(name, create=False))
+        except FileNotFoundError:
+            return None
+
+    def write(self, section, **values):
+        fmt, names = SECTIONS[section]
+        base = OFFSETS[section]
+        packed = []
+        for field in names:
+            value = values.get(field, 0)
+            if field == "last_error":
+                value = (value or "").encode("utf-8")[:120]
+            packed.append(value)
+        seq = SEQ.unpack_from(self.buf, base)[0]
+        SEQ.pack_into(self.buf, base, seq + 1)          # impar: escritura en curso
+        fmt.pack_into(self.buf, base + SEQ.size, *packed)
+        SEQ.pack_into(self.buf, base, seq + 2)          # par: consistente
+
+    def read(self, section, timeout=0.5):
+        """dict con los campos de la seccion, o None si nunca se escribio."""
+        fmt, names = SECTIONS[section]
+        base = OFFSETS[section]
+        buf = self.buf
+        deadline = None
+        while True:
+            seq = SEQ.unpack_from(buf, base)[0]
+            if not seq & 1:
+                values = fmt.unpack_from(buf, base + SEQ.size)
+                if SEQ.unpack_from(buf, base)[0] == seq:
+                    break
+            # Escritura en curso: ceder la CPU por si el escritor fue desalojado a mitad
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError(f"Seccion {section} en escritura continua")
+            time.sleep(0)
+        if seq == 0:
+            return None
+        result = dict(zip(names, values))
+        if "last_error" in result:
+            result["last_error"] = result["last_error"].rstrip(b"\0").decode("utf-8", "replace") or None
+        return result
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+    def unlink(self):
+        if getattr(self.shm, "_untracked", False):
+            from multiprocessing import resource_tracker
+
+            resource_tracker.register(self.shm._name, "shared_memory")   # unlink() lo desregistra
+        self.shm.unlink()
+
+
+def publish_acquisition(block, service, failsafe):
+    """Escribe la seccion de adquisicion desde un AcquisitionService."""
+    last_read = service.latest.timestamp if service.latest else math.nan
+    block.write(
+        "adquisicion",
+        published_at=time.time(),
+        last_read=last_read,
+        cycles=service.cycles,
+        errors=service.errors,
+        connected=int(service.client.connected),
+        failsafe=int(failsafe),
+        last_error=service.last_error,
+    )
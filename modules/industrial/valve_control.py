@@ -0,0 +1,225 @@
+"""
+Lazo de control de valvulas N2/H2 con cadencia fija sobre reloj monotonico.
+
+Corre en su propio hilo (o proceso: python -m modules.industrial.valve_control)
+con su propia conexion al PLC; no comparte nada con el dashboard ni con el
+historian, asi que una escritura lenta de SQLite o un rerun de Streamlit no
+retrasan un paso de rampa ni el heartbeat. Cada ciclo:
+
+    leer    - lectura por bloques del PLC (BlockPoller)
+    decidir - apertura objetivo segun APERTURA_* y rampa MAX_CAMBIO_PCT_POR_CICLO
+    escribir- un solo FC16 sobre 40030..40033 (valvulas + heartbeat)
+
+Registra histogramas de latencia por fase y de jitter (inicio real vs
+programado) y cuenta los ciclos que se pasan de su ventana (overruns).
+Con dry_run (por defecto mientras CONTROL_ACTIVO_HABILITADO sea False)
+decide pero no escribe. Con status_block publica heartbeat y aperturas en
+la seccion "control" del bloque compartido tras cada ciclo.
+"""
+import argparse
+import logging
+import threading
+import time
+
+import config as cfg
+from modules.industrial.latency import LatencyHistogram
+from modules.industrial.modbus_tcp import ModbusError, ModbusTcpClient
+from modules.industrial.poller import HOLDING_BASE, BlockPoller
+from modules.industrial.status_block import StatusBlock
+
+log = logging.getLogger(__name__)
+
+WRITE_ADDRESSES = (cfg.ADDR_VALVULA_N2_PSA, cfg.ADDR_VALVULA_N2_FG, cfg.ADDR_VALVULA_H2_FG, cfg.ADDR_HEARTBEAT)
+
+
+def target_apertura(snapshot):
+    """
+    (apertura objetivo %, failsafe) de la valvula N2 segun el estado de la linea.
+
+    failsafe va aparte: APERTURA_LINEA_DETENIDA puede valer lo mismo que
+    APERTURA_FAILSAFE, y una parada normal cierra con rampa.
+    """
+    if snapshot.pureza_n2 < cfg.PUREZA_CRITICA:
+        return cfg.APERTURA_FAILSAFE, True
+    if not snapshot.linea_en_marcha or snapshot.velocidad_real < cfg.VEL_MIN_PRODUCCION:
+        return cfg.APERTURA_LINEA_DETENIDA, False
+    if snapshot.velocidad_real < cfg.VEL_MIN_N2_REDUCIDO or snapshot.pureza_n2 < cfg.PUREZA_MIN_OPERATIVA:
+        return cfg.APERTURA_VELOCIDAD_BAJA, False
+    return min(cfg.APERTURA_NOMINAL, cfg.APERTURA_MAXIMA), False
+
+
+def ramp(actual, target, failsafe=False):
+    """Un paso de rampa; con failsafe el cierre es inmediato."""
+    if failsafe and target < actual:
+        return target
+    if actual == cfg.APERTURA_LINEA_DETENIDA and target > actual:
+        return min(target, cfg.APERTURA_ARRANQUE)
+    step = cfg.MAX_CAMBIO_PCT_POR_CICLO
+    return max(actual - step, min(actual + step, target))
+
+
+class ValveController:
+    """Ciclo leer -> decidir -> escribir con calendario absoluto sobre time.monotonic."""
+
+    def __init__(self, client=None, poller=None, period_s=cfg.CONTROL_CYCLE_S, dry_run=None, status_block=None):
+        self.client = client or ModbusTcpClient(cfg.PLC_IP, cfg.PLC_PORT, cfg.SLAVE_ID)
+        self.poller = poller or BlockPoller()
+        self.period_s = period_s
+        self.status_block = status_block
+        self.dry_run = (not cfg.CONTROL_ACTIVO_HABILITADO) if dry_run is None else dry_run
+
+        self.apertura = cfg.APERTURA_LINEA_DETENIDA
+        self.apertura_h2 = cfg.APERTURA_LINEA_DETENIDA
+        self.heartbeat = 0
+        self._last_heartbeat = None
+        self.last_registers = None
+
+        self.cycles = 0
+        self.overruns = 0
+        self.errors = 0
+        self.last_error = None
+        self.latency = {phase: LatencyHistogram() for phase in ("read", "decide", "write", "cycle", "jitter")}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # DECISION
+
+    def decide(self, snapshot, now):
+        """Registros a escribir en 40030..40033 para este ciclo."""
+        self.apertura = ramp(self.apertura, *target_apertura(snapshot))
+        # H2 se corta de inmediato si la mezcla supera el maximo
+        h2_target = 0.0 if snapshot.fg_percent_h2 > cfg.FORMING_GAS_H2_MAX else self.apertura
+        self.apertura_h2 = h2_target if h2_target < self.apertura_h2 else ramp(self.apertura_h2, h2_target)
+        if self._last_heartbeat is None or now - self._last_heartbeat >= cfg.HEARTBEAT_INTERVALO_S:
+            self.heartbeat = (self.heartbeat + 1) & 0xFFFF
+            self._last_heartbeat = now
+        return [
+            round(self.apertura / cfg.ESCALA_VALVULA),
+            round(self.apertura / cfg.ESCALA_VALVULA),
+            round(self.apertura_h2 / cfg.ESCALA_VALVULA),
+            self.heartbeat,
+        ]
+
+    # CICLO
+
+    def cycle(self):
+        """Un ciclo completo; devuelve los registros decididos."""
+        t0 = time.monotonic()
+        if not self.client.connected:
+            self.client.connect()
+        snapshot = self.poller.poll(self.client)
+        t1 = time.monotonic()
+        registers = self.decide(snapshot, t1)
+        t2 = time.monotonic()
+        if not self.dry_run:
+            self.client.write_registers(WRITE_ADDRESSES[0] - HOLDING_BASE, registers)
+        t3 = time.monotonic()
+        self.latency["read"].record(t1 - t0)
+        self.latency["decide"].record(t2 - t1)
+        self.latency["write"].record(t3 - t2)
+        self.latency["cycle"].record(t3 - t0)
+        self.last_registers = registers
+        self.cycles += 1
+        return registers
+
+    def run(self, max_cycles=None):
+        """Bucle con deadlines absolutos: un ciclo lento no corre la fase de los siguientes."""
+        deadline = time.monotonic()
+        done = 0
+        while not self._stop.is_set() and (max_cycles is None or done < max_cycles):
+            start = time.monotonic()
+            self.latency["jitter"].record(max(0.0, start - deadline))
+            try:
+                self.cycle()
+            except (OSError, ModbusError) as exc:
+                self.errors += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                log.warning("Ciclo de control fallido: %s", self.last_error)
+                self.client.close()
+            self.publish_status()
+            done += 1
+            deadline += self.period_s
+            now = time.monotonic()
+            if now > deadline:
+                missed = int((now - deadline) // self.period_s) + 1
+                self.overruns += missed
+                deadline += missed * self.period_s
+            self._stop.wait(deadline - time.monotonic())
+
+    def publish_status(self):
+        if self.status_block is None:
+            return
+        self.status_block.write(
+            "control",
+            published_at=time.time(),
+            heartbeat=self.heartbeat,
+            dry_run=int(self.dry_run),
+            apertura_n2=self.apertura,
+            apertura_h2=self.apertura_h2,
+            cycles=self.cycles,
+            overruns=self.overruns,
+        )
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="control-valvulas", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.client.close()
+
+    def status(self):
+        return {
+            "dry_run": self.dry_run,
+            "apertura": self.apertura,
+            "apertura_h2": self.apertura_h2,
+            "heartbeat": self.heartbeat,
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "latency": {phase: h.summary() for phase, h in self.latency.items()},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lazo de control de valvulas N2/H2")
+    parser.add_argument("--stand-in", action="store_true", help="PLC simulado local (escribe en el sustituto)")
+    parser.add_argument("--period", type=float, default=cfg.CONTROL_CYCLE_S)
+    parser.add_argument("--cycles", type=int)
+    args = parser.parse_args()
+
+    server = None
+    status_block = StatusBlock.create()
+    if args.stand_in:
+        from modules.industrial.modbus_tcp import ModbusStandInServer
+
+        server = ModbusStandInServer().start()
+        controller = ValveController(ModbusTcpClient(*server.address), period_s=args.period, dry_run=False,
+                                     status_block=status_block)
+    else:
+        controller = ValveController(period_s=args.period, status_block=status_block)
+    log.info("Control de valvulas: ciclo %ss, dry_run=%s", args.period, controller.dry_run)
+    try:
+        controller.run(args.cycles)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.client.close()
+        status_block.close()
+        if server is not None:
+            server.stop()
+    for phase, summary in controller.status()["latency"].items():
+        print(f"{phase:<7} " + "  ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                         for k, v in summary.items()))
+    print(f"ciclos={controller.cycles} overruns={controller.overruns} errores={controller.errors}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    main()
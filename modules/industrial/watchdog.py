@@ -0,0 +1,110 @@
+"""
+Watchdog de adquisicion: detecta lecturas viejas y activa failsafe.
+
+Lee el estado publicado por el servicio de adquisicion; una instancia por
+proceso (get_watchdog) compartida por todas las sesiones del dashboard.
+
+Fuente preferida: el bloque de memoria compartida (status_block.py), que
+se lee en microsegundos sin locks y trae el flag de failsafe que calcula
+el propio servicio de adquisicion. Si el servicio deja de publicar
+(published_at viejo) tambien se considera failsafe. Sin bloque, cae al
+estado del DataStore.
+"""
+import math
+import threading
+import time
+
+import config as cfg
+from modules.industrial.data_store import get_data_store
+from modules.industrial.status_block import StatusBlock
+
+
+class Watchdog:
+    """Estado de failsafe segun la antiguedad de la ultima lectura del PLC."""
+
+    def __init__(self, store=None, timeout_s=cfg.HEARTBEAT_TIMEOUT_S, shm_name=cfg.STATUS_SHM_NAME):
+        self.store = store or get_data_store()
+        self.timeout_s = timeout_s
+        self.shm_name = shm_name
+        self._started = time.time()
+        self._block = None
+        self._next_attach = 0.0
+
+    def _status_block(self):
+        """Bloque compartido; si no existe reintenta como mucho cada 5 s."""
+        if self._block is None and time.monotonic() >= self._next_attach:
+            self._block = StatusBlock.open(self.shm_name)
+            self._next_attach = time.monotonic() + 5.0
+        return self._block
+
+    def get_status(self):
+        block = self._status_block()
+        adq = block.read("adquisicion") if block is not None else None
+        if adq is None:
+            return self._status_from_store()
+        now = time.time()
+        last_read = None if math.isnan(adq["last_read"]) else adq["last_read"]
+        seconds_since_read = now - (last_read if last_read else self._started)
+        silence = now - adq["published_at"]
+        if silence > self.timeout_s:
+            reason = f"Servicio de adquisicion sin publicar hace {silence:.0f}s (> {self.timeout_s:.0f}s)"
+            active = True
+        elif adq["failsafe"] or seconds_since_read > self.timeout_s:
+            reason = f"Sin lectura del PLC hace {seconds_since_read:.0f}s (> {self.timeout_s:.0f}s)"
+            active = True
+        else:
+            reason = None
+            active = False
+        status = {
+            "failsafe_active": active,
+            "failsafe_reason": reason,
+            "seconds_since_read": seconds_since_read,
+            "plc_connected": bool(adq["connected"]) and silence <= self.timeout_s,
+            "last_error": adq["last_error"],
+        }
+        control = block.read("control")
+        if control is not None:
+            status.update(
+                heartbeat=control["heartbeat"],
+                dry_run=bool(control["dry_run"]),
+                apertura_n2=control["apertura_n2"],
+                apertura_h2=control["apertura_h2"],
+                control_age_s=now - control["published_at"],
+            )
+        return status
+
+    def _status_from_store(self):
+        status = self.store.read_status() or {}
+        last_read = status.get("last_read")
+        now = time.time()
+        seconds_since_read = now - (last_read if last_read else self._started)
+        if last_read is None:
+            reason = "Sin lecturas del servicio de adquisicion"
+            active = seconds_since_read > self.timeout_s
+        elif seconds_since_read > self.timeout_s:
+            reason = f"Sin lectura del PLC hace {seconds_since_read:.0f}s (> {self.timeout_s:.0f}s)"
+            active = True
+        else:
+            reason = None
+            active = False
+        return {
+            "failsafe_active": active,
+            "failsafe_reason": reason,
+            "seconds_since_read": seconds_since_read,
+            "plc_connected": bool(status.get("connected")),
+            "last_error": status.get("last_error"),
+        }
+
+
+_watchdog = None
+_watchdog_lock = threading.Lock()
+
+
+def get_watchdog():
+    """Instancia unica por proceso, compartida por todas las sesiones."""
+    global _watchdog
+    if _watchdog is None:
+        with _watchdog_lock:
+            if _watchdog is None:
+                _watchdog = Watchdog()
+    return _watchdog
@@ -0,0 +1,263 @@
+"""
+Escenarios financieros de la PSA: payback, ROI y ahorro acumulado sobre grillas.
+
+Responde "y si el LIN sube a 2.60 y la energia de la PSA un 20 %?" para
+miles de combinaciones en una sola pasada de numpy sobre la serie diaria
+real (consumo_diario desde la instalacion de la PSA; H2 de consumo_medido
+si el integrador de caudales esta activo). Ejes, escalares o listas:
+
+    costo_lin, costo_psa, costo_h2   USD/m³ (por defecto la fila PSA y config.py)
+    capex                            USD
+    factor_n2, factor_h2             escenario de consumo (1.0 = el medido)
+
+Con grid=True (por defecto) se evalua el producto cartesiano de los ejes;
+con grid=False los ejes se combinan elemento a elemento. Las formulas son
+las de get_roi_metrics (_roi_from_totals), con payback_meses = inf en vez
+de 999 cuando el ahorro no es positivo.
+
+Bandas Monte Carlo (bands): caminos futuros de consumo diario remuestreando
+semanas completas del historico (conserva el ciclo semanal y la varianza
+real). Como el ahorro acumulado crece en cada camino, el cuantil q del
+payback es el primer dia en que el cuantil 1-q del consumo acumulado cruza
+el umbral de cada combinacion: una busqueda por banda, no por camino.
+
+Los resultados se memorizan por hash de la serie y de las entradas (LRU de
+MEMO_SIZE entradas y MEMO_MAX_BYTES de arrays), asi los sliders de la pagina
+Financiero repiten al instante. Un resultado de mas de MEMO_MAX_ENTRY_BYTES
+(p. ej. curvas de ahorro de bands() sobre una grilla grande) no se guarda.
+
+    python -m modules.industrial.what_if --lin 2.0 2.28 2.6 --psa-factor 1.0 1.2 --bandas
+"""
+import argparse
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+import config as cfg
+
+MEMO_SIZE = 256
+MEMO_MAX_BYTES = 256 * 2**20       # arrays memorizados en total
+MEMO_MAX_ENTRY_BYTES = 64 * 2**20  # mas grande: se recalcula en cada consulta
+DIAS_MES = 30            # igual que _roi_from_totals
+SEMANA = 7
+AXES = ("costo_lin", "costo_psa", "costo_h2", "capex", "factor_n2", "factor_h2")
+
+_memo = OrderedDict()   # key -> (resultado, bytes)
+_memo_bytes = 0
+_memo_lock = threading.Lock()
+
+
+def _memoized(key, compute):
+    global _memo_bytes
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key][0]
+    result = compute()
+    size = 0
+    for value in result.values():
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+            size += value.nbytes
+    if size > MEMO_MAX_ENTRY_BYTES:
+        return result
+    with _memo_lock:
+        if key not in _memo:
+            _memo[key] = (result, size)
+            _memo_bytes += size
+        while len(_memo) > MEMO_SIZE or _memo_bytes > MEMO_MAX_BYTES:
+            _memo_bytes -= _memo.popitem(last=False)[1][1]
+    return result
+
+
+def _key_part(value):
+    arr = np.ascontiguousarray(value, dtype=np.float64)
+    return arr.shape, arr.tobytes()
+
+
+class WhatIfEngine:
+    """Serie diaria desde la instalacion + caso base; evalua escenarios vectorizados."""
+
+    def __init__(self, n2, h2=None, dias_operacion=None, capex=580000.0,
+                 costo_lin=cfg.COSTO_LIN_USD_M3, costo_psa=cfg.COSTO_PSA_USD_M3,
+                 costo_h2=cfg.COSTO_H2_USD_M3, fecha_instalacion=None):
+        self.n2 = np.asarray(n2, dtype=np.float64)
+        self.h2 = np.zeros_like(self.n2) if h2 is None else np.asarray(h2, dtype=np.float64)
+        self.dias_operacion = max(1, dias_operacion or len(self.n2))
+        self.base = {"costo_lin": costo_lin, "costo_psa": costo_psa, "costo_h2": costo_h2,
+                     "capex": capex, "factor_n2": 1.0, "factor_h2": 1.0}
+        self.fecha_instalacion = fecha_instalacion
+        self.cum_n2 = np.cumsum(self.n2)
+        self.n2_total = float(self.cum_n2[-1]) if len(self.n2) else 0.0
+        self.h2_total = float(self.h2.sum())
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.n2, self.h2, np.array([self.dias_operacion], dtype=np.float64)):
+            digest.update(part.tobytes())
+        self.digest = digest.hexdigest()
+
+    @classmethod
+    def from_tracker(cls, tracker, hoy=None):
+        """Serie real de la base diaria. None si la PSA no esta registrada."""
+        conn = tracker.conn
+        psa = conn.execute(
+            "SELECT installation_date, capex, costo_lin, costo_psa FROM psa_installation WHERE id=1"
+        ).fetchone()
+        if not psa:
+            return None
+        inicio = datetime.strptime(psa[0], "%Y-%m-%d").date()
+        hoy = hoy or datetime.now()
+        if not isinstance(hoy, datetime):
+            hoy = datetime.combine(hoy, datetime.min.time())
+        dias_operacion = (hoy - datetime.combine(inicio, datetime.min.time())).days or 1
+        rows = conn.execute("SELECT fecha, n2_consumido_m3 FROM consumo_diario WHERE fecha >= ? ORDER BY fecha",
+                            (psa[0],)).fetchall()
+        medido = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'consumo_medido'").fetchone()
+        h2_rows = conn.execute("SELECT fecha, fg_h2_m3 FROM consumo_medido WHERE fecha >= ?",
+                               (psa[0],)).fetchall() if medido else []
+        ultimo = max([inicio] + [datetime.strptime(f, "%Y-%m-%d").date() for f, _ in rows[-1:] + h2_rows])
+        n = (ultimo - inicio).days + 1
+        n2, h2 = np.zeros(n), np.zeros(n)
+        for fecha, value in rows:
+            n2[(datetime.strptime(fecha, "%Y-%m-%d").date() - inicio).days] = value
+        for fecha, value in h2_rows:
+            h2[(datetime.strptime(fecha, "%Y-%m-%d").date() - inicio).days] = value or 0.0
+        return cls(n2, h2, dias_operacion, capex=psa[1], costo_lin=psa[2], costo_psa=psa[3],
+                   fecha_instalacion=inicio)
+
+    def _axes(self, grid, values):
+        axes = {name: np.atleast_1d(np.asarray(self.base[name] if values.get(name) is None else values[name],
+                                               dtype=np.float64)) for name in AXES}
+        if grid:
+            mesh = np.meshgrid(*axes.values(), indexing="ij")
+            return {name: m.ravel() for name, m in zip(AXES, mesh)}
+        return dict(zip(AXES, np.broadcast_arrays(*axes.values())))
+
+    def evaluate(self, grid=True, **values):
+        """
+        Metricas por combinacion (arrays planos, una posicion por combinacion).
+
+        ahorro_acumulado, ahorro_mensual_proyectado, ahorro_anual_proyectado,
+        roi_actual, roi_anual_proyectado, payback_meses (inf = nunca),
+        porcentaje_recuperado, costo_operativo_mensual (N2 PSA + H2),
+        dia_payback (dias desde la instalacion en que el ahorro real cruzo el
+        capex; NaN si todavia no) y los ejes de entrada.
+        """
+        unknown = set(values) - set(AXES)
+        if unknown:
+            raise ValueError(f"Ejes desconocidos: {sorted(unknown)} ({', '.join(AXES)})")
+        key = ("evaluate", self.digest, grid) + tuple(
+            _key_part(self.base[n] if values.get(n) is None else values[n]) for n in AXES)
+        return _memoized(key, lambda: self._evaluate(self._axes(grid, values)))
+
+    def _evaluate(self, ax):
+        ahorro_m3 = (ax["costo_lin"] - ax["costo_psa"]) * ax["factor_n2"]
+        capex = ax["capex"]
+        n2_total = self.n2_total * ax["factor_n2"]
+        ahorro_acumulado = self.n2_total * ahorro_m3
+        consumo_diario = n2_total / self.dias_operacion
+        ahorro_mensual = consumo_diario * DIAS_MES * (ax["costo_lin"] - ax["costo_psa"])
+        h2_mensual = self.h2_total * ax["factor_h2"] / self.dias_operacion * DIAS_MES
+        with np.errstate(divide="ignore", invalid="ignore"):
+            payback = np.where(ahorro_mensual > 0,
+                               np.maximum(0.0, (capex - ahorro_acumulado) / ahorro_mensual), np.inf)
+            roi_actual = np.where(capex > 0, ahorro_acumulado / capex, 0.0)
+            roi_anual = np.where(capex > 0, ahorro_mensual * 12 / capex, 0.0)
+            umbral = np.where(ahorro_m3 > 0, capex / ahorro_m3, np.inf)
+        dia = np.searchsorted(self.cum_n2, umbral, side="left").astype(np.float64)
+        dia[dia >= len(self.cum_n2)] = np.nan
+        return {
+            **ax,
+            "ahorro_acumulado": ahorro_acumulado,
+            "ahorro_mensual_proyectado": ahorro_mensual,
+            "ahorro_anual_proyectado": ahorro_mensual * 12,
+            "roi_actual": roi_actual,
+            "roi_anual_proyectado": roi_anual,
+            "payback_meses": payback,
+            "porcentaje_recuperado": roi_actual * 100,
+            "costo_operativo_mensual": consumo_diario * DIAS_MES * ax["costo_psa"] + h2_mensual * ax["costo_h2"],
+            "dia_payback": dia,
+        }
+
+    def consumption_bands(self, paths=1000, horizon_days=3650, quantiles=(0.1, 0.5, 0.9), seed=0):
+        """Cuantiles (Q, horizon_days) del N2 acumulado futuro, remuestreando semanas del historico."""
+        key = ("bands", self.digest, paths, horizon_days, tuple(quantiles), seed)
+
+        def compute():
+            weeks = len(self.n2) // SEMANA
+            if weeks == 0:
+                raise ValueError("Se necesita al menos una semana de consumo para las bandas")
+            history = self.n2[len(self.n2) - weeks * SEMANA:].reshape(weeks, SEMANA)
+            rng = np.random.default_rng(seed)
+            picks = rng.integers(0, weeks, size=(paths, -(-horizon_days // SEMANA)))
+            future = history[picks].reshape(paths, -1)[:, :horizon_days]
+            return {"quantiles": np.asarray(quantiles, dtype=np.float64),
+                    "cum_n2": np.quantile(np.cumsum(future, axis=1), quantiles, axis=0)}
+        return _memoized(key, compute)
+
+    def bands(self, paths=1000, horizon_days=3650, quantiles=(0.1, 0.5, 0.9), seed=0, grid=True, **values):
+        """
+        Payback Monte Carlo por combinacion: {"quantiles", "payback_meses" (Q, K),
+        "ahorro_acumulado" (Q, K, meses)}; fila q de payback = cuantil q.
+        """
+        key = ("payback_bands", self.digest, paths, horizon_days, tuple(quantiles), seed, grid) + tuple(
+            _key_part(self.base[n] if values.get(n) is None else values[n]) for n in AXES)
+
+        def compute():
+            point = self.evaluate(grid=grid, **values)
+            # payback en el cuantil q <=> N2 acumulado en el cuantil 1 - q
+            qs = np.round(np.asarray(quantiles, dtype=np.float64), 9)
+            levels = tuple(sorted(set(qs) | set(np.round(1 - qs, 9))))
+            cum = self.consumption_bands(paths, horizon_days, levels, seed)["cum_n2"]
+            band = {q: cum[i] for i, q in enumerate(levels)}
+            ahorro_m3 = (point["costo_lin"] - point["costo_psa"]) * point["factor_n2"]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                restante = np.where(ahorro_m3 > 0, (point["capex"] - point["ahorro_acumulado"]) / ahorro_m3, np.inf)
+            payback = np.empty((len(qs), len(restante)))
+            for i, q in enumerate(qs):
+                days = np.searchsorted(band[np.round(1 - q, 9)], restante, side="left") + 1.0
+                days[days > horizon_days] = np.inf
+                payback[i] = np.where(restante <= 0, 0.0, days / DIAS_MES)
+            meses = np.arange(DIAS_MES, horizon_days + 1, DIAS_MES) - 1
+            curves = np.stack([band[q][meses] for q in qs])
+            ahorro = point["ahorro_acumulado"][None, :, None] + ahorro_m3[None, :, None] * curves[:, None, :]
+            return {"quantiles": qs, "payback_meses": payback, "ahorro_acumulado": ahorro}
+        return _memoized(key, compute)
+
+
+def main():
+    from daily_update import DailyTracker
+
+    parser = argparse.ArgumentParser(description="Escenarios de payback/ROI de la PSA")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--lin", type=float, nargs="*", help="USD/m³ LIN")
+    parser.add_argument("--psa-factor", type=float, nargs="*", default=[1.0], help="multiplica el costo PSA")
+    parser.add_argument("--capex", type=float, nargs="*")
+    parser.add_argument("--consumo", type=float, nargs="*", default=[1.0], help="factor de consumo de N2")
+    parser.add_argument("--bandas", action="store_true", help="agrega bandas Monte Carlo p10/p50/p90")
+    args = parser.parse_args()
+
+    with DailyTracker(args.db) as tracker:
+        engine = WhatIfEngine.from_tracker(tracker)
+    if engine is None:
+        print("❌ PSA no registrada. Ejecutar register_psa_installation() primero.")
+        return
+    psa = [engine.base["costo_psa"] * f for f in args.psa_factor]
+    values = dict(costo_lin=args.lin, costo_psa=psa, capex=args.capex, factor_n2=args.consumo)
+    result = engine.evaluate(**values)
+    bands = engine.bands(**values) if args.bandas else None
+    print(f"{'LIN':>6} {'PSA':>6} {'capex':>9} {'consumo':>7} {'ahorro/mes':>11} {'ROI anual':>9} {'payback':>8}"
+          + ("   p10 / p50 / p90" if bands else ""))
+    for i in range(len(result["payback_meses"])):
+        line = (f"{result['costo_lin'][i]:>6.2f} {result['costo_psa'][i]:>6.3f} {result['capex'][i]:>9,.0f} "
+                f"{result['factor_n2'][i]:>7.2f} {result['ahorro_mensual_proyectado'][i]:>11,.0f} "
+                f"{result['roi_anual_proyectado'][i]:>9.2f} {result['payback_meses'][i]:>8.1f}")
+        if bands:
+            line += "   " + " / ".join(f"{m:.1f}" for m in bands["payback_meses"][:, i])
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Varias lineas en el mismo loop: una trama mala en una linea no corta las demas.
+
+- "trama_vacia": el PLC contesta con cabecera MBAP de largo 1 (PDU vacia);
+  es un error de comunicacion (ModbusError) y poll_loop reconecta.
+- "trama_corta": el bloque de registros llega con un registro de menos y el
+  decode revienta con IndexError; supervise() registra y reinicia la linea.
+"""
+import asyncio
+import struct
+
+from modules.industrial.acquisition import AcquisitionService
+from modules.industrial.data_store import DataStore
+from modules.industrial.lines import Line
+from modules.industrial.modbus_tcp import AsyncModbusClient
+from modules.industrial.simulator import PlantSimulator, SimulatedPLC
+
+
+class ShortFrameClient(AsyncModbusClient):
+    async def read_holding_registers(self, address, count):
+        return (await super().read_holding_registers(address, count))[:-1]
+
+
+async def empty_pdu_server():
+    async def handle(reader, writer):
+        try:
+            while True:
+                tid, _, length, unit = struct.unpack(">HHHB", await reader.readexactly(7))
+                await reader.readexactly(length - 1)
+                writer.write(struct.pack(">HHHB", tid, 0, 1, unit))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def test_bad_frame_on_one_line_does_not_stop_the_others(tmp_path):
+    plcs = [SimulatedPLC(PlantSimulator(seed=i)).start() for i in range(3)]
+
+    def service(line, client):
+        return AcquisitionService(client=client, poller=line.poller(), name=line.id,
+                                  store=DataStore(str(tmp_path / f"{line.id}.json")),
+                                  poll_interval=0.05, reconnect_wait=0.05, reconnect_max_wait=0.2)
+
+    async def run_all():
+        server = await empty_pdu_server()
+        good = [Line(id=f"linea{i}", ip="127.0.0.1", port=plc.address[1]) for i, plc in enumerate(plcs)]
+        short = Line(id="trama_corta", ip="127.0.0.1", port=plcs[0].address[1])
+        empty = Line(id="trama_vacia", ip="127.0.0.1", port=server.sockets[0].getsockname()[1])
+        services = [service(line, line.client(timeout=1.0)) for line in good]
+        services.append(service(short, ShortFrameClient(short.ip, short.port, timeout=1.0)))
+        services.append(service(empty, empty.client(timeout=1.0)))
+        asyncio.get_running_loop().call_later(1.5, lambda: [s.stop() for s in services])
+        try:
+            await asyncio.gather(*(s.supervise() for s in services))
+        finally:
+            server.close()
+            await server.wait_closed()
+        return services
+
+    try:
+        services = asyncio.run(run_all())
+    finally:
+        for plc in plcs:
+            plc.stop()
+
+    *good, short, empty = services
+    for s in good:
+        assert s.cycles >= 15, (s.name, s.cycles, s.last_error)
+        assert s.errors == 0
+        assert s.store.read_latest() is not None
+    for s, error in ((short, "IndexError"), (empty, "ModbusError")):
+        assert s.cycles == 0
+        assert s.errors >= 3, (s.name, s.errors)
+        assert s.last_error.startswith(error), s.last_error
+        assert s.store.read_latest() is None
+        assert s.store.read_status()["errors"] == s.errors
@@ -0,0 +1,84 @@
+"""
+get_roi_metrics (resumenes por triggers + cache) == get_roi_metrics_full_scan (SUM()).
+
+Los consumos son multiplos de 1/4: las sumas en punto flotante son exactas en
+cualquier orden, asi que ambos caminos deben coincidir bit a bit.
+"""
+import random
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+import daily_update
+from daily_update import DailyTracker
+
+START = date(2020, 1, 1)
+DAYS = [START + timedelta(days=i) for i in range(1500)]
+
+
+def random_row(rng, day):
+    return (day.isoformat(), rng.randrange(20, 120) / 4, rng.randrange(40_000, 160_000) / 4,
+            rng.randrange(800, 8000) / 4, rng.randrange(240, 800) / 4, rng.randrange(0, 96) / 4, None, None)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_summaries_match_full_scan(tmp_path, seed):
+    rng = random.Random(seed)
+    tracker = DailyTracker(str(tmp_path / "roi.db"))
+    tracker.bulk_add_consumption(random_row(rng, d) for d in DAYS[:700])
+    assert tracker.get_roi_metrics() is None
+    tracker.register_psa_installation(DAYS[300].isoformat(), 580000, 2.28, 0.778189)
+    other = sqlite3.connect(tracker.db_path)
+
+    for _ in range(300):
+        op = rng.random()
+        if op < 0.35:
+            tracker.add_daily_consumption(*random_row(rng, rng.choice(DAYS)))
+        elif op < 0.55:
+            tracker.bulk_add_consumption([random_row(rng, rng.choice(DAYS)) for _ in range(20)])
+        elif op < 0.7:
+            # Corregir valor y fecha; si la fecha ya existe, OR REPLACE pisa esa fila
+            with tracker.conn:
+                tracker.conn.execute("UPDATE OR REPLACE consumo_diario SET n2_consumido_m3 = ?, fecha = ? "
+                                     "WHERE fecha = ?", (rng.randrange(800, 8000) / 4, rng.choice(DAYS).isoformat(),
+                                                         rng.choice(DAYS).isoformat()))
+        elif op < 0.8:
+            with tracker.conn:
+                tracker.conn.execute("DELETE FROM consumo_diario WHERE fecha = ?", (rng.choice(DAYS).isoformat(),))
+        elif op < 0.9:
+            tracker.register_psa_installation(rng.choice(DAYS).isoformat(), rng.choice([4e5, 580000, 7e5]),
+                                              2.28, 0.778189)
+        else:
+            # Escritura desde otra conexion: invalida el cache via PRAGMA data_version
+            with other:
+                other.execute("INSERT OR REPLACE INTO consumo_diario (fecha, produccion_tm, metros_producidos, "
+                              "n2_consumido_m3) VALUES (?, 10, 30000, ?)",
+                              (rng.choice(DAYS).isoformat(), rng.randrange(800, 8000) / 4))
+        assert tracker.get_roi_metrics() == tracker.get_roi_metrics_full_scan()
+
+    other.close()
+    tracker.rebuild_summaries()
+    assert tracker.get_roi_metrics() == tracker.get_roi_metrics_full_scan()
+    tracker.close()
+
+
+def test_module_level_roi_metrics_is_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(daily_update, "DB_PATH", str(tmp_path / "roi.db"))
+    with DailyTracker() as tracker:
+        tracker.register_psa_installation(DAYS[0].isoformat(), 580000, 2.28, 0.778189)
+        tracker.add_daily_consumption(DAYS[1].isoformat(), 20, 30000, 1000.0)
+
+    calls = []
+    compute = daily_update._roi_from_totals
+    monkeypatch.setattr(daily_update, "_roi_from_totals", lambda *a: calls.append(a) or compute(*a))
+    first = daily_update.get_roi_metrics()
+    assert daily_update.get_roi_metrics() == first
+    assert len(calls) == 1
+
+    with DailyTracker() as tracker:
+        tracker.add_daily_consumption(DAYS[2].isoformat(), 20, 30000, 500.0)
+    assert daily_update.get_roi_metrics()["n2_consumido_total"] == 1500.0
+    assert len(calls) == 2
+    daily_update._shared_tracker().close()
+    daily_update._shared.tracker = None